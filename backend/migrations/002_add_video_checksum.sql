@@ -0,0 +1,20 @@
+-- Add the upload checksum used to deduplicate identical videos
+--
+-- The app only runs Base.metadata.create_all(), which creates missing
+-- tables but never adds columns to an existing one. Databases created
+-- before checksum_sha256 was added to the Video model need this upgrade:
+--
+--   python scripts/run_migration.py 002_add_video_checksum.sql
+--
+-- Existing rows keep a NULL checksum (a unique index allows any number
+-- of NULLs), so only uploads made after the upgrade are deduplicated.
+
+ALTER TABLE videos
+    ADD COLUMN IF NOT EXISTS checksum_sha256 VARCHAR(64);
+
+-- Databases created with the column already in place got a non-unique
+-- index under the same name, so recreate it as unique
+DROP INDEX IF EXISTS ix_videos_checksum_sha256;
+
+CREATE UNIQUE INDEX ix_videos_checksum_sha256
+    ON videos (checksum_sha256);
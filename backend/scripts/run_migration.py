@@ -39,8 +39,14 @@ def run_migration(migration_file: str):
     with open(migration_path, 'r', encoding='utf-8') as f:
         sql_content = f.read()
 
+    # Drop comment lines so a statement preceded by comments isn't skipped
+    sql_content = '\n'.join(
+        line for line in sql_content.splitlines()
+        if not line.lstrip().startswith('--')
+    )
+
     # Split by semicolon (simple approach)
-    # Note: This won't handle semicolons in strings/comments perfectly,
+    # Note: This won't handle semicolons in strings perfectly,
     # but works for our simple migration
     statements = [stmt.strip() for stmt in sql_content.split(';') if stmt.strip()]
 
@@ -118,8 +124,9 @@ if __name__ == '__main__':
     print("PostgreSQL Migration Runner")
     print("=" * 60)
 
-    # Run the first migration
-    run_migration('001_create_videos.sql')
+    # Run the migration given on the command line (default: the first one)
+    # Usage: python scripts/run_migration.py [002_add_video_checksum.sql]
+    run_migration(sys.argv[1] if len(sys.argv) > 1 else '001_create_videos.sql')
 
     print("\n" + "=" * 60)
     print("[SUCCESS] Migration Complete!")
@@ -11,7 +11,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from src.services.gcs_client import (
     check_gcs_access,
-    list_gcs_videos,
+    list_gcs_videos_all,
     download_video_from_gcs,
     get_gcs_video_uri
 )
@@ -31,7 +31,7 @@ def main():
 
     # 2. 영상 목록 조회
     print("\n[Step 2] Listing videos in bucket...")
-    videos = list_gcs_videos()
+    videos = list_gcs_videos_all()
 
     if not videos:
         print("[WARNING] No videos found in bucket")
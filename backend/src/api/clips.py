@@ -67,13 +67,15 @@ def create_clip(
         # Generate clip ID
         clip_id = uuid.uuid4()
 
-        # Extract subclip
+        # Extract subclip; the duration is already known from the DB, so
+        # the source is not probed again
         extractor = get_subclip_extractor(settings.nas_clips_path)
         result = extractor.extract_subclip(
             clip_id=clip_id,
             input_path=video.original_path,
             start_sec=start_sec,
-            end_sec=end_sec
+            end_sec=end_sec,
+            input_metadata={'duration_sec': video.duration_sec}
         )
 
         # Create database record
@@ -5,6 +5,7 @@ Phase 2: 독립 실행 모드 - GCS 버킷에서 직접 영상 가져오기
 """
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from sqlalchemy.orm import Session
+import asyncio
 import uuid
 import os
 
@@ -13,7 +14,7 @@ from src.models import Video
 from src.schemas.video import VideoResponse
 from src.services.storage import StorageService, get_storage_service
 from src.services.video_metadata import VideoMetadata, get_video_metadata_service
-from src.services.gcs_client import list_gcs_videos, download_video_from_gcs, get_gcs_video_uri
+from src.services.gcs_client import list_gcs_videos_all, download_video_from_gcs, get_gcs_video_uri
 from src.services.gcs_streaming import (
     download_byte_range,
     check_moov_atom_position,
@@ -59,7 +60,7 @@ def list_gcs_videos_endpoint():
         )
 
     try:
-        videos = list_gcs_videos()
+        videos = list_gcs_videos_all()
 
         video_list = [
             {
@@ -98,7 +99,7 @@ async def import_from_gcs(
         gcs_path: GCS 경로 (예: "2025/day1/table1.mp4")
 
     Returns:
-        Video object with proxy_status='processing'
+        Video object with proxy_status='pending'
 
     Workflow:
         1. GCS에서 원본 다운로드 → /nas/original/
@@ -113,7 +114,7 @@ async def import_from_gcs(
         {
             "video_id": "550e8400-e29b-41d4-a716-446655440000",
             "filename": "table1.mp4",
-            "proxy_status": "processing",
+            "proxy_status": "pending",
             ...
         }
     """
@@ -132,10 +133,12 @@ async def import_from_gcs(
         filename = gcs_path.split('/')[-1]
         local_dest = os.path.join(settings.nas_original_path, f"{video_id}_{filename}")
 
-        original_path = download_video_from_gcs(gcs_path, local_dest=local_dest)
+        original_path = await asyncio.to_thread(
+            download_video_from_gcs, gcs_path, local_dest=local_dest
+        )
 
         # 2. Extract metadata
-        metadata = metadata_service.extract_metadata(original_path)
+        metadata = await metadata_service.extract_metadata_async(original_path)
 
         # 3. Create database record
         gcs_uri = get_gcs_video_uri(str(video_id), gcs_path)
@@ -156,18 +159,14 @@ async def import_from_gcs(
         db.commit()
         db.refresh(video)
 
-        # 4. Start proxy conversion in background
+        # 4. Start proxy conversion in background (the task claims the
+        # video and moves it to 'processing')
         background_tasks.add_task(
             proxy_conversion_task,
             video_id=video_id,
             proxy_base_path=settings.nas_proxy_path
         )
 
-        # Update status to processing
-        video.proxy_status = "processing"
-        db.commit()
-        db.refresh(video)
-
         return video
 
     except ValueError as e:
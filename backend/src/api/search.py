@@ -24,6 +24,12 @@ class SearchRequest(BaseModel):
     query: str = Field(..., min_length=1, description="Search query")
     top_k: int = Field(default=5, ge=1, le=100, description="Number of results")
     threshold: float = Field(default=0.7, ge=0.0, le=1.0, description="Similarity threshold")
+    ef_search: Optional[int] = Field(
+        default=None, ge=1, le=1000, description="HNSW ef_search (recall/latency trade-off)"
+    )
+    filters: Optional[Dict[str, Any]] = Field(
+        default=None, description="Metadata filter, e.g. {\"tournament\": \"WSOP\"}"
+    )
     
     class Config:
         json_schema_extra = {
@@ -35,6 +41,30 @@ class SearchRequest(BaseModel):
         }
 
 
+class SimilarRequest(BaseModel):
+    """Similar-video search request schema"""
+    gcs_path: str = Field(..., min_length=1, description="GCS path of the reference video")
+    top_k: int = Field(default=5, ge=1, le=100, description="Number of results")
+    threshold: float = Field(default=0.7, ge=0.0, le=1.0, description="Similarity threshold")
+    ef_search: Optional[int] = Field(
+        default=None, ge=1, le=1000, description="HNSW ef_search (recall/latency trade-off)"
+    )
+    filters: Optional[Dict[str, Any]] = Field(
+        default=None, description="Metadata filter, e.g. {\"tournament\": \"WSOP\"}"
+    )
+    rerank: bool = Field(default=False, description="Diversify results with MMR")
+    diversity: float = Field(default=0.3, ge=0.0, le=1.0, description="MMR diversity weight")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "gcs_path": "2025/day1/table1.mp4",
+                "top_k": 5,
+                "threshold": 0.7
+            }
+        }
+
+
 class SearchResult(BaseModel):
     """Single search result"""
     video_id: str
@@ -111,7 +141,9 @@ async def search_videos(
         results = await search_service.search(
             query=request.query,
             top_k=request.top_k,
-            threshold=request.threshold
+            threshold=request.threshold,
+            ef_search=request.ef_search,
+            filters=request.filters
         )
         
         return SearchResponse(
@@ -127,6 +159,53 @@ async def search_videos(
         )
 
 
+@router.post("/similar", response_model=SearchResponse)
+async def search_similar_videos(
+    request: SimilarRequest,
+    search_service: VideoSearchService = Depends(get_video_search_service)
+):
+    """
+    Find videos similar to a reference video
+    
+    The reference video is excluded from the results.
+    
+    Example:
+        POST /api/search/similar
+        {
+            "gcs_path": "2025/day1/table1.mp4",
+            "top_k": 5
+        }
+    """
+    if not settings.use_video_search:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Video search is disabled. Set USE_VIDEO_SEARCH=true"
+        )
+    
+    try:
+        results = await search_service.search_by_video(
+            gcs_path=request.gcs_path,
+            top_k=request.top_k,
+            threshold=request.threshold,
+            ef_search=request.ef_search,
+            filters=request.filters,
+            rerank=request.rerank,
+            diversity=request.diversity
+        )
+        
+        return SearchResponse(
+            results=[SearchResult(**r) for r in results],
+            total=len(results),
+            query=request.gcs_path
+        )
+        
+    except VideoSearchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
 @router.post("/index", response_model=IndexResponse)
 async def index_video(
     request: IndexRequest,
@@ -2,8 +2,10 @@
 Video API Endpoints
 """
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status, BackgroundTasks
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List
+import asyncio
 import uuid
 import os
 
@@ -36,6 +38,7 @@ async def upload_video(
     - Validates file extension (MP4, MOV, MXF only)
     - Validates file size (max 10GB)
     - Saves to NAS /nas/original/
+    - Returns the existing video if identical content was already uploaded
     - Extracts metadata with ffmpeg
     - Creates database record with proxy_status='pending'
     """
@@ -47,12 +50,8 @@ async def upload_video(
             detail=f"Invalid file extension. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
         )
 
-    # Read file content
-    file_content = await file.read()
-    file_size_bytes = len(file_content)
-
-    # Validate file size
-    if file_size_bytes > MAX_FILE_SIZE:
+    # Validate file size (known once the upload has been spooled)
+    if file.size is not None and file.size > MAX_FILE_SIZE:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             detail=f"File too large. Max size: 10GB"
@@ -60,13 +59,22 @@ async def upload_video(
 
     # Generate video_id
     video_id = uuid.uuid4()
+    original_path = None
 
     try:
-        # Save file to NAS
-        original_path = storage.save_uploaded_file(file_content, file.filename, video_id)
+        # Stream the spooled upload to NAS without loading it into memory
+        original_path, checksum = await asyncio.to_thread(
+            storage.save_uploaded_stream, file.file, file.filename, video_id
+        )
+
+        # Deduplicate by content hash
+        existing = db.query(Video).filter(Video.checksum_sha256 == checksum).first()
+        if existing is not None:
+            storage.delete_file(original_path)
+            return existing
 
         # Extract metadata with ffmpeg
-        metadata = metadata_service.extract_metadata(original_path)
+        metadata = await metadata_service.extract_metadata_async(original_path)
 
         # Create database record
         video = Video(
@@ -78,11 +86,21 @@ async def upload_video(
             fps=metadata.get('fps'),
             width=metadata.get('width'),
             height=metadata.get('height'),
-            file_size_mb=metadata.get('file_size_mb')
+            file_size_mb=metadata.get('file_size_mb'),
+            checksum_sha256=checksum
         )
 
         db.add(video)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent upload of the same content committed first
+            db.rollback()
+            existing = db.query(Video).filter(Video.checksum_sha256 == checksum).first()
+            if existing is None:
+                raise
+            storage.delete_file(original_path)
+            return existing
         db.refresh(video)
 
         return video
@@ -196,7 +214,7 @@ def create_proxy(
 
     - Starts background task to convert video to HLS proxy
     - Updates proxy_status: pending ??processing ??completed/failed
-    - Returns updated video immediately (status will be 'processing')
+    - Returns the video immediately (status stays 'pending' until the task starts)
     """
     video = db.query(Video).filter(Video.video_id == video_id).first()
 
@@ -219,18 +237,14 @@ def create_proxy(
             detail="Proxy conversion already in progress"
         )
 
-    # Start background conversion task
+    # Start background conversion task; the task itself claims the video
+    # (pending -> processing), so repeated requests can't convert it twice
     background_tasks.add_task(
         proxy_conversion_task,
         video_id=video_id,
         proxy_base_path=settings.nas_proxy_path
     )
 
-    # Update status to processing
-    video.proxy_status = "processing"
-    db.commit()
-    db.refresh(video)
-
     return video
 
 
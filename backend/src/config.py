@@ -26,6 +26,16 @@ class Settings(BaseSettings):
     ffmpeg_threads: int = 4
     ffmpeg_preset: str = "fast"
     ffmpeg_crf: int = 23
+    ffmpeg_hw_encoder: str = "x264"  # x264 | nvenc | qsv | videotoolbox
+    ffmpeg_workers: int = 2  # concurrent proxy conversions
+    hls_segment_type: str = "fmp4"  # fmp4 | mpegts (legacy players)
+
+    # GCS
+    gcs_parallel_workers: int = 0  # >1: parallel range-GET downloads
+
+    # Video Search
+    vector_index_type: str = "hnsw"  # or "diskann" (pgvectorscale)
+    supabase_db_url: str = ""  # direct Postgres DSN for embedding writes (optional)
 
     # Task Queue
     task_queue: str = "fastapi"  # or "celery"
@@ -22,6 +22,13 @@ async def startup_event():
     from src.models import Video, Clip  # noqa
     Base.metadata.create_all(bind=engine)
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled client connections"""
+    from src.services.search.video_search import close_video_search_service
+    await close_video_search_service()
+
 # CORS Middleware
 app.add_middleware(
     CORSMiddleware,
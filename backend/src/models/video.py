@@ -33,6 +33,7 @@ class Video(Base):
     width = Column(Integer, nullable=True)
     height = Column(Integer, nullable=True)
     file_size_mb = Column(Float, nullable=True)
+    checksum_sha256 = Column(String(64), nullable=True, index=True, unique=True)  # upload dedupe
 
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -25,6 +25,7 @@ class VideoResponse(BaseModel):
     width: Optional[int] = None
     height: Optional[int] = None
     file_size_mb: Optional[float] = None
+    checksum_sha256: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
@@ -3,12 +3,50 @@ FFmpeg Proxy Conversion Service
 
 Converts video files to HLS (HTTP Live Streaming) format for browser playback
 """
+import asyncio
 import ffmpeg
 import os
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Any, Optional, Dict
 from uuid import UUID
 
+from src.config import get_settings
+from src.services.ffmpeg.subclip import _read_tail
+from src.utils.fs import TRASH_DIR_NAME, remove_tree_in_background
+
+settings = get_settings()
+
+# Supported H.264 encoders (software x264 or hardware offload)
+HW_ENCODERS = ("x264", "nvenc", "qsv", "videotoolbox")
+
+# H.264 streams HLS players accept as-is: 8-bit 4:2:0 in these profiles
+HLS_COPY_PIX_FMTS = ("yuv420p",)
+HLS_COPY_H264_PROFILES = ("Constrained Baseline", "Baseline", "Main", "High")
+
+# HLS segment container -> segment file extension
+HLS_SEGMENT_TYPES = {"fmp4": "m4s", "mpegts": "ts"}
+
+# Process-wide pool bounding concurrent ffmpeg conversions. Each worker
+# only waits on an ffmpeg subprocess, so threads are sufficient.
+_conversion_executor: Optional[ThreadPoolExecutor] = None
+_conversion_executor_lock = threading.Lock()
+
+
+def _get_conversion_executor() -> ThreadPoolExecutor:
+    """Get or create the shared conversion pool (settings.ffmpeg_workers wide)"""
+    global _conversion_executor
+
+    with _conversion_executor_lock:
+        if _conversion_executor is None:
+            _conversion_executor = ThreadPoolExecutor(
+                max_workers=settings.ffmpeg_workers,
+                thread_name_prefix="ffmpeg-proxy"
+            )
+        return _conversion_executor
+
 
 class ProxyConverter:
     """
@@ -17,27 +55,45 @@ class ProxyConverter:
     Output format:
     - Video: H.264, 1280x720, CRF 23
     - Audio: AAC, 128kbps
-    - HLS: 10 second segments
+    - HLS: 10 second fMP4 (CMAF) segments, MPEG-TS optional
+
+    The scaler is skipped when the source already has the target
+    resolution, and 8-bit 4:2:0 H.264 sources that need no scaling are
+    stream-copied instead of re-encoded. Encoding can be offloaded to a hardware encoder.
+
+    Running conversions report progress through ffmpeg's -progress output
+    and can be cancelled; this state is shared by all converter instances.
     """
 
-    def __init__(self, proxy_base_path: str):
+    _progress: Dict[UUID, Dict[str, Any]] = {}
+    _processes: Dict[UUID, subprocess.Popen] = {}
+    _state_lock = threading.Lock()
+
+    def __init__(self, proxy_base_path: str, hw_encoder: Optional[str] = None):
         """
         Initialize proxy converter
 
         Args:
             proxy_base_path: Base directory for proxy files (e.g., /nas/proxy/)
+            hw_encoder: H.264 encoder, one of HW_ENCODERS
+                (default: settings.ffmpeg_hw_encoder)
         """
         self.proxy_base_path = Path(proxy_base_path)
+        self.hw_encoder = hw_encoder or settings.ffmpeg_hw_encoder
+
+        if self.hw_encoder not in HW_ENCODERS:
+            raise ValueError(f"Unsupported hardware encoder: {self.hw_encoder}")
 
     def convert_to_hls(
         self,
         video_id: UUID,
         input_path: str,
-        scale: str = "1280:720",
+        scale: Optional[str] = "1280:720",
         preset: str = "fast",
         crf: int = 23,
         audio_bitrate: str = "128k",
-        hls_time: int = 10
+        hls_time: int = 10,
+        segment_type: Optional[str] = None
     ) -> Dict[str, str]:
         """
         Convert video to HLS format
@@ -45,11 +101,15 @@ class ProxyConverter:
         Args:
             video_id: UUID of the video
             input_path: Path to original video file
-            scale: Video resolution (default: 1280:720)
+            scale: Video resolution (default: 1280:720). None, or a value
+                equal to the source resolution, skips the scaler and lets
+                H.264 sources be stream-copied
             preset: ffmpeg encoding preset (default: fast)
             crf: Constant Rate Factor for quality (default: 23)
             audio_bitrate: Audio bitrate (default: 128k)
             hls_time: HLS segment duration in seconds (default: 10)
+            segment_type: 'fmp4' or 'mpegts' for players without fMP4
+                support (default: settings.hls_segment_type)
 
         Returns:
             Dict with 'proxy_path' (m3u8 file path) and 'proxy_dir' (directory)
@@ -62,6 +122,10 @@ class ProxyConverter:
         if not os.path.exists(input_path):
             raise ValueError(f"Input file not found: {input_path}")
 
+        segment_type = segment_type or settings.hls_segment_type
+        if segment_type not in HLS_SEGMENT_TYPES:
+            raise ValueError(f"Unsupported HLS segment type: {segment_type}")
+
         # Create proxy directory for this video
         proxy_dir = self.proxy_base_path / str(video_id)
         proxy_dir.mkdir(parents=True, exist_ok=True)
@@ -73,16 +137,35 @@ class ProxyConverter:
             # Build ffmpeg command
             stream = ffmpeg.input(input_path)
 
+            source = self._probe_codecs(input_path)
+
+            # Skip the scaler entirely when it would be a no-op
+            scale_needed = scale is not None and not self._resolution_matches(source, scale)
+
             # Video processing - split scale parameter (e.g., "1280:720" -> w=1280, h=720)
-            if ':' in scale:
+            if not scale_needed:
+                video = stream.video
+            elif ':' in scale:
                 width, height = scale.split(':')
                 video = stream.video.filter('scale', w=width, h=height)
             else:
                 # If no colon, assume width only with proportional height
                 video = stream.video.filter('scale', w=scale, h=-1)
 
+            if not scale_needed and self._is_hls_compatible_h264(source):
+                video_args = {'vcodec': 'copy'}
+            else:
+                video_args = self._encoder_args(preset, crf)
+
             # Audio processing
             audio = stream.audio
+            audio_args = {'acodec': 'aac', 'audio_bitrate': audio_bitrate}
+
+            # fMP4 segments reuse the mp4 bitstream; TS repacketizes into 188B packets
+            segment_args = {'hls_segment_type': segment_type}
+            if segment_type == 'fmp4':
+                segment_args['hls_fmp4_init_filename'] = 'init.mp4'
+            segment_pattern = f"segment_%03d.{HLS_SEGMENT_TYPES[segment_type]}"
 
             # Output with HLS
             output = ffmpeg.output(
@@ -90,18 +173,16 @@ class ProxyConverter:
                 audio,
                 str(output_path),
                 format='hls',
-                vcodec='libx264',
-                preset=preset,
-                crf=crf,
-                acodec='aac',
-                audio_bitrate=audio_bitrate,
+                **video_args,
+                **audio_args,
                 hls_time=hls_time,
                 hls_list_size=0,  # Include all segments in playlist
-                hls_segment_filename=str(proxy_dir / "segment_%03d.ts")
+                hls_segment_filename=str(proxy_dir / segment_pattern),
+                **segment_args
             )
 
             # Run conversion
-            ffmpeg.run(output, capture_stdout=True, capture_stderr=True, overwrite_output=True)
+            self._run_with_progress(video_id, output, source.get('duration'))
 
             return {
                 'proxy_path': str(output_path),
@@ -109,10 +190,9 @@ class ProxyConverter:
             }
 
         except ffmpeg.Error as e:
-            # Cleanup on failure
+            # Cleanup on failure, without waiting for per-segment unlinks
             if proxy_dir.exists():
-                import shutil
-                shutil.rmtree(proxy_dir)
+                remove_tree_in_background(proxy_dir, self.proxy_base_path / TRASH_DIR_NAME)
 
             error_message = e.stderr.decode() if e.stderr else str(e)
             raise ffmpeg.Error(
@@ -121,23 +201,192 @@ class ProxyConverter:
                 e.stderr
             )
 
+    def _run_with_progress(self, video_id: UUID, output, duration: Optional[float]) -> None:
+        """
+        Run ffmpeg, publishing its -progress reports for this video
+
+        stdout carries the key=value progress stream and is parsed on a
+        reader thread; stderr is drained here, keeping only its tail for
+        error reporting.
+
+        Raises:
+            ffmpeg.Error: If ffmpeg exits non-zero (including cancellation)
+        """
+        process = ffmpeg.run_async(
+            output.global_args('-progress', 'pipe:1', '-nostats'),
+            pipe_stdout=True,
+            pipe_stderr=True,
+            overwrite_output=True
+        )
+
+        with self._state_lock:
+            self._processes[video_id] = process
+            self._progress[video_id] = {'progress': 0.0}
+
+        duration_us = duration * 1_000_000 if duration else None
+        reader = threading.Thread(
+            target=self._read_progress,
+            args=(video_id, process.stdout, duration_us),
+            daemon=True
+        )
+        reader.start()
+
+        try:
+            stderr = _read_tail(process.stderr)
+            retcode = process.wait()
+            reader.join()
+        finally:
+            with self._state_lock:
+                self._processes.pop(video_id, None)
+                self._progress.pop(video_id, None)
+
+        if retcode != 0:
+            raise ffmpeg.Error('ffmpeg', None, stderr)
+
+    def _read_progress(self, video_id: UUID, stream, duration_us: Optional[float]) -> None:
+        """Parse ffmpeg -progress lines (frame=, fps=, out_time_us=, progress=)"""
+        for raw in stream:
+            key, _, value = raw.decode(errors='replace').strip().partition('=')
+
+            try:
+                if key == 'frame':
+                    update = {'frame': int(value)}
+                elif key == 'fps':
+                    update = {'fps': float(value)}
+                elif key == 'out_time_us':
+                    out_time_us = int(value)
+                    update = {'out_time_us': out_time_us}
+                    if duration_us:
+                        update['progress'] = min(out_time_us / duration_us, 1.0)
+                elif key == 'progress' and value == 'end':
+                    update = {'progress': 1.0}
+                else:
+                    continue
+            except ValueError:
+                # ffmpeg reports N/A before the first frame is muxed
+                continue
+
+            with self._state_lock:
+                if video_id in self._progress:
+                    self._progress[video_id].update(update)
+
+    def submit_conversion(self, video_id: UUID, input_path: str, **kwargs) -> Future:
+        """
+        Queue convert_to_hls on the shared bounded conversion pool
+
+        At most settings.ffmpeg_workers conversions run at once; further
+        submissions wait in the pool's queue instead of competing for CPU
+        or encoder sessions.
+
+        Args:
+            video_id: UUID of the video
+            input_path: Path to original video file
+            **kwargs: Encoding options accepted by convert_to_hls
+
+        Returns:
+            Future resolving to the convert_to_hls result
+        """
+        return _get_conversion_executor().submit(
+            self.convert_to_hls, video_id, input_path, **kwargs
+        )
+
+    async def convert_to_hls_async(self, video_id: UUID, input_path: str, **kwargs) -> Dict[str, str]:
+        """
+        Convert on the bounded pool without blocking the event loop
+
+        Args:
+            video_id: UUID of the video
+            input_path: Path to original video file
+            **kwargs: Encoding options accepted by convert_to_hls
+
+        Returns:
+            Same dict as convert_to_hls
+        """
+        return await asyncio.wrap_future(
+            self.submit_conversion(video_id, input_path, **kwargs)
+        )
+
+    def _encoder_args(self, preset: str, crf: int) -> Dict[str, Any]:
+        """ffmpeg output options for the configured H.264 encoder"""
+        if self.hw_encoder == "nvenc":
+            return {'vcodec': 'h264_nvenc', 'preset': 'p4', 'rc': 'vbr', 'cq': crf}
+        if self.hw_encoder == "qsv":
+            return {'vcodec': 'h264_qsv', 'preset': preset, 'global_quality': crf}
+        if self.hw_encoder == "videotoolbox":
+            # No CRF mode; 4 Mbps is ample for a 720p proxy
+            return {'vcodec': 'h264_videotoolbox', 'video_bitrate': '4M'}
+        return {'vcodec': 'libx264', 'preset': preset, 'crf': crf}
+
+    @staticmethod
+    def _resolution_matches(source: Dict[str, Any], scale: str) -> bool:
+        """Whether the probed source already has the requested resolution"""
+        if not source.get('width'):
+            return False
+
+        if ':' in scale:
+            width, height = scale.split(':')
+            return (str(source['width']), str(source['height'])) == (width, height)
+
+        return str(source['width']) == scale
+
+    @staticmethod
+    def _probe_codecs(input_path: str) -> Dict[str, Any]:
+        """
+        Read source codec names and resolution
+
+        Returns an empty dict when probing fails, so callers fall back
+        to a full re-encode.
+        """
+        try:
+            probe = ffmpeg.probe(input_path)
+        except Exception:
+            return {}
+
+        info: Dict[str, Any] = {}
+        try:
+            info['duration'] = float(probe['format']['duration'])
+        except (KeyError, TypeError, ValueError):
+            pass
+
+        for stream in probe.get('streams', []):
+            codec_type = stream.get('codec_type')
+            if codec_type == 'video' and 'video_codec' not in info:
+                info['video_codec'] = stream.get('codec_name')
+                info['width'] = stream.get('width')
+                info['height'] = stream.get('height')
+                info['profile'] = stream.get('profile')
+                info['pix_fmt'] = stream.get('pix_fmt')
+            elif codec_type == 'audio' and 'audio_codec' not in info:
+                info['audio_codec'] = stream.get('codec_name')
+        return info
+
+    @staticmethod
+    def _is_hls_compatible_h264(source: Dict[str, Any]) -> bool:
+        """
+        Whether the source video stream can be copied into HLS unchanged
+
+        High 10 / 4:2:2 / 4:4:4 streams are valid H.264 but rejected by
+        most HLS players, so only 8-bit 4:2:0 Baseline/Main/High qualifies.
+        """
+        return (
+            source.get('video_codec') == 'h264'
+            and source.get('pix_fmt') in HLS_COPY_PIX_FMTS
+            and source.get('profile') in HLS_COPY_H264_PROFILES
+        )
+
     def get_conversion_progress(self, video_id: UUID) -> Optional[float]:
         """
         Get conversion progress (0.0 to 1.0)
 
-        Note: This is a placeholder. Real implementation would need to
-        parse ffmpeg progress output in real-time.
-
         Args:
             video_id: UUID of the video
 
         Returns:
             Progress as float (0.0 to 1.0), or None if not converting
         """
-        # TODO: Implement real-time progress tracking
-        # This would require running ffmpeg with progress output
-        # and parsing lines like "frame=1234 fps=30 time=00:00:41.40"
-        return None
+        with self._state_lock:
+            state = self._progress.get(video_id)
+            return state.get('progress') if state else None
 
     def cancel_conversion(self, video_id: UUID) -> bool:
         """
@@ -149,10 +398,15 @@ class ProxyConverter:
         Returns:
             True if cancelled, False if not found
         """
-        # TODO: Implement cancellation
-        # This would require keeping track of running ffmpeg processes
-        # and sending SIGTERM to terminate them
-        return False
+        with self._state_lock:
+            process = self._processes.get(video_id)
+
+        if process is None:
+            return False
+
+        # convert_to_hls sees the non-zero exit and cleans up the proxy dir
+        process.terminate()
+        return True
 
 
 def get_proxy_converter(proxy_base_path: str) -> ProxyConverter:
@@ -4,21 +4,104 @@ FFmpeg Subclip Extraction Service
 Extracts subclips from original video files with codec copy (lossless)
 
 성능 최적화:
-- Input Seeking: -ss를 -i 앞에 배치 (빠른 키프레임 점프)
+- Split Seeking: -i 앞 -ss로 시작점 직전까지 점프, -i 뒤 짧은 -ss로 정밀 트림
 - Double Seek: 대용량 파일에서 빠르고 정확한 추출
 - Codec Copy: 재인코딩 없음 (무손실)
 - Faststart: moov atom을 앞으로 (웹 재생 최적화)
+- Probe Cache: 원본별 ffprobe 결과 재사용 (같은 원본에서 반복 추출 시 재탐색 없음)
+- Trusted Extension: 호출자가 보장한 mp4/mov 원본은 ffprobe 생략 (trust_extension)
 """
 import ffmpeg
 import subprocess
 import os
 import logging
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 from uuid import UUID
 
 logger = logging.getLogger(__name__)
 
+# Output-side seek window after the fast input seek (seconds)
+KEYFRAME_SEEK_MARGIN_SEC = 0.2
+
+# Containers whose extension is trusted enough to skip probing
+# (see extract_subclip's trust_extension)
+TRUSTED_EXTENSIONS = ('.mp4', '.mov')
+
+# Bytes of ffmpeg's stderr kept for error reporting
+STDERR_TAIL_BYTES = 64 * 1024
+
+# Source metadata used by extract_subclip:
+# duration_sec, bitrate_bps, video_codec, audio_codec
+InputMetadata = Dict[str, Any]
+
+
+class SubclipExtractionError(ffmpeg.Error):
+    """
+    ffmpeg exited non-zero while extracting a subclip
+
+    stderr (and stderr_tail) hold only the last STDERR_TAIL_BYTES of
+    ffmpeg's log, so a verbose failure can't balloon memory.
+    """
+
+    def __init__(self, stderr_tail: bytes):
+        super().__init__('ffmpeg', None, stderr_tail)
+        self.stderr_tail = stderr_tail
+        self.args = (
+            f"Failed to extract subclip: {stderr_tail.decode(errors='replace')}",
+        )
+
+
+def _read_tail(stream, limit: int = STDERR_TAIL_BYTES) -> bytes:
+    """Drain a pipe, keeping only its last `limit` bytes"""
+    tail = bytearray()
+    while chunk := stream.read(limit):
+        tail += chunk
+        if len(tail) > limit:
+            del tail[:-limit]
+    return bytes(tail)
+
+
+def _parse_probe(probe: Dict[str, Any]) -> InputMetadata:
+    """Reduce ffmpeg.probe output to the fields extract_subclip uses"""
+    metadata: InputMetadata = {
+        'duration_sec': None,
+        'bitrate_bps': None,
+        'video_codec': None,
+        'audio_codec': None
+    }
+
+    try:
+        metadata['duration_sec'] = float(probe['format']['duration'])
+    except (KeyError, TypeError, ValueError):
+        pass
+
+    try:
+        metadata['bitrate_bps'] = int(probe['format']['bit_rate'])
+    except (KeyError, TypeError, ValueError):
+        pass
+
+    for stream in probe.get('streams', []):
+        codec_type = stream.get('codec_type')
+        if codec_type == 'video' and metadata['video_codec'] is None:
+            metadata['video_codec'] = stream.get('codec_name')
+        elif codec_type == 'audio' and metadata['audio_codec'] is None:
+            metadata['audio_codec'] = stream.get('codec_name')
+
+    return metadata
+
+
+@lru_cache(maxsize=128)
+def _probe_input_cached(input_path: str, mtime_ns: int, size: int) -> InputMetadata:
+    """
+    ffmpeg.probe memoized per file version (mtime/size are part of the key)
+
+    Module-level rather than per-instance: the clips API builds a new
+    SubclipExtractor per request, so an instance cache would never hit.
+    """
+    return _parse_probe(ffmpeg.probe(input_path))
+
 
 class SubclipExtractor:
     """
@@ -47,23 +130,32 @@ class SubclipExtractor:
         input_path: str,
         start_sec: float,
         end_sec: float,
-        output_extension: str = ".mp4"
+        output_extension: str = ".mp4",
+        input_metadata: Optional[InputMetadata] = None,
+        trust_extension: bool = False
     ) -> Dict[str, any]:
         """
         Extract subclip from video using codec copy
 
+        The end time is clamped to the source duration.
+
         Args:
             clip_id: UUID for the clip
             input_path: Path to original video file
             start_sec: Start time in seconds
             end_sec: End time in seconds
             output_extension: Output file extension (default: .mp4)
+            input_metadata: Known source metadata (see probe_input); skips
+                probing the source when given
+            trust_extension: Skip probing when input_path has one of
+                TRUSTED_EXTENSIONS; the end time is then not clamped and
+                a bad source is reported by ffmpeg itself (default: False)
 
         Returns:
             Dict with 'file_path', 'file_size_mb', and 'duration_sec'
 
         Raises:
-            ffmpeg.Error: If extraction fails
+            SubclipExtractionError: If extraction fails (an ffmpeg.Error)
             ValueError: If input file doesn't exist or timecodes are invalid
         """
         # Validate input
@@ -76,51 +168,93 @@ class SubclipExtractor:
         if end_sec <= start_sec:
             raise ValueError(f"end_sec ({end_sec}) must be > start_sec ({start_sec})")
 
-        # Output path
+        if input_metadata is None:
+            if trust_extension and Path(input_path).suffix.lower() in TRUSTED_EXTENSIONS:
+                input_metadata = {}
+            else:
+                input_metadata = self.probe_input(input_path)
+
+        source_duration = input_metadata.get('duration_sec')
+        if source_duration is not None:
+            if start_sec >= source_duration:
+                raise ValueError(
+                    f"start_sec ({start_sec}) is beyond the source duration ({source_duration})"
+                )
+            end_sec = min(end_sec, source_duration)
+
+        # Output path; ffmpeg writes to a .part file that is renamed into
+        # place on success, so readers never see a partial clip. The real
+        # extension stays last so ffmpeg still picks the muxer from it
         output_filename = f"{clip_id}{output_extension}"
         output_path = self.clips_base_path / output_filename
+        part_path = self.clips_base_path / f"{clip_id}.part{output_extension}"
+
+        # Split seek: input -ss jumps by byte offset to just before the cut,
+        # output -ss trims the remaining margin so the cut isn't snapped
+        # back to the previous keyframe. No -copyts: it would keep source
+        # timestamps and make the output -ss absolute (and
+        # force_key_frames, its usual partner, needs re-encoding)
+        input_seek = max(0.0, start_sec - KEYFRAME_SEEK_MARGIN_SEC)
+        output_seek = start_sec - input_seek
+        duration_sec = end_sec - start_sec
 
         try:
             # Build ffmpeg command with codec copy
-            # Use -ss before -i for faster seeking
-            # Use -to instead of -t for absolute end time
-            stream = ffmpeg.input(input_path, ss=start_sec, to=end_sec)
+            stream = ffmpeg.input(input_path, ss=input_seek)
 
             output = ffmpeg.output(
                 stream,
-                str(output_path),
+                str(part_path),
+                ss=output_seek,
+                t=duration_sec,
                 c='copy',  # Codec copy (no re-encoding)
                 avoid_negative_ts='make_zero',  # Fix timestamp issues
                 movflags='+faststart'  # Web optimization (moov atom at start)
             )
 
-            # Run extraction
-            ffmpeg.run(output, capture_stdout=True, capture_stderr=True, overwrite_output=True)
+            # Run extraction; stderr is drained as it is written and only
+            # its tail is kept for the error
+            process = ffmpeg.run_async(output, pipe_stderr=True, overwrite_output=True)
+            stderr_tail = _read_tail(process.stderr)
+            if process.wait() != 0:
+                raise SubclipExtractionError(stderr_tail)
+
+            os.replace(part_path, output_path)
 
             # Get file size
             file_size_bytes = output_path.stat().st_size
             file_size_mb = file_size_bytes / (1024 * 1024)
 
-            # Calculate duration
-            duration_sec = end_sec - start_sec
-
             return {
                 'file_path': str(output_path),
                 'file_size_mb': file_size_mb,
                 'duration_sec': duration_sec
             }
 
-        except ffmpeg.Error as e:
+        except Exception:
             # Cleanup on failure
-            if output_path.exists():
-                output_path.unlink()
+            part_path.unlink(missing_ok=True)
+            raise
 
-            error_message = e.stderr.decode() if e.stderr else str(e)
-            raise ffmpeg.Error(
-                f"Failed to extract subclip: {error_message}",
-                e.stdout,
-                e.stderr
-            )
+    def probe_input(self, input_path: str) -> InputMetadata:
+        """
+        Probe source metadata, reusing earlier results for the same file
+
+        Relative, symlinked and absolute paths to one file share a cache
+        entry; rewriting the file (new mtime/size) probes it again.
+
+        Args:
+            input_path: Path to original video file
+
+        Returns:
+            InputMetadata dict; fields are None when probing fails
+        """
+        st = os.stat(input_path)
+        try:
+            return dict(_probe_input_cached(os.path.realpath(input_path), st.st_mtime_ns, st.st_size))
+        except ffmpeg.Error as e:
+            logger.warning("Probe failed for %s, extracting without metadata: %s", input_path, e)
+            return _parse_probe({})
 
     def extract_subclip_double_seek(
         self,
@@ -218,8 +352,8 @@ class SubclipExtractor:
                 output_path.unlink()
             raise
 
+    @staticmethod
     def estimate_clip_size(
-        self,
         video_bitrate_mbps: float,
         duration_sec: float
     ) -> float:
@@ -237,8 +371,9 @@ class SubclipExtractor:
             >>> extractor.estimate_clip_size(8.0, 60.0)
             60.0  # 8 Mbps * 60s / 8 bits per byte = 60 MB
         """
-        # bitrate (Mbps) * duration (s) / 8 (bits to bytes) = size (MB)
-        return (video_bitrate_mbps * duration_sec) / 8
+        # bitrate (Mbps) * duration (s) / 8 (bits to bytes) = size (MB);
+        # * 0.125 is exact (power of two) and a multiply instead of a divide
+        return video_bitrate_mbps * duration_sec * 0.125
 
 
 def get_subclip_extractor(clips_base_path: str) -> SubclipExtractor:
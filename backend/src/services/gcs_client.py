@@ -5,8 +5,11 @@ GCS 버킷에서 원본 영상을 다운로드하는 서비스
 qwen_hand_analysis가 생성한 영상을 서브클립 추출에 사용
 """
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+from google.api_core.exceptions import NotFound
 from google.cloud import storage
 from google.oauth2 import service_account
 
@@ -14,12 +17,25 @@ from ..config import get_settings
 
 settings = get_settings()
 
+# 다운로드 청크 크기 (256 KiB 배수). 대용량 영상을 메모리에 통째로
+# 올리지 않고 16 MiB 단위로 파일에 스트리밍
+DOWNLOAD_CHUNK_SIZE = 16 * 1024 * 1024
 
+# 영상 파일 확장자
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.mxf', '.avi')
+
+# 병렬 range 다운로드 파트 크기
+PARALLEL_PART_SIZE = 32 * 1024 * 1024
+
+
+@lru_cache(maxsize=1)
 def get_gcs_client() -> storage.Client:
     """
-    GCS 클라이언트 생성
+    GCS 클라이언트 생성 (프로세스당 1회, 이후 캐시된 인스턴스 재사용)
 
-    Service Account 키 파일을 사용하여 인증
+    Service Account 키 파일을 사용하여 인증. 캐시된 클라이언트는 인증
+    세션과 HTTP 커넥션 풀을 공유하므로 호출마다 키 파일을 다시 읽거나
+    토큰을 새로 발급받지 않음
     """
     credentials = service_account.Credentials.from_service_account_file(
         settings.gcs_credentials_path
@@ -56,6 +72,7 @@ def download_video_from_gcs(
     client = get_gcs_client()
     bucket = client.bucket(settings.gcs_bucket_name)
     blob = bucket.blob(gcs_path)
+    blob.chunk_size = DOWNLOAD_CHUNK_SIZE
 
     # 로컬 저장 경로 결정
     if local_dest is None:
@@ -68,12 +85,67 @@ def download_video_from_gcs(
 
     # 다운로드
     print(f"Downloading from GCS: gs://{settings.gcs_bucket_name}/{gcs_path}")
-    blob.download_to_filename(local_dest)
+    if settings.gcs_parallel_workers > 1:
+        _parallel_download(blob, local_dest, workers=settings.gcs_parallel_workers)
+    else:
+        blob.download_to_filename(local_dest)
     print(f"Downloaded to: {local_dest}")
 
     return local_dest
 
 
+def _parallel_download(
+    blob: storage.Blob,
+    dest: str,
+    part_size: int = PARALLEL_PART_SIZE,
+    workers: int = 8
+) -> None:
+    """
+    여러 HTTP range 요청으로 blob을 병렬 다운로드
+
+    파일을 blob 크기로 미리 할당한 뒤, 각 파트를 자신의 오프셋에 기록
+
+    Args:
+        blob: 다운로드할 GCS blob
+        dest: 로컬 저장 경로
+        part_size: range 요청 하나의 크기 (bytes)
+        workers: 동시 다운로드 수
+    """
+    blob.reload()
+    size = blob.size
+
+    if not size or size <= part_size:
+        blob.download_to_filename(dest)
+        return
+
+    # 전체 크기로 미리 할당
+    with open(dest, "wb") as fh:
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fh.fileno(), 0, size)
+        else:
+            fh.truncate(size)
+
+    def download_part(offset: int) -> None:
+        end = min(offset + part_size, size) - 1
+        with open(dest, "r+b") as fh:
+            fh.seek(offset)
+            blob.download_to_file(fh, start=offset, end=end, raw_download=True)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # list()로 소비해야 파트 실패 예외가 전파됨
+        list(executor.map(download_part, range(0, size, part_size)))
+
+
+@lru_cache(maxsize=1)
+def _gs_prefix() -> str:
+    """
+    버킷 URI 접두사 (gs://bucket/), 프로세스당 1회 생성
+
+    설정을 바꾼 경우 _gs_prefix.cache_clear() 호출 필요
+    """
+    return f"gs://{settings.gcs_bucket_name}/"
+
+
 def get_gcs_video_uri(video_id: str, gcs_path: str) -> str:
     """
     GCS 영상의 URI 생성
@@ -89,7 +161,7 @@ def get_gcs_video_uri(video_id: str, gcs_path: str) -> str:
         >>> uri = get_gcs_video_uri("wsop_2025_day5_table3", "2025/day5/table3.mp4")
         >>> # gs://wsop-archive-raw/2025/day5/table3.mp4
     """
-    return f"gs://{settings.gcs_bucket_name}/{gcs_path}"
+    return _gs_prefix() + gcs_path
 
 
 def check_gcs_access() -> bool:
@@ -101,52 +173,85 @@ def check_gcs_access() -> bool:
     """
     try:
         client = get_gcs_client()
-        bucket = client.bucket(settings.gcs_bucket_name)
-
-        # 버킷 존재 확인
-        exists = bucket.exists()
 
-        if not exists:
-            print(f"[ERROR] Bucket does not exist: {settings.gcs_bucket_name}")
-            return False
+        # 객체 1개만 조회 (storage.objects.list 권한만 필요, buckets.get 불필요)
+        blobs = client.list_blobs(
+            settings.gcs_bucket_name,
+            max_results=1,
+            fields="items(name)"
+        )
+        next(iter(blobs), None)
 
         print(f"[OK] GCS access OK: gs://{settings.gcs_bucket_name}")
         return True
 
+    except NotFound:
+        print(f"[ERROR] Bucket does not exist: {settings.gcs_bucket_name}")
+        return False
+
     except Exception as e:
         print(f"[ERROR] GCS access failed: {e}")
         return False
 
 
-def list_gcs_videos(prefix: str = "") -> list[str]:
+def _case_insensitive_glob(ext: str) -> str:
+    """확장자를 대소문자 무시 glob으로 변환 (예: ".mp4" -> ".[mM][pP]4")"""
+    return "".join(
+        f"[{c.lower()}{c.upper()}]" if c.isalpha() else c
+        for c in ext
+    )
+
+
+def list_gcs_videos(prefix: str = "", page_size: int = 1000) -> Iterator[str]:
     """
-    GCS 버킷의 영상 파일 목록 조회
+    GCS 버킷의 영상 파일 목록 조회 (페이지 단위 스트리밍)
+
+    전체 목록을 메모리에 올리지 않고 페이지를 받는 대로 이름을 yield.
+    첫 결과는 첫 페이지 응답 직후 사용 가능
 
     Args:
         prefix: 경로 프리픽스 (예: "2025/day5/")
+        page_size: 요청당 최대 객체 수 (RPC 횟수 / 메모리 트레이드오프)
 
-    Returns:
-        list[str]: 영상 파일 경로 목록
+    Yields:
+        str: 영상 파일 경로
 
     Examples:
-        >>> videos = list_gcs_videos("2025/day5/")
-        >>> # ["2025/day5/table1.mp4", "2025/day5/table2.mp4", ...]
+        >>> first = next(list_gcs_videos("2025/day5/"))
+        >>> # "2025/day5/table1.mp4"
     """
     client = get_gcs_client()
     bucket = client.bucket(settings.gcs_bucket_name)
 
-    # 영상 파일 확장자
-    video_extensions = ('.mp4', '.mov', '.mxf', '.avi')
+    # 확장자별로 서버 측 glob 필터링 + 이름만 조회
+    # (nextPageToken을 fields에서 빼면 첫 페이지에서 목록이 잘림)
+    # glob이 확장자를 보장하므로 클라이언트 측 재검사 없이 그대로 yield
+    for ext in VIDEO_EXTENSIONS:
+        blobs = bucket.list_blobs(
+            match_glob=f"{prefix}**{_case_insensitive_glob(ext)}",
+            fields="items(name),nextPageToken",
+            page_size=page_size
+        )
+
+        for blob in blobs:
+            yield blob.name
 
-    blobs = bucket.list_blobs(prefix=prefix)
 
-    videos = [
-        blob.name
-        for blob in blobs
-        if blob.name.lower().endswith(video_extensions)
-    ]
+def list_gcs_videos_all(prefix: str = "") -> list[str]:
+    """
+    GCS 버킷의 영상 파일 전체 목록 조회
+
+    Args:
+        prefix: 경로 프리픽스 (예: "2025/day5/")
+
+    Returns:
+        list[str]: 영상 파일 경로 목록
 
-    return videos
+    Examples:
+        >>> videos = list_gcs_videos_all("2025/day5/")
+        >>> # ["2025/day5/table1.mp4", "2025/day5/table2.mp4", ...]
+    """
+    return list(list_gcs_videos(prefix))
 
 
 # 테스트용 함수
@@ -155,7 +260,7 @@ if __name__ == "__main__":
 
     if check_gcs_access():
         print("\nListing videos in bucket...")
-        videos = list_gcs_videos()
+        videos = list_gcs_videos_all()
 
         print(f"Found {len(videos)} videos:")
         for video in videos[:10]:  # 처음 10개만
@@ -3,28 +3,139 @@ Video Search Service
 
 Mixpeek + Supabase pgvector based semantic video search
 """
+import asyncio
+import json
 import logging
-from typing import List, Dict, Optional, Any
-from datetime import datetime
+import random
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Tuple
+from datetime import datetime, timezone
+
+import numpy as np
 
 from src.config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Query embedding cache (normalized query text -> embedding)
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_TTL_SEC = 600
+
+# Shared HTTP connection pool for Mixpeek calls
+HTTP_TIMEOUT_SEC = 60
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 50
+
+# Mixpeek embedding model (a mixpeek.models.VectorModel value). Videos and
+# query text must share one multimodal space for text-to-video search
+MIXPEEK_EMBEDDING_MODEL = "multimodal"
+
+# Direct Postgres upsert used when SUPABASE_DB_URL is configured
+UPSERT_EMBEDDING_SQL = """
+    INSERT INTO video_embeddings (video_id, gcs_path, embedding, metadata, indexed_at)
+    VALUES ($1, $2, $3::vector(1536), $4::jsonb, $5)
+    ON CONFLICT (video_id) DO UPDATE SET
+        gcs_path = EXCLUDED.gcs_path,
+        embedding = EXCLUDED.embedding,
+        metadata = EXCLUDED.metadata,
+        indexed_at = EXCLUDED.indexed_at
+"""
+
+# Candidates fetched per requested result when MMR re-ranking
+RERANK_OVERFETCH = 4
+
+# Similarity search RPC per vector index layout
+VECTOR_INDEX_TYPES = ("hnsw", "diskann")
+
+
+def _mmr(
+    query: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    lambda_mult: float
+) -> List[int]:
+    """
+    Maximal marginal relevance selection over L2-normalized vectors
+
+    Relevance and pairwise similarity are each one matrix product; the
+    greedy loop only updates a running max-similarity vector.
+
+    Returns:
+        Indices into candidates, in selection order
+    """
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+    
+    redundancy = np.full(len(candidates), -np.inf, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    selected: List[int] = []
+    
+    for _ in range(min(k, len(candidates))):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = lambda_mult * relevance - (1 - lambda_mult) * penalty
+        scores[~available] = -np.inf
+        
+        idx = int(np.argmax(scores))
+        selected.append(idx)
+        available[idx] = False
+        redundancy = np.maximum(redundancy, pairwise[idx])
+    
+    return selected
+
+
+def _parse_vector(value: Any) -> np.ndarray:
+    """Decode a pgvector value returned by PostgREST ("[0.1,...]" text)"""
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32)
+
 
 class VideoSearchError(Exception):
     """Video Search related errors"""
     pass
 
 
+def _prepare_embedding(vec: List[float]) -> List[float]:
+    """L2-normalize a single embedding as float32 in one vectorized op"""
+    arr = np.asarray(vec, dtype=np.float32)
+    norm = np.linalg.norm(arr)
+    if norm > 0:
+        arr /= norm
+    return arr.tolist()
+
+
+def _prepare_embeddings(vecs: List[List[float]]) -> List[List[float]]:
+    """L2-normalize a batch of embeddings row-wise in one BLAS-backed call"""
+    arr = np.asarray(vecs, dtype=np.float32)
+    norms = np.linalg.norm(arr, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    arr /= norms
+    return arr.tolist()
+
+
 class VideoSearchService:
     """Video Search Service using Mixpeek embeddings and Supabase pgvector"""
     
-    def __init__(self):
+    def __init__(self, index_type: Optional[str] = None):
+        """
+        Args:
+            index_type: Vector index layout, "hnsw" or "diskann"
+                (default: settings.vector_index_type)
+        """
+        self.index_type = index_type or settings.vector_index_type
+        if self.index_type not in VECTOR_INDEX_TYPES:
+            raise VideoSearchError(f"Unsupported vector index type: {self.index_type}")
+        
         self.mixpeek_client = None
         self.supabase_client = None
+        self._http_client = None
         self._initialized = False
+        self._query_cache: "OrderedDict[str, Tuple[List[float], float]]" = OrderedDict()
+        self._query_cache_lock = asyncio.Lock()
+        self._db_pool = None
+        self._db_pool_lock = asyncio.Lock()
         
     def _ensure_initialized(self):
         """Lazy initialization of clients"""
@@ -41,8 +152,23 @@ class VideoSearchService:
             raise VideoSearchError("SUPABASE_URL and SUPABASE_KEY required")
         
         try:
+            import httpx
             from mixpeek import Mixpeek
-            self.mixpeek_client = Mixpeek(api_key=settings.mixpeek_api_key)
+            
+            # One keep-alive pool for the service lifetime, so embedding
+            # calls reuse TLS connections instead of handshaking each time
+            self._http_client = httpx.Client(
+                http2=True,
+                timeout=HTTP_TIMEOUT_SEC,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS
+                )
+            )
+            self.mixpeek_client = Mixpeek(
+                token=settings.mixpeek_api_key,
+                client=self._http_client
+            )
             
             from supabase import create_client
             self.supabase_client = create_client(
@@ -58,43 +184,59 @@ class VideoSearchService:
         except Exception as e:
             raise VideoSearchError(f"Failed to initialize Video Search: {e}")
     
+    async def aclose(self) -> None:
+        """Release pooled HTTP and database connections"""
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+        
+        if self._db_pool is not None:
+            await self._db_pool.close()
+            self._db_pool = None
+        
+        self.mixpeek_client = None
+        self.supabase_client = None
+        self._initialized = False
+    
+    async def __aenter__(self) -> "VideoSearchService":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
     async def index_video(
         self,
         gcs_path: str,
         video_id: str,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        indexed_at: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Index a video for search"""
+        """
+        Index a video for search
+
+        Args:
+            gcs_path: GCS path to video
+            video_id: Unique video ID
+            metadata: Optional metadata stored with the embedding
+            indexed_at: ISO timestamp to store (default: now, UTC). Bulk
+                callers pass one shared value instead of one per video
+        """
         self._ensure_initialized()
         
         try:
-            gcs_url = f"gs://{settings.gcs_bucket_name}/{gcs_path}"
-            logger.info(f"Generating embedding for {gcs_path}")
-            
-            embedding_response = self.mixpeek_client.embed.video(
-                url=gcs_url,
-                model="video-v1"
-            )
-            
-            embedding = embedding_response.get("embedding", [])
-            
-            if not embedding:
-                raise VideoSearchError(f"Failed to generate embedding for {gcs_path}")
+            embedding = await asyncio.to_thread(self._embed_video, gcs_path)
             
             record = {
                 "video_id": video_id,
                 "gcs_path": gcs_path,
                 "embedding": embedding,
                 "metadata": metadata or {},
-                "indexed_at": datetime.utcnow().isoformat()
+                "indexed_at": indexed_at or datetime.now(timezone.utc).isoformat()
             }
             
-            self.supabase_client.table("video_embeddings").upsert(
-                record,
-                on_conflict="video_id"
-            ).execute()
+            await self._store_embeddings([record])
             
-            logger.info(f"Successfully indexed video: {video_id}")
+            logger.info("Successfully indexed video: %s", video_id)
             
             return {
                 "success": True,
@@ -104,62 +246,412 @@ class VideoSearchService:
             }
             
         except Exception as e:
-            logger.error(f"Failed to index video {video_id}: {e}")
+            logger.error("Failed to index video %s: %s", video_id, e)
             raise VideoSearchError(f"Indexing failed: {e}")
     
+    async def index_videos_batch(
+        self,
+        videos: List[Dict[str, Any]],
+        batch_size: int = 10,
+        parallel: int = 4
+    ) -> List[Dict[str, Any]]:
+        """
+        Index multiple videos, storing each batch with one bulk upsert
+
+        Mixpeek embeds one item per request, so the videos of a batch are
+        embedded concurrently over the shared HTTP pool. Batches run
+        concurrently too, bounded by ``parallel``, so one slow batch does
+        not hold back the others.
+
+        Args:
+            videos: Dicts with 'gcs_path', 'video_id' and optional 'metadata'
+            batch_size: Number of videos embedded and stored together
+            parallel: Maximum number of batches in flight
+
+        Returns:
+            Per-video results in input order. Failed videos carry
+            'success': False and an 'error' message.
+        """
+        self._ensure_initialized()
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(videos)
+        semaphore = asyncio.Semaphore(parallel)
+        indexed_at = datetime.now(timezone.utc).isoformat()
+        
+        async def _run(start: int) -> None:
+            async with semaphore:
+                # Small jitter spreads out request starts against rate limits
+                await asyncio.sleep(random.uniform(0, 0.05))
+                await self._index_batch(
+                    videos[start:start + batch_size], start, results, indexed_at
+                )
+        
+        await asyncio.gather(
+            *[_run(start) for start in range(0, len(videos), batch_size)]
+        )
+        
+        return results
+    
+    async def _index_batch(
+        self,
+        batch: List[Dict[str, Any]],
+        start: int,
+        results: List[Optional[Dict[str, Any]]],
+        indexed_at: str
+    ) -> None:
+        """Embed one batch and store it with a single bulk upsert"""
+        # Per-video requests, so one bad URL does not fail the whole batch
+        embeddings = await asyncio.gather(
+            *[asyncio.to_thread(self._embed_video, video["gcs_path"]) for video in batch],
+            return_exceptions=True
+        )
+        
+        for offset, (video, embedding) in enumerate(zip(batch, embeddings)):
+            if isinstance(embedding, Exception):
+                embeddings[offset] = None
+                results[start + offset] = self._failure(video, embedding)
+        
+        rows = [
+            (offset, {
+                "video_id": video["video_id"],
+                "gcs_path": video["gcs_path"],
+                "embedding": embedding,
+                "metadata": video.get("metadata") or {},
+                "indexed_at": indexed_at
+            })
+            for offset, (video, embedding) in enumerate(zip(batch, embeddings))
+            if embedding is not None
+        ]
+        
+        if not rows:
+            return
+        
+        try:
+            # One multi-row statement: the whole batch commits or none of it does
+            await self._store_embeddings([record for _, record in rows])
+        except Exception as e:
+            logger.error("Failed to store batch of %d embeddings: %s", len(rows), e)
+            for offset, _ in rows:
+                results[start + offset] = self._failure(batch[offset], e)
+            return
+        
+        for offset, record in rows:
+            results[start + offset] = {
+                "success": True,
+                "video_id": record["video_id"],
+                "gcs_path": record["gcs_path"],
+                "embedding_dim": len(record["embedding"])
+            }
+        
+        logger.info("Indexed batch of %d videos", len(rows))
+    
+    @staticmethod
+    def _failure(video: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        """Result entry for a video that could not be indexed"""
+        return {
+            "success": False,
+            "video_id": video["video_id"],
+            "gcs_path": video["gcs_path"],
+            "error": str(error)
+        }
+    
+    async def _get_db_pool(self):
+        """Direct Postgres pool for embedding writes (None: use PostgREST)"""
+        if not settings.supabase_db_url:
+            return None
+        
+        async with self._db_pool_lock:
+            if self._db_pool is None:
+                try:
+                    import asyncpg
+                    from pgvector.asyncpg import register_vector
+                except ImportError as e:
+                    raise VideoSearchError(f"Required package not installed: {e}")
+                
+                self._db_pool = await asyncpg.create_pool(
+                    settings.supabase_db_url,
+                    min_size=4,
+                    max_size=16,
+                    init=register_vector
+                )
+        
+        return self._db_pool
+    
+    async def _store_embeddings(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Upsert embedding rows
+
+        With SUPABASE_DB_URL set, rows go through a pooled asyncpg
+        connection as one prepared statement with binary vector encoding.
+        Otherwise they are sent as a single PostgREST upsert.
+        """
+        pool = await self._get_db_pool()
+        
+        if pool is None:
+            await asyncio.to_thread(
+                self.supabase_client.table("video_embeddings").upsert(
+                    records,
+                    on_conflict="video_id",
+                    returning="minimal"
+                ).execute
+            )
+            return
+        
+        # Records share one timestamp per batch; parse each distinct value once
+        timestamps = {}
+        for record in records:
+            value = record["indexed_at"]
+            if value not in timestamps:
+                parsed = datetime.fromisoformat(value)
+                timestamps[value] = parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+        
+        async with pool.acquire() as conn:
+            await conn.executemany(
+                UPSERT_EMBEDDING_SQL,
+                [
+                    (
+                        record["video_id"],
+                        record["gcs_path"],
+                        np.asarray(record["embedding"], dtype=np.float32),
+                        json.dumps(record["metadata"]),
+                        timestamps[record["indexed_at"]]
+                    )
+                    for record in records
+                ]
+            )
+    
+    def _embed_video(self, gcs_path: str) -> List[float]:
+        """Embed a single video with Mixpeek"""
+        logger.debug("Generating embedding for %s", gcs_path)
+        
+        response = self.mixpeek_client.feature_extractors.extract_embeddings(
+            type_="url",
+            embedding_model=MIXPEEK_EMBEDDING_MODEL,
+            value=f"gs://{settings.gcs_bucket_name}/{gcs_path}"
+        )
+        # Dense embeddings carry .vector; sparse ones have none
+        embedding = getattr(response.embedding, "vector", None)
+        
+        if not embedding:
+            raise VideoSearchError(f"Failed to generate embedding for {gcs_path}")
+        
+        return _prepare_embedding(embedding)
+    
     async def search(
         self,
         query: str,
         top_k: int = 5,
-        threshold: float = 0.7
+        threshold: float = 0.7,
+        ef_search: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
-        """Search for videos by text query"""
+        """
+        Search for videos by text query
+
+        Args:
+            query: Natural language query
+            top_k: Number of results
+            threshold: Minimum cosine similarity
+            ef_search: Candidate list size for this query: HNSW ef_search,
+                which also sets how many binary-quantized candidates are
+                re-ranked, or DiskANN query_rescore. Higher values raise
+                recall at the cost of latency (default: 500 for HNSW,
+                max(40, top_k * 4) for DiskANN)
+            filters: Metadata containment filter, e.g. {"tournament": "WSOP"}.
+                Applied after the index scan so the ANN index stays in use
+        """
         self._ensure_initialized()
         
         try:
-            query_embedding = self.mixpeek_client.embed.text(
-                text=query,
-                model="text-v1"
-            ).get("embedding", [])
-            
-            if not query_embedding:
-                raise VideoSearchError("Failed to generate query embedding")
-            
-            result = self.supabase_client.rpc(
-                "match_videos",
-                {
-                    "query_embedding": query_embedding,
-                    "match_threshold": threshold,
-                    "match_count": top_k
-                }
-            ).execute()
-            
-            videos = result.data or []
-            logger.info(f"Search returned {len(videos)} results")
-            
-            return [
-                {
-                    "video_id": v["video_id"],
-                    "gcs_path": v["gcs_path"],
-                    "similarity": v["similarity"],
-                    "metadata": v.get("metadata", {})
-                }
-                for v in videos
-            ]
+            query_embedding = await self._embed_query(query)
+            return await self._match(
+                query_embedding, top_k, threshold, ef_search, filters=filters
+            )
+            
+        except Exception as e:
+            logger.error("Search failed: %s", e)
+            raise VideoSearchError(f"Search failed: {e}")
+    
+    async def search_by_video(
+        self,
+        gcs_path: str,
+        top_k: int = 5,
+        threshold: float = 0.7,
+        ef_search: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        rerank: bool = False,
+        diversity: float = 0.3
+    ) -> List[Dict[str, Any]]:
+        """
+        Find videos similar to a reference video
+
+        The reference video itself is excluded inside the match query, so
+        exactly top_k neighbours come back without client-side filtering.
+
+        Args:
+            gcs_path: GCS path of the reference video
+            top_k: Number of results
+            threshold: Minimum cosine similarity
+            ef_search: Candidate list size (see search)
+            filters: Metadata containment filter (see search)
+            rerank: Diversify results with MMR over top_k * RERANK_OVERFETCH
+                candidates instead of returning the server-side ranking
+            diversity: MMR trade-off, 0 = pure relevance, 1 = pure novelty
+        """
+        self._ensure_initialized()
+        
+        try:
+            # Indexed videos already have an embedding; only embed on a miss
+            embedding = await self._get_stored_embedding(gcs_path)
+            if embedding is None:
+                embedding = await asyncio.to_thread(self._embed_video, gcs_path)
+            
+            if not rerank:
+                return await self._match(
+                    embedding, top_k, threshold, ef_search,
+                    exclude_gcs_path=gcs_path, filters=filters
+                )
+            
+            candidates = await self._match(
+                embedding, top_k * RERANK_OVERFETCH, threshold, ef_search,
+                exclude_gcs_path=gcs_path, filters=filters,
+                include_embedding=True
+            )
+            
+            if not candidates:
+                return []
+            
+            matrix = np.stack([_parse_vector(c.pop("embedding")) for c in candidates])
+            order = _mmr(
+                np.asarray(embedding, dtype=np.float32),
+                matrix,
+                top_k,
+                1.0 - diversity
+            )
+            
+            return [candidates[i] for i in order]
             
         except Exception as e:
-            logger.error(f"Search failed: {e}")
+            logger.error("Similar video search failed for %s: %s", gcs_path, e)
             raise VideoSearchError(f"Search failed: {e}")
     
+    async def _get_stored_embedding(self, gcs_path: str) -> Optional[List[float]]:
+        """Look up the indexed embedding for a GCS path (None if not indexed)"""
+        result = await asyncio.to_thread(
+            self.supabase_client.table("video_embeddings").select(
+                "embedding"
+            ).eq(
+                "gcs_path", gcs_path
+            ).limit(1).execute
+        )
+        
+        if not result.data:
+            return None
+        
+        return _parse_vector(result.data[0]["embedding"]).tolist()
+    
+    async def _match(
+        self,
+        embedding: List[float],
+        top_k: int,
+        threshold: float,
+        ef_search: Optional[int],
+        exclude_gcs_path: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        include_embedding: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Run the nearest-neighbour RPC for the configured index layout"""
+        params = {
+            "query_embedding": embedding,
+            "match_threshold": threshold,
+            "match_count": top_k
+        }
+        
+        if exclude_gcs_path is not None:
+            params["exclude_gcs_path"] = exclude_gcs_path
+        
+        if filters:
+            params["filter"] = filters
+        
+        if include_embedding:
+            params["include_embedding"] = True
+        
+        if self.index_type == "diskann":
+            rpc_name = "match_videos_diskann"
+            params["query_rescore"] = ef_search if ef_search is not None else max(40, top_k * 4)
+        else:
+            rpc_name = "match_videos"
+            # Unset: match_videos' own default sizes the candidate set
+            if ef_search is not None:
+                params["ef_search"] = ef_search
+        
+        result = await asyncio.to_thread(
+            self.supabase_client.rpc(rpc_name, params).execute
+        )
+        
+        videos = result.data or []
+        logger.info("Search returned %d results", len(videos))
+        
+        matches = [
+            {
+                "video_id": v["video_id"],
+                "gcs_path": v["gcs_path"],
+                "similarity": v["similarity"],
+                "metadata": v.get("metadata", {})
+            }
+            for v in videos
+        ]
+        
+        if include_embedding:
+            for match, v in zip(matches, videos):
+                match["embedding"] = v["embedding"]
+        
+        return matches
+    
+    async def _embed_query(self, query: str) -> List[float]:
+        """Embed query text, reusing cached embeddings for repeated queries"""
+        key = " ".join(query.split()).lower()
+        now = time.monotonic()
+        
+        async with self._query_cache_lock:
+            cached = self._query_cache.get(key)
+            if cached and now - cached[1] < QUERY_CACHE_TTL_SEC:
+                self._query_cache.move_to_end(key)
+                return cached[0]
+        
+        response = await asyncio.to_thread(
+            self.mixpeek_client.feature_extractors.extract_embeddings,
+            type_="text",
+            embedding_model=MIXPEEK_EMBEDDING_MODEL,
+            value=query
+        )
+        query_embedding = getattr(response.embedding, "vector", None)
+        
+        if not query_embedding:
+            raise VideoSearchError("Failed to generate query embedding")
+        
+        query_embedding = _prepare_embedding(query_embedding)
+        
+        async with self._query_cache_lock:
+            self._query_cache[key] = (query_embedding, now)
+            self._query_cache.move_to_end(key)
+            while len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        
+        return query_embedding
+    
     async def get_stats(self) -> Dict[str, Any]:
         """Get search index statistics"""
         self._ensure_initialized()
         
         try:
-            result = self.supabase_client.table("video_embeddings").select(
-                "video_id",
-                count="exact"
-            ).execute()
+            result = await asyncio.to_thread(
+                self.supabase_client.table("video_embeddings").select(
+                    "video_id",
+                    count="exact",
+                    head=True
+                ).execute
+            )
             
             return {
                 "total_videos": result.count or 0,
@@ -168,7 +660,7 @@ class VideoSearchService:
             }
             
         except Exception as e:
-            logger.error(f"Failed to get stats: {e}")
+            logger.error("Failed to get stats: %s", e)
             return {
                 "total_videos": 0,
                 "index_status": "error",
@@ -180,19 +672,24 @@ class VideoSearchService:
         self._ensure_initialized()
         
         try:
-            result = self.supabase_client.table("video_embeddings").delete().eq(
-                "video_id", video_id
-            ).execute()
+            result = await asyncio.to_thread(
+                self.supabase_client.table("video_embeddings").delete(
+                    count="exact",
+                    returning="minimal"
+                ).eq(
+                    "video_id", video_id
+                ).execute
+            )
             
-            deleted = len(result.data) > 0 if result.data else False
+            deleted = (result.count or 0) > 0
             
             if deleted:
-                logger.info(f"Deleted video from index: {video_id}")
+                logger.info("Deleted video from index: %s", video_id)
             
             return deleted
             
         except Exception as e:
-            logger.error(f"Failed to delete video {video_id}: {e}")
+            logger.error("Failed to delete video %s: %s", video_id, e)
             return False
 
 
@@ -207,3 +704,12 @@ def get_video_search_service() -> VideoSearchService:
         _video_search_service = VideoSearchService()
     
     return _video_search_service
+
+
+async def close_video_search_service() -> None:
+    """Close the shared Video Search Service, if it was created"""
+    global _video_search_service
+    
+    if _video_search_service is not None:
+        await _video_search_service.aclose()
+        _video_search_service = None
@@ -3,16 +3,31 @@ NAS Storage Service
 
 Handles file operations for original videos, proxy files, and subclips
 """
+import hashlib
+import io
 import os
-import shutil
+import stat
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import IO, BinaryIO, Dict, Optional, Tuple
 from uuid import UUID
 
 from src.config import get_settings
+from src.utils.fs import TRASH_DIR_NAME, remove_tree_in_background, trash_reaper
 
 settings = get_settings()
 
+# Chunk size for streaming uploads to disk
+COPY_CHUNK_SIZE = 4 * 1024 * 1024  # 4 MiB
+
+# Write buffer for NAS files; coalesces short reads into large write(2)s
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024  # 4 MiB
+
+# Short-lived stat cache for size/existence checks (one NFS roundtrip per path)
+STAT_CACHE_TTL_SEC = 1.0
+STAT_CACHE_MAX_ENTRIES = 1024
+
 
 class StorageService:
     """
@@ -22,6 +37,7 @@ class StorageService:
     - /nas/original/: High-resolution original videos
     - /nas/proxy/: HLS proxy files (m3u8 + ts segments)
     - /nas/clips/: Extracted subclips
+    - /nas/proxy/.trash/: Deleted directories awaiting removal
     """
 
     def __init__(self):
@@ -29,14 +45,27 @@ class StorageService:
         self.proxy_path = Path(settings.nas_proxy_path)
         self.clips_path = Path(settings.nas_clips_path)
 
+        self._stat_cache: Dict[str, Tuple[float, os.stat_result]] = {}
+        self._stat_cache_lock = threading.Lock()
+
         # Create directories if they don't exist
         self._ensure_directories()
 
+    @property
+    def trash_path(self) -> Path:
+        """Directory holding directories that are being deleted"""
+        return self.proxy_path / TRASH_DIR_NAME
+
     def _ensure_directories(self):
         """Create NAS directories if they don't exist"""
-        for path in [self.original_path, self.proxy_path, self.clips_path]:
+        for path in [self.original_path, self.proxy_path, self.clips_path, self.trash_path]:
             path.mkdir(parents=True, exist_ok=True)
 
+        # Finish deletes interrupted by a restart, including sibling
+        # '<name>.trash-<hex>' directories left by older releases
+        for entry in [*self.trash_path.iterdir(), *self.proxy_path.glob("*.trash-*")]:
+            trash_reaper.put(entry)
+
     def save_uploaded_file(
         self,
         file_content: bytes,
@@ -46,6 +75,9 @@ class StorageService:
         """
         Save uploaded video file to original directory
 
+        Prefer save_uploaded_stream for uploads, which never holds the
+        whole file in memory.
+
         Args:
             file_content: Raw file bytes
             filename: Original filename
@@ -54,6 +86,33 @@ class StorageService:
         Returns:
             Full path to saved file
 
+        Raises:
+            OSError: If file save fails
+        """
+        file_path, _ = self.save_uploaded_stream(io.BytesIO(file_content), filename, video_id)
+        return file_path
+
+    def save_uploaded_stream(
+        self,
+        src: IO[bytes],
+        filename: str,
+        video_id: UUID
+    ) -> Tuple[str, str]:
+        """
+        Stream an uploaded video file to the original directory
+
+        Copies in COPY_CHUNK_SIZE chunks, so memory use stays constant
+        regardless of file size. The SHA-256 is computed on each chunk as
+        it is written, avoiding a second read pass for deduplication.
+
+        Args:
+            src: Readable binary file-like object (e.g. UploadFile.file)
+            filename: Original filename
+            video_id: UUID for the video
+
+        Returns:
+            Tuple of (full path to saved file, SHA-256 hex digest)
+
         Raises:
             OSError: If file save fails
         """
@@ -63,12 +122,21 @@ class StorageService:
         file_path = self.original_path / safe_filename
 
         try:
-            with open(file_path, "wb") as f:
-                f.write(file_content)
-            return str(file_path)
+            digest = hashlib.sha256()
+            with self._open_for_write(file_path) as f:
+                while chunk := src.read(COPY_CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+            self._invalidate_stat(str(file_path))
+            return str(file_path), digest.hexdigest()
         except Exception as e:
             raise OSError(f"Failed to save file {safe_filename}: {str(e)}")
 
+    @staticmethod
+    def _open_for_write(file_path: Path) -> BinaryIO:
+        """Open a file for binary writing with a WRITE_BUFFER_SIZE buffer"""
+        return open(file_path, "wb", buffering=WRITE_BUFFER_SIZE)
+
     def get_file_path(self, filename: str, file_type: str = "original") -> Path:
         """
         Get full path for a file
@@ -96,19 +164,23 @@ class StorageService:
         """
         Delete a file from storage
 
+        Directories are renamed aside and removed in the background, so
+        the path is gone when this returns even for large HLS outputs.
+
         Args:
             file_path: Full path to the file
 
         Returns:
             True if deletion successful, False otherwise
         """
+        self._invalidate_stat(file_path)
         try:
             path = Path(file_path)
             if path.exists():
                 if path.is_file():
                     path.unlink()
                 elif path.is_dir():
-                    shutil.rmtree(path)
+                    remove_tree_in_background(path, self.trash_path)
                 return True
             return False
         except Exception as e:
@@ -119,6 +191,9 @@ class StorageService:
         """
         Delete entire proxy directory for a video (HLS files)
 
+        The directory is renamed into trash_path, which is a single
+        rename(2), and its segments are unlinked by the background reaper.
+
         Args:
             video_id: UUID of the video
 
@@ -126,7 +201,17 @@ class StorageService:
             True if deletion successful, False otherwise
         """
         proxy_dir = self.proxy_path / str(video_id)
-        return self.delete_file(str(proxy_dir))
+
+        self._invalidate_stat(str(proxy_dir))
+        try:
+            remove_tree_in_background(proxy_dir, self.trash_path)
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            print(f"Error deleting proxy directory {proxy_dir}: {str(e)}")
+            return False
+
+        return True
 
     def get_file_size(self, file_path: str) -> Optional[float]:
         """
@@ -138,14 +223,10 @@ class StorageService:
         Returns:
             File size in MB, or None if file doesn't exist
         """
-        try:
-            path = Path(file_path)
-            if path.exists() and path.is_file():
-                size_bytes = path.stat().st_size
-                return size_bytes / (1024 * 1024)  # Convert to MB
-            return None
-        except Exception:
-            return None
+        st = self._cached_stat(file_path)
+        if st is not None and stat.S_ISREG(st.st_mode):
+            return st.st_size / (1024 * 1024)  # Convert to MB
+        return None
 
     def file_exists(self, file_path: str) -> bool:
         """
@@ -157,7 +238,40 @@ class StorageService:
         Returns:
             True if file exists, False otherwise
         """
-        return Path(file_path).exists()
+        return self._cached_stat(file_path) is not None
+
+    def _cached_stat(self, file_path: str) -> Optional[os.stat_result]:
+        """
+        os.stat() with a STAT_CACHE_TTL_SEC cache
+
+        Only successful results are cached, so a newly created file is
+        visible immediately.
+
+        Returns:
+            stat result, or None if the path doesn't exist
+        """
+        now = time.monotonic()
+        with self._stat_cache_lock:
+            entry = self._stat_cache.get(file_path)
+        if entry is not None and now - entry[0] < STAT_CACHE_TTL_SEC:
+            return entry[1]
+
+        try:
+            st = os.stat(file_path)
+        except (OSError, ValueError):
+            self._invalidate_stat(file_path)
+            return None
+
+        with self._stat_cache_lock:
+            if len(self._stat_cache) >= STAT_CACHE_MAX_ENTRIES:
+                self._stat_cache.clear()
+            self._stat_cache[file_path] = (now, st)
+        return st
+
+    def _invalidate_stat(self, file_path: str) -> None:
+        """Drop a cached stat after the path was written or deleted"""
+        with self._stat_cache_lock:
+            self._stat_cache.pop(file_path, None)
 
 
 # Singleton instance
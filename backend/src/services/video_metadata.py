@@ -1,19 +1,29 @@
 """
 Video Metadata Extraction Service
 
-Uses ffmpeg to extract video metadata (duration, fps, resolution)
+Reads video metadata (duration, fps, resolution) in-process with PyAV,
+falling back to ffmpeg probe for containers PyAV cannot open
 """
+import asyncio
+import logging
+import os
 import ffmpeg
 from typing import Optional, Dict
 
+try:
+    import av
+except ImportError:  # PyAV not installed - ffmpeg probe only
+    av = None
+
+logger = logging.getLogger(__name__)
+
 
 class VideoMetadata:
-    """Video metadata extraction using ffmpeg"""
+    """Video metadata extraction using PyAV (ffmpeg probe fallback)"""
 
-    @staticmethod
-    def extract_metadata(file_path: str) -> Dict[str, Optional[float | int]]:
+    def extract_metadata(self, file_path: str) -> Dict[str, Optional[float | int]]:
         """
-        Extract video metadata using ffmpeg probe
+        Extract video metadata
 
         Args:
             file_path: Full path to video file
@@ -22,8 +32,51 @@ class VideoMetadata:
             Dict with keys: duration_sec, fps, width, height, file_size_mb
 
         Raises:
-            ffmpeg.Error: If ffmpeg probe fails
+            ValueError: If metadata cannot be extracted
+        """
+        if av is not None:
+            try:
+                return self._extract_with_av(file_path)
+            except av.error.FFmpegError as e:
+                logger.debug("PyAV could not read %s, falling back to ffmpeg probe: %s", file_path, e)
+
+        return self._extract_with_probe(file_path)
+
+    async def extract_metadata_async(self, file_path: str) -> Dict[str, Optional[float | int]]:
         """
+        Extract video metadata without blocking the event loop
+
+        Runs extract_metadata in a worker thread; use from async endpoints.
+        """
+        return await asyncio.to_thread(self.extract_metadata, file_path)
+
+    def _extract_with_av(self, file_path: str) -> Dict[str, Optional[float | int]]:
+        """Read container header in-process (no ffprobe subprocess)"""
+        with av.open(file_path) as container:
+            if not container.streams.video:
+                raise ValueError("No video stream found")
+
+            video_stream = container.streams.video[0]
+
+            duration_sec = (
+                container.duration / av.time_base
+                if container.duration is not None else 0.0
+            )
+
+            fps = None
+            if video_stream.average_rate:
+                fps = int(video_stream.average_rate)
+
+            return {
+                'duration_sec': float(duration_sec),
+                'fps': fps,
+                'width': video_stream.width,
+                'height': video_stream.height,
+                'file_size_mb': os.path.getsize(file_path) / (1024 * 1024)
+            }
+
+    def _extract_with_probe(self, file_path: str) -> Dict[str, Optional[float | int]]:
+        """Extract metadata using ffmpeg probe (ffprobe subprocess)"""
         try:
             probe = ffmpeg.probe(file_path)
 
@@ -1,7 +1,9 @@
 """
 Proxy Conversion Background Tasks
 """
+from typing import Any, Callable, List, Optional
 from uuid import UUID
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 import logging
 
@@ -28,42 +30,57 @@ def proxy_conversion_task(video_id: UUID, proxy_base_path: str):
     converter = ProxyConverter(proxy_base_path)
 
     try:
-        # Get video from database
-        video = db.query(Video).filter(Video.video_id == video_id).first()
-        if not video:
-            logger.error(f"Video {video_id} not found")
-            return
-
-        # Update status to processing
-        video.proxy_status = "processing"
+        # Claim the video and fetch its source path in one statement.
+        # Only this task moves a video out of 'pending' (the API queues it
+        # without touching the status), so a second or redelivered task
+        # finds it 'processing' and backs off.
+        original_path = db.execute(
+            update(Video)
+            .where(
+                Video.video_id == video_id,
+                Video.proxy_status == "pending"
+            )
+            .values(proxy_status="processing")
+            .returning(Video.original_path)
+        ).scalar_one_or_none()
         db.commit()
 
-        logger.info(f"Starting proxy conversion for video {video_id}")
+        if original_path is None:
+            logger.error("Video %s not found or already claimed", video_id)
+            return
+
+        logger.info("Starting proxy conversion for video %s", video_id)
 
-        # Convert to HLS
-        result = converter.convert_to_hls(
+        # Convert to HLS on the bounded conversion pool
+        result = converter.submit_conversion(
             video_id=video_id,
-            input_path=video.original_path
-        )
+            input_path=original_path
+        ).result()
 
         # Update video with proxy path and status
-        video.proxy_path = result['proxy_path']
-        video.proxy_status = "completed"
+        db.execute(
+            update(Video)
+            .where(Video.video_id == video_id)
+            .values(proxy_path=result['proxy_path'], proxy_status="completed")
+        )
         db.commit()
 
-        logger.info(f"Proxy conversion completed for video {video_id}")
+        logger.info("Proxy conversion completed for video %s", video_id)
 
     except Exception as e:
-        logger.error(f"Proxy conversion failed for video {video_id}: {str(e)}")
+        logger.error("Proxy conversion failed for video %s: %s", video_id, e)
 
         # Update status to failed
         try:
-            video = db.query(Video).filter(Video.video_id == video_id).first()
-            if video:
-                video.proxy_status = "failed"
-                db.commit()
+            db.rollback()
+            db.execute(
+                update(Video)
+                .where(Video.video_id == video_id)
+                .values(proxy_status="failed")
+            )
+            db.commit()
         except Exception as db_error:
-            logger.error(f"Failed to update status for video {video_id}: {str(db_error)}")
+            logger.error("Failed to update status for video %s: %s", video_id, db_error)
 
     finally:
         db.close()
@@ -79,29 +96,61 @@ def retry_failed_conversion(video_id: UUID, proxy_base_path: str, max_retries: i
         max_retries: Maximum number of retry attempts
 
     Returns:
-        True if retry started, False if max retries exceeded
+        True if retry started, False if the video is missing or not failed
+    """
+    # TODO: Track retry count in database
+    return bool(retry_failed_batch([video_id], proxy_base_path))
+
+
+def retry_failed_batch(
+    video_ids: List[UUID],
+    proxy_base_path: str,
+    schedule: Optional[Callable[..., Any]] = None
+) -> List[UUID]:
+    """
+    Retry failed proxy conversions for several videos
+
+    Resets every failed video in one UPDATE, then hands each one to
+    ``schedule`` (e.g. ``BackgroundTasks.add_task``). Without a scheduler
+    the conversions run inline, one after another.
+
+    Args:
+        video_ids: UUIDs of the videos to retry
+        proxy_base_path: Base path for proxy files
+        schedule: Callable taking (task, **kwargs) that queues a task
+
+    Returns:
+        UUIDs that were reset to pending and scheduled
     """
+    if not video_ids:
+        return []
+
     db: Session = SessionLocal()
 
     try:
-        video = db.query(Video).filter(Video.video_id == video_id).first()
-        if not video:
-            logger.error(f"Video {video_id} not found for retry")
-            return False
-
-        # TODO: Track retry count in database
-        # For now, just reset to pending and trigger conversion
-        video.proxy_status = "pending"
+        reset_ids = db.execute(
+            update(Video)
+            .where(
+                Video.video_id.in_(video_ids),
+                Video.proxy_status == "failed"
+            )
+            .values(proxy_status="pending")
+            .returning(Video.video_id)
+        ).scalars().all()
         db.commit()
 
-        logger.info(f"Retrying proxy conversion for video {video_id}")
-        proxy_conversion_task(video_id, proxy_base_path)
-
-        return True
-
     except Exception as e:
-        logger.error(f"Failed to retry conversion for video {video_id}: {str(e)}")
-        return False
+        db.rollback()
+        logger.error("Failed to reset %d videos for retry: %s", len(video_ids), e)
+        return []
 
     finally:
         db.close()
+
+    run = schedule or (lambda task, **kwargs: task(**kwargs))
+
+    for video_id in reset_ids:
+        logger.info("Retrying proxy conversion for video %s", video_id)
+        run(proxy_conversion_task, video_id=video_id, proxy_base_path=proxy_base_path)
+
+    return list(reset_ids)
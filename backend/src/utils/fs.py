@@ -0,0 +1,94 @@
+"""
+Filesystem Utilities
+
+Directory removal that does not block the caller: the directory is
+renamed into a trash directory (a single rename(2)) and deleted by a
+background reaper thread.
+"""
+import logging
+import os
+import queue
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Name of the trash directory kept under the proxy root
+TRASH_DIR_NAME = ".trash"
+
+
+class TrashReaper:
+    """
+    Deletes queued directories one at a time on a daemon thread
+
+    A single worker keeps concurrent deletes from competing for NAS
+    metadata I/O; the thread is started on first use.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Path]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def put(self, path: Union[str, Path]) -> None:
+        """Queue a directory (already moved aside) for deletion"""
+        self._queue.put(Path(path))
+        self._ensure_started()
+
+    def join(self) -> None:
+        """Block until every queued directory has been deleted"""
+        self._queue.join()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="fs-trash-reaper",
+                    daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            path = self._queue.get()
+            try:
+                shutil.rmtree(path, ignore_errors=True)
+                logger.debug("Deleted %s", path)
+            finally:
+                self._queue.task_done()
+
+
+# Process-wide reaper
+trash_reaper = TrashReaper()
+
+
+def remove_tree_in_background(path: Union[str, Path], trash_dir: Union[str, Path]) -> Path:
+    """
+    Atomically move a directory into trash_dir and delete it in the background
+
+    The directory is renamed to '<trash_dir>/<name>-<hex>', so its original
+    path is free (and absent) as soon as this returns. trash_dir must be on
+    the same filesystem; it is rescanned at startup (see StorageService),
+    so deletes cut short by a shutdown are finished on the next run.
+
+    Args:
+        path: Directory to remove
+        trash_dir: Trash directory to move it into
+
+    Returns:
+        Path of the renamed directory being deleted
+
+    Raises:
+        OSError: If the directory cannot be renamed
+    """
+    path = Path(path)
+    trash_dir = Path(trash_dir)
+    trash_dir.mkdir(parents=True, exist_ok=True)
+    trash = trash_dir / f"{path.name}-{uuid.uuid4().hex}"
+    os.rename(path, trash)
+    trash_reaper.put(trash)
+    return trash
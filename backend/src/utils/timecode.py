@@ -3,6 +3,12 @@ Timecode Calculation Utilities
 """
 from typing import Tuple
 
+import numpy as np
+
+# Zero-padded digit strings for format_timecode
+_TWO_DIGITS = [f"{i:02d}" for i in range(100)]
+_THREE_DIGITS = [f"{i:03d}" for i in range(1000)]
+
 
 def calculate_clip_timecode(
     in_sec: float,
@@ -55,6 +61,74 @@ def calculate_clip_timecode(
     return start_sec, end_sec, duration_sec
 
 
+def calculate_clip_timecodes_batch(
+    in_secs: np.ndarray,
+    out_secs: np.ndarray,
+    padding_sec: float,
+    video_duration: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized calculate_clip_timecode for many clips of one video
+
+    Args:
+        in_secs: In points in seconds
+        out_secs: Out points in seconds (same length as in_secs)
+        padding_sec: Padding to add before/after every clip
+        video_duration: Total video duration in seconds
+
+    Returns:
+        Tuple of (start_secs, end_secs, duration_secs) float64 arrays
+
+    Raises:
+        ValueError: If any timecode is invalid
+
+    Examples:
+        >>> starts, ends, durations = calculate_clip_timecodes_batch(
+        ...     np.array([10.0, 2.0]), np.array([20.0, 58.0]), 3.0, 60.0
+        ... )
+        >>> starts.tolist(), ends.tolist()
+        ([7.0, 0.0], [23.0, 60.0])
+    """
+    in_secs = np.asarray(in_secs, dtype=np.float64)
+    out_secs = np.asarray(out_secs, dtype=np.float64)
+
+    if in_secs.shape != out_secs.shape:
+        raise ValueError(
+            f"in_secs and out_secs must have the same shape, "
+            f"got {in_secs.shape} and {out_secs.shape}"
+        )
+
+    # Validate inputs (reports the first offending clip)
+    if padding_sec < 0:
+        raise ValueError(f"padding_sec must be >= 0, got {padding_sec}")
+
+    bad = np.flatnonzero(in_secs < 0)
+    if bad.size:
+        raise ValueError(f"in_sec must be >= 0, got {in_secs[bad[0]]} at index {bad[0]}")
+
+    bad = np.flatnonzero(out_secs <= in_secs)
+    if bad.size:
+        i = bad[0]
+        raise ValueError(
+            f"out_sec ({out_secs[i]}) must be > in_sec ({in_secs[i]}) at index {i}"
+        )
+
+    bad = np.flatnonzero(out_secs > video_duration)
+    if bad.size:
+        i = bad[0]
+        raise ValueError(
+            f"out_sec ({out_secs[i]}) cannot exceed video duration "
+            f"({video_duration}) at index {i}"
+        )
+
+    # Calculate with padding
+    start_secs = np.maximum(in_secs - padding_sec, 0.0)
+    end_secs = np.minimum(out_secs + padding_sec, video_duration)
+    duration_secs = end_secs - start_secs
+
+    return start_secs, end_secs, duration_secs
+
+
 def format_timecode(seconds: float) -> str:
     """
     Format seconds as HH:MM:SS.mmm
@@ -72,11 +146,14 @@ def format_timecode(seconds: float) -> str:
         >>> format_timecode(3661.123)
         '01:01:01.123'
     """
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = seconds % 60
-
-    return f"{hours:02d}:{minutes:02d}:{secs:06.3f}"
+    # Round once to whole milliseconds so 59.9996 carries to 00:01:00.000
+    millis = round(seconds * 1000)
+    secs, millis = divmod(millis, 1000)
+    minutes, secs = divmod(secs, 60)
+    hours, minutes = divmod(minutes, 60)
+
+    hh = _TWO_DIGITS[hours] if 0 <= hours < 100 else str(hours)
+    return f"{hh}:{_TWO_DIGITS[minutes]}:{_TWO_DIGITS[secs]}.{_THREE_DIGITS[millis]}"
 
 
 def parse_timecode(timecode: str) -> float:
@@ -0,0 +1,48 @@
+-- Video Search schema (Supabase pgvector)
+--
+-- Stores Mixpeek video embeddings and exposes the match_videos RPC used by
+-- src/services/search/video_search.py.
+
+CREATE EXTENSION IF NOT EXISTS vector;
+
+CREATE TABLE IF NOT EXISTS video_embeddings (
+    video_id    TEXT PRIMARY KEY,
+    gcs_path    TEXT NOT NULL,
+    embedding   vector(1536) NOT NULL,
+    metadata    JSONB NOT NULL DEFAULT '{}'::jsonb,
+    indexed_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS video_embeddings_embedding_idx
+    ON video_embeddings USING hnsw (embedding vector_cosine_ops);
+
+-- Cosine nearest neighbours above a similarity threshold.
+--
+-- The inner query orders by exactly the indexed expression so the planner
+-- uses an HNSW index scan, and computes the distance once per candidate.
+-- The threshold is applied to that precomputed value in the outer query
+-- instead of repeating `embedding <=> query_embedding` in WHERE/ORDER BY.
+CREATE OR REPLACE FUNCTION match_videos(
+    query_embedding vector(1536),
+    match_threshold FLOAT,
+    match_count INT
+)
+RETURNS TABLE (
+    video_id    TEXT,
+    gcs_path    TEXT,
+    metadata    JSONB,
+    similarity  FLOAT
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT c.video_id, c.gcs_path, c.metadata, 1 - c.distance AS similarity
+    FROM (
+        SELECT e.video_id, e.gcs_path, e.metadata,
+               e.embedding <=> query_embedding AS distance
+        FROM video_embeddings e
+        ORDER BY e.embedding <=> query_embedding
+        LIMIT match_count
+    ) c
+    WHERE c.distance < 1 - match_threshold
+    ORDER BY c.distance
+$$;
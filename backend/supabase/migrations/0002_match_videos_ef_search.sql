@@ -0,0 +1,39 @@
+-- Per-query HNSW ef_search for match_videos
+--
+-- Callers pass ef_search to trade recall for latency on each request.
+-- set_config(..., true) scopes the value to the RPC's transaction, so the
+-- global hnsw.ef_search setting is left untouched.
+
+DROP FUNCTION IF EXISTS match_videos(vector, FLOAT, INT);
+
+CREATE OR REPLACE FUNCTION match_videos(
+    query_embedding vector(1536),
+    match_threshold FLOAT,
+    match_count INT,
+    ef_search INT DEFAULT 40
+)
+RETURNS TABLE (
+    video_id    TEXT,
+    gcs_path    TEXT,
+    metadata    JSONB,
+    similarity  FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+    PERFORM set_config('hnsw.ef_search', ef_search::TEXT, true);
+
+    RETURN QUERY
+    SELECT c.video_id, c.gcs_path, c.metadata, 1 - c.distance AS similarity
+    FROM (
+        SELECT e.video_id, e.gcs_path, e.metadata,
+               e.embedding <=> query_embedding AS distance
+        FROM video_embeddings e
+        ORDER BY e.embedding <=> query_embedding
+        LIMIT match_count
+    ) c
+    WHERE c.distance < 1 - match_threshold
+    ORDER BY c.distance;
+END;
+$$;
@@ -0,0 +1,65 @@
+-- Two-stage search: binary-quantized candidates, exact re-rank
+--
+-- HNSW traversal over 1536-d float vectors reads ~6 KB per visited
+-- neighbour. A bit(1536) copy of each embedding is 192 bytes, so the first
+-- stage walks a Hamming-distance HNSW index over the bit vectors to pick a
+-- wide candidate set, and only those candidates are re-ranked with the full
+-- cosine distance. Requires pgvector >= 0.7 (binary_quantize, bit indexes).
+
+ALTER TABLE video_embeddings
+    ADD COLUMN IF NOT EXISTS embedding_bits bit(1536)
+    GENERATED ALWAYS AS (binary_quantize(embedding)::bit(1536)) STORED;
+
+CREATE INDEX IF NOT EXISTS video_embeddings_embedding_bits_idx
+    ON video_embeddings USING hnsw (embedding_bits bit_hamming_ops);
+
+-- The float index is no longer used by match_videos
+DROP INDEX IF EXISTS video_embeddings_embedding_idx;
+
+DROP FUNCTION IF EXISTS match_videos(vector, FLOAT, INT, INT);
+
+CREATE OR REPLACE FUNCTION match_videos(
+    query_embedding vector(1536),
+    match_threshold FLOAT,
+    match_count INT,
+    ef_search INT DEFAULT 40,
+    candidate_count INT DEFAULT 500
+)
+RETURNS TABLE (
+    video_id    TEXT,
+    gcs_path    TEXT,
+    metadata    JSONB,
+    similarity  FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+    -- The first stage must be allowed to return every requested candidate
+    -- (hnsw.ef_search caps the result size, max 1000)
+    PERFORM set_config(
+        'hnsw.ef_search',
+        LEAST(1000, GREATEST(ef_search, candidate_count, match_count))::TEXT,
+        true
+    );
+
+    RETURN QUERY
+    WITH candidates AS (
+        SELECT b.video_id
+        FROM video_embeddings b
+        ORDER BY b.embedding_bits <~> binary_quantize(query_embedding)::bit(1536)
+        LIMIT GREATEST(candidate_count, match_count)
+    )
+    SELECT c.video_id, c.gcs_path, c.metadata, 1 - c.distance AS similarity
+    FROM (
+        SELECT e.video_id, e.gcs_path, e.metadata,
+               e.embedding <=> query_embedding AS distance
+        FROM candidates k
+        JOIN video_embeddings e ON e.video_id = k.video_id
+        ORDER BY distance
+        LIMIT match_count
+    ) c
+    WHERE c.distance < 1 - match_threshold
+    ORDER BY c.distance;
+END;
+$$;
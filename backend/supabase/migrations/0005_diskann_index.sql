@@ -0,0 +1,45 @@
+-- Optional: StreamingDiskANN index (pgvectorscale)
+--
+-- For collections too large to keep the HNSW graph in memory. Apply this
+-- migration and set VECTOR_INDEX_TYPE=diskann so VideoSearchService calls
+-- match_videos_diskann instead of match_videos. The index is built on the
+-- FP32 cast of the stored halfvec; queries order by the same expression so
+-- the planner picks the index.
+
+CREATE EXTENSION IF NOT EXISTS vectorscale CASCADE;
+
+CREATE INDEX IF NOT EXISTS video_embeddings_embedding_diskann_idx
+    ON video_embeddings
+    USING diskann ((embedding::vector(1536)) vector_cosine_ops);
+
+CREATE OR REPLACE FUNCTION match_videos_diskann(
+    query_embedding vector(1536),
+    match_threshold FLOAT,
+    match_count INT,
+    query_rescore INT DEFAULT 50
+)
+RETURNS TABLE (
+    video_id    TEXT,
+    gcs_path    TEXT,
+    metadata    JSONB,
+    similarity  FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+    PERFORM set_config('diskann.query_rescore', query_rescore::TEXT, true);
+
+    RETURN QUERY
+    SELECT c.video_id, c.gcs_path, c.metadata, 1 - c.distance AS similarity
+    FROM (
+        SELECT e.video_id, e.gcs_path, e.metadata,
+               e.embedding::vector(1536) <=> query_embedding AS distance
+        FROM video_embeddings e
+        ORDER BY e.embedding::vector(1536) <=> query_embedding
+        LIMIT match_count
+    ) c
+    WHERE c.distance < 1 - match_threshold
+    ORDER BY c.distance;
+END;
+$$;
@@ -0,0 +1,90 @@
+-- Exclude a reference video inside the match query
+--
+-- "More like this" searches pass the reference video's gcs_path so it is
+-- filtered out in SQL instead of over-fetching top_k + 1 rows and dropping
+-- it client-side.
+
+DROP FUNCTION IF EXISTS match_videos(vector, FLOAT, INT, INT, INT);
+DROP FUNCTION IF EXISTS match_videos_diskann(vector, FLOAT, INT, INT);
+
+CREATE OR REPLACE FUNCTION match_videos(
+    query_embedding vector(1536),
+    match_threshold FLOAT,
+    match_count INT,
+    ef_search INT DEFAULT 40,
+    candidate_count INT DEFAULT 500,
+    exclude_gcs_path TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    video_id    TEXT,
+    gcs_path    TEXT,
+    metadata    JSONB,
+    similarity  FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+    query_half halfvec(1536) := query_embedding::halfvec(1536);
+BEGIN
+    PERFORM set_config(
+        'hnsw.ef_search',
+        LEAST(1000, GREATEST(ef_search, candidate_count, match_count))::TEXT,
+        true
+    );
+
+    RETURN QUERY
+    WITH candidates AS (
+        SELECT b.video_id
+        FROM video_embeddings b
+        WHERE exclude_gcs_path IS NULL OR b.gcs_path <> exclude_gcs_path
+        ORDER BY b.embedding_bits <~> binary_quantize(query_half)::bit(1536)
+        LIMIT GREATEST(candidate_count, match_count)
+    )
+    SELECT c.video_id, c.gcs_path, c.metadata, 1 - c.distance AS similarity
+    FROM (
+        SELECT e.video_id, e.gcs_path, e.metadata,
+               e.embedding <=> query_half AS distance
+        FROM candidates k
+        JOIN video_embeddings e ON e.video_id = k.video_id
+        ORDER BY distance
+        LIMIT match_count
+    ) c
+    WHERE c.distance < 1 - match_threshold
+    ORDER BY c.distance;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_videos_diskann(
+    query_embedding vector(1536),
+    match_threshold FLOAT,
+    match_count INT,
+    query_rescore INT DEFAULT 50,
+    exclude_gcs_path TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    video_id    TEXT,
+    gcs_path    TEXT,
+    metadata    JSONB,
+    similarity  FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+    PERFORM set_config('diskann.query_rescore', query_rescore::TEXT, true);
+
+    RETURN QUERY
+    SELECT c.video_id, c.gcs_path, c.metadata, 1 - c.distance AS similarity
+    FROM (
+        SELECT e.video_id, e.gcs_path, e.metadata,
+               e.embedding::vector(1536) <=> query_embedding AS distance
+        FROM video_embeddings e
+        WHERE exclude_gcs_path IS NULL OR e.gcs_path <> exclude_gcs_path
+        ORDER BY e.embedding::vector(1536) <=> query_embedding
+        LIMIT match_count
+    ) c
+    WHERE c.distance < 1 - match_threshold
+    ORDER BY c.distance;
+END;
+$$;
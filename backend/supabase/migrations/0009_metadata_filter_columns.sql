@@ -0,0 +1,200 @@
+-- Promote frequently filtered metadata keys to indexed columns
+--
+-- hand_id and tournament are mirrored from metadata as generated columns
+-- with btree indexes. When a filter on either key matches only a few rows
+-- (at most prefilter_limit), the match functions skip the ANN index and
+-- compute exact distances over the btree-selected rows; otherwise they
+-- keep the index-first path and filter afterwards.
+
+ALTER TABLE video_embeddings
+    ADD COLUMN IF NOT EXISTS hand_id TEXT
+    GENERATED ALWAYS AS (metadata->>'hand_id') STORED;
+
+ALTER TABLE video_embeddings
+    ADD COLUMN IF NOT EXISTS tournament TEXT
+    GENERATED ALWAYS AS (metadata->>'tournament') STORED;
+
+CREATE INDEX IF NOT EXISTS video_embeddings_hand_id_idx
+    ON video_embeddings (hand_id);
+
+CREATE INDEX IF NOT EXISTS video_embeddings_tournament_idx
+    ON video_embeddings (tournament);
+
+DROP FUNCTION IF EXISTS match_videos(vector, FLOAT, INT, INT, INT, TEXT, JSONB, BOOLEAN);
+DROP FUNCTION IF EXISTS match_videos_diskann(vector, FLOAT, INT, INT, TEXT, JSONB, BOOLEAN);
+
+-- True when the filter pins hand_id or tournament and at most max_rows
+-- rows match. The count is capped, so it reads at most max_rows + 1
+-- index entries.
+CREATE OR REPLACE FUNCTION video_filter_is_selective(
+    filter JSONB,
+    max_rows INT
+)
+RETURNS BOOLEAN
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT CASE
+        WHEN filter IS NULL OR NOT (filter ? 'hand_id' OR filter ? 'tournament') THEN false
+        ELSE (
+            SELECT count(*) <= max_rows
+            FROM (
+                SELECT 1
+                FROM video_embeddings e
+                WHERE (NOT filter ? 'hand_id' OR e.hand_id = filter->>'hand_id')
+                  AND (NOT filter ? 'tournament' OR e.tournament = filter->>'tournament')
+                LIMIT max_rows + 1
+            ) s
+        )
+    END;
+$$;
+
+-- Exact search over btree-prefiltered rows (no ANN index)
+CREATE OR REPLACE FUNCTION match_videos_exact(
+    query_half halfvec(1536),
+    match_threshold FLOAT,
+    match_count INT,
+    exclude_gcs_path TEXT,
+    filter JSONB,
+    include_embedding BOOLEAN
+)
+RETURNS TABLE (
+    video_id    TEXT,
+    gcs_path    TEXT,
+    metadata    JSONB,
+    similarity  FLOAT,
+    embedding   halfvec(1536)
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT c.video_id, c.gcs_path, c.metadata, 1 - c.distance AS similarity,
+           CASE WHEN include_embedding THEN c.embedding END
+    FROM (
+        SELECT e.video_id, e.gcs_path, e.metadata, e.embedding,
+               e.embedding <=> query_half AS distance
+        FROM video_embeddings e
+        WHERE (NOT filter ? 'hand_id' OR e.hand_id = filter->>'hand_id')
+          AND (NOT filter ? 'tournament' OR e.tournament = filter->>'tournament')
+          AND e.metadata @> filter
+          AND (exclude_gcs_path IS NULL OR e.gcs_path <> exclude_gcs_path)
+        ORDER BY distance
+        LIMIT match_count
+    ) c
+    WHERE c.distance < 1 - match_threshold
+    ORDER BY c.distance;
+$$;
+
+CREATE OR REPLACE FUNCTION match_videos(
+    query_embedding vector(1536),
+    match_threshold FLOAT,
+    match_count INT,
+    ef_search INT DEFAULT 40,
+    candidate_count INT DEFAULT 500,
+    exclude_gcs_path TEXT DEFAULT NULL,
+    filter JSONB DEFAULT NULL,
+    include_embedding BOOLEAN DEFAULT false,
+    prefilter_limit INT DEFAULT 1000
+)
+RETURNS TABLE (
+    video_id    TEXT,
+    gcs_path    TEXT,
+    metadata    JSONB,
+    similarity  FLOAT,
+    embedding   halfvec(1536)
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+    query_half halfvec(1536) := query_embedding::halfvec(1536);
+    fetch_count INT := CASE WHEN filter IS NULL THEN match_count ELSE match_count * 4 END;
+BEGIN
+    IF video_filter_is_selective(filter, prefilter_limit) THEN
+        RETURN QUERY
+        SELECT * FROM match_videos_exact(
+            query_half, match_threshold, match_count,
+            exclude_gcs_path, filter, include_embedding
+        );
+        RETURN;
+    END IF;
+
+    PERFORM set_config(
+        'hnsw.ef_search',
+        LEAST(1000, GREATEST(ef_search, candidate_count, fetch_count))::TEXT,
+        true
+    );
+
+    RETURN QUERY
+    WITH candidates AS (
+        SELECT b.video_id
+        FROM video_embeddings b
+        WHERE exclude_gcs_path IS NULL OR b.gcs_path <> exclude_gcs_path
+        ORDER BY b.embedding_bits <~> binary_quantize(query_half)::bit(1536)
+        LIMIT GREATEST(candidate_count, fetch_count)
+    )
+    SELECT c.video_id, c.gcs_path, c.metadata, 1 - c.distance AS similarity,
+           CASE WHEN include_embedding THEN c.embedding END
+    FROM (
+        SELECT e.video_id, e.gcs_path, e.metadata, e.embedding,
+               e.embedding <=> query_half AS distance
+        FROM candidates k
+        JOIN video_embeddings e ON e.video_id = k.video_id
+        WHERE filter IS NULL OR e.metadata @> filter
+        ORDER BY distance
+        LIMIT match_count
+    ) c
+    WHERE c.distance < 1 - match_threshold
+    ORDER BY c.distance;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_videos_diskann(
+    query_embedding vector(1536),
+    match_threshold FLOAT,
+    match_count INT,
+    query_rescore INT DEFAULT 50,
+    exclude_gcs_path TEXT DEFAULT NULL,
+    filter JSONB DEFAULT NULL,
+    include_embedding BOOLEAN DEFAULT false,
+    prefilter_limit INT DEFAULT 1000
+)
+RETURNS TABLE (
+    video_id    TEXT,
+    gcs_path    TEXT,
+    metadata    JSONB,
+    similarity  FLOAT,
+    embedding   halfvec(1536)
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+    IF video_filter_is_selective(filter, prefilter_limit) THEN
+        RETURN QUERY
+        SELECT * FROM match_videos_exact(
+            query_embedding::halfvec(1536), match_threshold, match_count,
+            exclude_gcs_path, filter, include_embedding
+        );
+        RETURN;
+    END IF;
+
+    PERFORM set_config('diskann.query_rescore', query_rescore::TEXT, true);
+
+    RETURN QUERY
+    SELECT c.video_id, c.gcs_path, c.metadata, 1 - c.distance AS similarity,
+           CASE WHEN include_embedding THEN c.embedding END
+    FROM (
+        SELECT e.video_id, e.gcs_path, e.metadata, e.embedding,
+               e.embedding::vector(1536) <=> query_embedding AS distance
+        FROM video_embeddings e
+        WHERE exclude_gcs_path IS NULL OR e.gcs_path <> exclude_gcs_path
+        ORDER BY e.embedding::vector(1536) <=> query_embedding
+        LIMIT CASE WHEN filter IS NULL THEN match_count ELSE match_count * 4 END
+    ) c
+    WHERE c.distance < 1 - match_threshold
+      AND (filter IS NULL OR c.metadata @> filter)
+    ORDER BY c.distance
+    LIMIT match_count;
+END;
+$$;
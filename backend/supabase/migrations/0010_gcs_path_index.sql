@@ -0,0 +1,7 @@
+-- Look up stored embeddings by gcs_path
+--
+-- Similar-video search reuses the indexed embedding of the reference video
+-- instead of re-embedding it, which needs a fast gcs_path lookup.
+
+CREATE INDEX IF NOT EXISTS video_embeddings_gcs_path_idx
+    ON video_embeddings (gcs_path);
@@ -0,0 +1,71 @@
+-- Let ef_search size the binary-quantized candidate set
+--
+-- match_videos raised hnsw.ef_search to GREATEST(ef_search,
+-- candidate_count, ...) with candidate_count defaulting to 500, so the
+-- per-query ef_search passed by callers never changed anything. The
+-- separate candidate_count is dropped: ef_search is now both the HNSW
+-- search width and the number of first-stage candidates re-ranked with
+-- the exact distance, and its default keeps the previous 500.
+
+DROP FUNCTION IF EXISTS match_videos(vector, FLOAT, INT, INT, INT, TEXT, JSONB, BOOLEAN, INT);
+
+CREATE OR REPLACE FUNCTION match_videos(
+    query_embedding vector(1536),
+    match_threshold FLOAT,
+    match_count INT,
+    ef_search INT DEFAULT 500,
+    exclude_gcs_path TEXT DEFAULT NULL,
+    filter JSONB DEFAULT NULL,
+    include_embedding BOOLEAN DEFAULT false,
+    prefilter_limit INT DEFAULT 1000
+)
+RETURNS TABLE (
+    video_id    TEXT,
+    gcs_path    TEXT,
+    metadata    JSONB,
+    similarity  FLOAT,
+    embedding   halfvec(1536)
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+    query_half halfvec(1536) := query_embedding::halfvec(1536);
+    fetch_count INT := CASE WHEN filter IS NULL THEN match_count ELSE match_count * 4 END;
+    -- hnsw.ef_search caps the first stage's result size (max 1000)
+    candidate_limit INT := LEAST(1000, GREATEST(ef_search, fetch_count));
+BEGIN
+    IF video_filter_is_selective(filter, prefilter_limit) THEN
+        RETURN QUERY
+        SELECT * FROM match_videos_exact(
+            query_half, match_threshold, match_count,
+            exclude_gcs_path, filter, include_embedding
+        );
+        RETURN;
+    END IF;
+
+    PERFORM set_config('hnsw.ef_search', candidate_limit::TEXT, true);
+
+    RETURN QUERY
+    WITH candidates AS (
+        SELECT b.video_id
+        FROM video_embeddings b
+        WHERE exclude_gcs_path IS NULL OR b.gcs_path <> exclude_gcs_path
+        ORDER BY b.embedding_bits <~> binary_quantize(query_half)::bit(1536)
+        LIMIT candidate_limit
+    )
+    SELECT c.video_id, c.gcs_path, c.metadata, 1 - c.distance AS similarity,
+           CASE WHEN include_embedding THEN c.embedding END
+    FROM (
+        SELECT e.video_id, e.gcs_path, e.metadata, e.embedding,
+               e.embedding <=> query_half AS distance
+        FROM candidates k
+        JOIN video_embeddings e ON e.video_id = k.video_id
+        WHERE filter IS NULL OR e.metadata @> filter
+        ORDER BY distance
+        LIMIT match_count
+    ) c
+    WHERE c.distance < 1 - match_threshold
+    ORDER BY c.distance;
+END;
+$$;
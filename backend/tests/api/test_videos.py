@@ -1,10 +1,8 @@
 """
 Test Video API Endpoints
 """
+import hashlib
 import pytest
-import tempfile
-import shutil
-from pathlib import Path
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -22,9 +20,9 @@ TEST_DATABASE_URL = "sqlite:///:memory:"
 
 
 @pytest.fixture
-def test_storage():
+def test_storage(tmp_path):
     """Create temporary storage"""
-    temp_dir = Path(tempfile.mkdtemp())
+    temp_dir = tmp_path
     original_path = temp_dir / "original"
     proxy_path = temp_dir / "proxy"
     clips_path = temp_dir / "clips"
@@ -35,15 +33,13 @@ def test_storage():
     storage.clips_path = clips_path
     storage._ensure_directories()
 
-    yield storage
-
-    shutil.rmtree(temp_dir)
+    return storage
 
 
 @pytest.fixture
 def mock_metadata_service():
     """Mock video metadata service"""
-    class MockMetadata:
+    class MockMetadata(VideoMetadata):
         def extract_metadata(self, file_path: str):
             return {
                 'duration_sec': 60.0,
@@ -93,10 +89,10 @@ def client(test_storage, mock_metadata_service):
     Base.metadata.drop_all(bind=engine)
 
 
-def create_test_video_file(filename: str = "test.mp4", size_mb: float = 1.0):
-    """Create fake video file for testing"""
+def create_test_video_file(filename: str = "test.mp4", size_mb: float = 1.0, fill: bytes = b"x"):
+    """Create fake video file for testing (same fill = same content)"""
     size_bytes = int(size_mb * 1024 * 1024)
-    content = b"x" * size_bytes
+    content = fill * size_bytes
     return BytesIO(content), filename
 
 
@@ -162,9 +158,9 @@ def test_list_videos_empty(client):
 
 def test_list_videos_with_pagination(client):
     """Test listing videos with pagination"""
-    # Upload 3 videos
+    # Upload 3 videos (distinct content, identical uploads are deduplicated)
     for i in range(3):
-        file_content, _ = create_test_video_file(f"test{i}.mp4", 1.0)
+        file_content, _ = create_test_video_file(f"test{i}.mp4", 1.0, fill=bytes([i]))
         client.post(
             "/api/videos/upload",
             files={"file": (f"test{i}.mp4", file_content, "video/mp4")}
@@ -266,3 +262,53 @@ def test_upload_mxf_file(client):
     assert response.status_code == 201
     data = response.json()
     assert data["filename"] == "test.mxf"
+
+
+def test_upload_duplicate_content_returns_existing_video(client, test_storage):
+    """Test that re-uploading identical content returns the first video"""
+    first = client.post(
+        "/api/videos/upload",
+        files={"file": ("a.mp4", create_test_video_file()[0], "video/mp4")}
+    ).json()
+
+    response = client.post(
+        "/api/videos/upload",
+        files={"file": ("b.mp4", create_test_video_file()[0], "video/mp4")}
+    )
+
+    assert response.json()["video_id"] == first["video_id"]
+    assert client.get("/api/videos").json()["total"] == 1
+    assert len(list(test_storage.original_path.iterdir())) == 1
+
+
+def test_upload_concurrent_duplicate_returns_existing_video(client, test_storage):
+    """Test that losing the unique-checksum race returns the winner's video"""
+    file_content, _ = create_test_video_file()
+    checksum = hashlib.sha256(file_content.getvalue()).hexdigest()
+    winner_id = uuid.uuid4()
+    db = next(app.dependency_overrides[get_db]())
+
+    class RacingMetadata(VideoMetadata):
+        def extract_metadata(self, file_path: str):
+            # Another upload of the same content commits after the dedupe lookup
+            db.add(Video(
+                video_id=winner_id,
+                filename="winner.mp4",
+                original_path="/nas/original/winner.mp4",
+                proxy_status="pending",
+                checksum_sha256=checksum
+            ))
+            db.commit()
+            return {'duration_sec': 60.0}
+
+    app.dependency_overrides[get_video_metadata_service] = lambda: RacingMetadata()
+
+    response = client.post(
+        "/api/videos/upload",
+        files={"file": ("loser.mp4", file_content, "video/mp4")}
+    )
+    db.close()
+
+    assert response.json()["video_id"] == str(winner_id)
+    assert client.get("/api/videos").json()["total"] == 1
+    assert list(test_storage.original_path.iterdir()) == []
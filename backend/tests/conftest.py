@@ -1,8 +1,14 @@
 """
 Pytest 설정 및 공통 fixtures
 """
+import itertools
+import uuid
+
 import pytest
 
+# clip_id fixture 값 생성용 (프로세스 내 단조 증가)
+_clip_ids = itertools.count(1)
+
 
 def pytest_configure(config):
     """pytest 마커 등록"""
@@ -12,3 +18,28 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "slow: 느린 테스트 (성능 테스트)"
     )
+    config.addinivalue_line(
+        "markers", "serial: 공유 상태를 사용해 pytest-xdist 병렬 실행에서 제외할 테스트"
+    )
+
+
+@pytest.fixture(scope="session")
+def sample_video_file(tmp_path_factory):
+    """
+    가짜 원본 영상 파일 (세션당 1회 생성)
+
+    테스트는 파일 내용을 읽거나 수정하지 않고 경로로만 사용
+    """
+    video_file = tmp_path_factory.mktemp("src") / "original.mp4"
+    video_file.write_bytes(b"fake video content")
+    return str(video_file)
+
+
+@pytest.fixture
+def clip_id():
+    """
+    테스트별 고유 clip UUID
+
+    uuid4() 대신 카운터 기반이라 실행마다 같은 값 (재현 가능한 출력)
+    """
+    return uuid.UUID(int=next(_clip_ids))
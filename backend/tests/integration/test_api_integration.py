@@ -47,7 +47,7 @@ def temp_storage(tmp_path):
 @pytest.fixture(scope="function")
 def mock_metadata_service():
     """Mock video metadata service"""
-    class MockMetadata:
+    class MockMetadata(VideoMetadata):
         def extract_metadata(self, file_path: str):
             return {
                 'duration_sec': 60.0,
@@ -251,12 +251,13 @@ def test_complete_workflow(client, db_session, test_video_file):
     proxy_path = Path(video.proxy_path)
     assert proxy_path.exists(), f"Proxy m3u8 file not found: {proxy_path}"
 
-    # Check for .ts segments
+    # Check for fMP4 segments and their init segment
     proxy_dir = proxy_path.parent
-    ts_files = list(proxy_dir.glob("*.ts"))
-    assert len(ts_files) > 0, "No .ts segment files found"
+    segment_files = list(proxy_dir.glob("*.m4s"))
+    assert len(segment_files) > 0, "No .m4s segment files found"
+    assert (proxy_dir / "init.mp4").exists(), "fMP4 init segment not found"
 
-    print(f"   Found {len(ts_files)} HLS segments")
+    print(f"   Found {len(segment_files)} HLS segments")
 
     # ===========================
     # Step 4: Extract Subclip
@@ -3,16 +3,38 @@ Video Search Service Tests
 
 Tests for Mixpeek + Supabase video search integration
 """
+import json
+
+import httpx
 import pytest
-from unittest.mock import patch, MagicMock
+from mixpeek import Mixpeek
+from unittest.mock import patch, MagicMock, AsyncMock
 
 from src.services.search.video_search import (
+    MIXPEEK_EMBEDDING_MODEL,
     VideoSearchService,
     VideoSearchError,
     get_video_search_service
 )
 
 
+def _mixpeek_client(handler) -> Mixpeek:
+    """Real Mixpeek SDK client whose HTTP requests are answered by handler"""
+    return Mixpeek(
+        token="test-key",
+        client=httpx.Client(transport=httpx.MockTransport(handler))
+    )
+
+
+def _embed_handler(vector, requests=None):
+    """Mixpeek handler answering every embed request with a dense vector"""
+    def handler(request):
+        if requests is not None:
+            requests.append(request)
+        return httpx.Response(200, json={"embedding": {"vector": vector}})
+    return handler
+
+
 class TestVideoSearchService:
     """VideoSearchService unit tests"""
 
@@ -64,6 +86,42 @@ class TestVideoSearchService:
             assert "SUPABASE" in str(exc_info.value)
 
 
+    def test_ensure_initialized_shares_http_client(self):
+        """Mixpeek client is built on one pooled HTTP client"""
+        service = VideoSearchService()
+        
+        with patch("src.services.search.video_search.settings") as mock_settings, \
+                patch("mixpeek.Mixpeek") as mock_mixpeek, \
+                patch("supabase.create_client"):
+            mock_settings.use_video_search = True
+            mock_settings.mixpeek_api_key = "test-key"
+            mock_settings.supabase_url = "https://example.supabase.co"
+            mock_settings.supabase_key = "key"
+            
+            service._ensure_initialized()
+        
+        assert mock_mixpeek.call_args.kwargs["client"] is service._http_client
+        assert mock_mixpeek.call_args.kwargs["token"] == "test-key"
+        service._http_client.close()
+
+    @pytest.mark.asyncio
+    async def test_aclose_releases_connections(self):
+        """aclose closes the HTTP client and DB pool"""
+        service = VideoSearchService()
+        service._initialized = True
+        http_client = MagicMock()
+        db_pool = MagicMock()
+        db_pool.close = AsyncMock()
+        service._http_client = http_client
+        service._db_pool = db_pool
+        
+        await service.aclose()
+        
+        http_client.close.assert_called_once()
+        db_pool.close.assert_awaited_once()
+        assert service._initialized is False
+
+
 class TestVideoSearchServiceMocked:
     """VideoSearchService tests with mocked dependencies"""
 
@@ -73,10 +131,7 @@ class TestVideoSearchServiceMocked:
         service = VideoSearchService()
         service._initialized = True
         
-        service.mixpeek_client = MagicMock()
-        service.mixpeek_client.embed.text.return_value = {
-            "embedding": [0.1] * 1536
-        }
+        service.mixpeek_client = _mixpeek_client(_embed_handler([0.1] * 1536))
         
         service.supabase_client = MagicMock()
         service.supabase_client.rpc.return_value.execute.return_value = MagicMock(
@@ -95,6 +150,162 @@ class TestVideoSearchServiceMocked:
         assert len(results) == 1
         assert results[0]["video_id"] == "video-1"
         assert results[0]["similarity"] == 0.95
+        
+        params = service.supabase_client.rpc.call_args[0][1]
+        assert params["match_count"] == 5
+        assert "ef_search" not in params
+        assert "filter" not in params
+
+    @pytest.mark.asyncio
+    async def test_search_passes_metadata_filter(self):
+        """Metadata filters are sent to the match query"""
+        service = VideoSearchService()
+        service._initialized = True
+        
+        service.mixpeek_client = _mixpeek_client(_embed_handler([0.1] * 1536))
+        
+        service.supabase_client = MagicMock()
+        service.supabase_client.rpc.return_value.execute.return_value = MagicMock(
+            data=[]
+        )
+        
+        await service.search("all-in", top_k=10, filters={"tournament": "WSOP"})
+        
+        params = service.supabase_client.rpc.call_args[0][1]
+        assert params["filter"] == {"tournament": "WSOP"}
+        assert params["match_count"] == 10
+
+    @pytest.mark.asyncio
+    async def test_search_passes_ef_search(self):
+        """An explicit ef_search reaches match_videos unchanged"""
+        service = VideoSearchService()
+        service._initialized = True
+        
+        service.mixpeek_client = _mixpeek_client(_embed_handler([0.1] * 1536))
+        
+        service.supabase_client = MagicMock()
+        service.supabase_client.rpc.return_value.execute.return_value = MagicMock(
+            data=[]
+        )
+        
+        await service.search("test query", top_k=5, ef_search=200)
+        
+        name, params = service.supabase_client.rpc.call_args[0]
+        assert name == "match_videos"
+        assert params["ef_search"] == 200
+
+    @pytest.mark.asyncio
+    async def test_search_diskann_index(self):
+        """DiskANN layout calls its own RPC with query_rescore"""
+        service = VideoSearchService(index_type="diskann")
+        service._initialized = True
+        
+        service.mixpeek_client = _mixpeek_client(_embed_handler([0.1] * 1536))
+        
+        service.supabase_client = MagicMock()
+        service.supabase_client.rpc.return_value.execute.return_value = MagicMock(
+            data=[]
+        )
+        
+        await service.search("test query", top_k=20)
+        
+        name, params = service.supabase_client.rpc.call_args[0]
+        assert name == "match_videos_diskann"
+        assert params["query_rescore"] == 80
+        assert "ef_search" not in params
+
+    def test_unsupported_index_type(self):
+        """Unknown index layout is rejected"""
+        with pytest.raises(VideoSearchError):
+            VideoSearchService(index_type="ivfflat")
+
+    @pytest.mark.asyncio
+    async def test_search_by_video_excludes_reference(self):
+        """Reference video is excluded in the match query"""
+        service = VideoSearchService()
+        service._initialized = True
+        
+        service.mixpeek_client = _mixpeek_client(_embed_handler([0.1] * 1536))
+        
+        service.supabase_client = MagicMock()
+        service.supabase_client.table.return_value.select.return_value.eq.return_value \
+            .limit.return_value.execute.return_value = MagicMock(data=[])
+        service.supabase_client.rpc.return_value.execute.return_value = MagicMock(
+            data=[
+                {
+                    "video_id": "video-2",
+                    "gcs_path": "other.mp4",
+                    "similarity": 0.9,
+                    "metadata": {}
+                }
+            ]
+        )
+        
+        with patch("src.services.search.video_search.settings") as mock_settings:
+            mock_settings.gcs_bucket_name = "test-bucket"
+            mock_settings.supabase_db_url = ""
+            results = await service.search_by_video("ref.mp4", top_k=3)
+        
+        assert [r["video_id"] for r in results] == ["video-2"]
+        
+        name, params = service.supabase_client.rpc.call_args[0]
+        assert name == "match_videos"
+        assert params["exclude_gcs_path"] == "ref.mp4"
+        assert params["match_count"] == 3
+
+    @pytest.mark.asyncio
+    async def test_search_by_video_reuses_stored_embedding(self):
+        """Indexed reference video is not re-embedded"""
+        service = VideoSearchService()
+        service._initialized = True
+        requests = []
+        service.mixpeek_client = _mixpeek_client(_embed_handler([0.1] * 1536, requests))
+        
+        service.supabase_client = MagicMock()
+        service.supabase_client.table.return_value.select.return_value.eq.return_value \
+            .limit.return_value.execute.return_value = MagicMock(data=[{"embedding": "[0.6,0.8]"}])
+        service.supabase_client.rpc.return_value.execute.return_value = MagicMock(data=[])
+        
+        await service.search_by_video("ref.mp4", top_k=3)
+        
+        assert requests == []
+        params = service.supabase_client.rpc.call_args[0][1]
+        assert params["query_embedding"] == pytest.approx([0.6, 0.8])
+
+    @pytest.mark.asyncio
+    async def test_search_by_video_mmr_rerank(self):
+        """MMR re-rank drops a near-duplicate in favour of a diverse result"""
+        service = VideoSearchService()
+        service._initialized = True
+        
+        service.mixpeek_client = _mixpeek_client(_embed_handler([1.0, 0.0, 0.0]))
+        
+        service.supabase_client = MagicMock()
+        service.supabase_client.table.return_value.select.return_value.eq.return_value \
+            .limit.return_value.execute.return_value = MagicMock(data=[])
+        service.supabase_client.rpc.return_value.execute.return_value = MagicMock(
+            data=[
+                {"video_id": "a", "gcs_path": "a.mp4", "similarity": 0.95,
+                 "metadata": {}, "embedding": "[0.95,0.312,0]"},
+                {"video_id": "a-dup", "gcs_path": "a2.mp4", "similarity": 0.94,
+                 "metadata": {}, "embedding": "[0.94,0.341,0]"},
+                {"video_id": "b", "gcs_path": "b.mp4", "similarity": 0.8,
+                 "metadata": {}, "embedding": "[0.8,0,0.6]"},
+            ]
+        )
+        
+        with patch("src.services.search.video_search.settings") as mock_settings:
+            mock_settings.gcs_bucket_name = "test-bucket"
+            results = await service.search_by_video(
+                "ref.mp4", top_k=2, rerank=True, diversity=0.5
+            )
+        
+        assert [r["video_id"] for r in results] == ["a", "b"]
+        assert "embedding" not in results[0]
+        
+        params = service.supabase_client.rpc.call_args[0][1]
+        assert params["include_embedding"] is True
+        assert params["match_count"] == 8
 
     @pytest.mark.asyncio
     async def test_search_empty_results(self):
@@ -102,10 +313,7 @@ class TestVideoSearchServiceMocked:
         service = VideoSearchService()
         service._initialized = True
         
-        service.mixpeek_client = MagicMock()
-        service.mixpeek_client.embed.text.return_value = {
-            "embedding": [0.1] * 1536
-        }
+        service.mixpeek_client = _mixpeek_client(_embed_handler([0.1] * 1536))
         
         service.supabase_client = MagicMock()
         service.supabase_client.rpc.return_value.execute.return_value = MagicMock(
@@ -116,6 +324,32 @@ class TestVideoSearchServiceMocked:
         
         assert len(results) == 0
 
+    @pytest.mark.asyncio
+    async def test_search_caches_query_embedding(self):
+        """Repeated queries reuse the cached embedding"""
+        service = VideoSearchService()
+        service._initialized = True
+        
+        requests = []
+        service.mixpeek_client = _mixpeek_client(_embed_handler([0.1] * 1536, requests))
+        
+        service.supabase_client = MagicMock()
+        service.supabase_client.rpc.return_value.execute.return_value = MagicMock(
+            data=[]
+        )
+        
+        await service.search("All-in  Hand", top_k=5)
+        await service.search(" all-in hand ", top_k=5)
+        
+        [request] = requests
+        assert request.url.path == "/features/extractors/embed"
+        assert json.loads(request.content) == {
+            "type": "text",
+            "value": "All-in  Hand",
+            "embedding_model": MIXPEEK_EMBEDDING_MODEL
+        }
+        assert service.supabase_client.rpc.call_count == 2
+
     @pytest.mark.asyncio
     async def test_index_video_success(self):
         """Index video successfully"""
@@ -124,11 +358,10 @@ class TestVideoSearchServiceMocked:
         
         with patch("src.services.search.video_search.settings") as mock_settings:
             mock_settings.gcs_bucket_name = "test-bucket"
+            mock_settings.supabase_db_url = ""
             
-            service.mixpeek_client = MagicMock()
-            service.mixpeek_client.embed.video.return_value = {
-                "embedding": [0.1] * 1536
-            }
+            requests = []
+            service.mixpeek_client = _mixpeek_client(_embed_handler([0.1] * 1536, requests))
             
             service.supabase_client = MagicMock()
             service.supabase_client.table.return_value.upsert.return_value.execute.return_value = MagicMock()
@@ -138,10 +371,167 @@ class TestVideoSearchServiceMocked:
                 video_id="video-123"
             )
             
+            [request] = requests
+            assert request.method == "POST"
+            assert request.url.path == "/features/extractors/embed"
+            assert request.headers["authorization"] == "Bearer test-key"
+            assert json.loads(request.content) == {
+                "type": "url",
+                "value": "gs://test-bucket/test.mp4",
+                "embedding_model": MIXPEEK_EMBEDDING_MODEL
+            }
             assert result["success"] is True
             assert result["video_id"] == "video-123"
             assert result["embedding_dim"] == 1536
 
+    @pytest.mark.asyncio
+    async def test_index_video_uses_db_pool(self):
+        """Direct DB URL routes the upsert through asyncpg instead of PostgREST"""
+        service = VideoSearchService()
+        service._initialized = True
+        
+        conn = MagicMock()
+        conn.executemany = AsyncMock()
+        pool = MagicMock()
+        pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+        pool.acquire.return_value.__aexit__ = AsyncMock(return_value=False)
+        service._db_pool = pool
+        
+        with patch("src.services.search.video_search.settings") as mock_settings:
+            mock_settings.gcs_bucket_name = "test-bucket"
+            mock_settings.supabase_db_url = "postgresql://localhost/test"
+            
+            service.mixpeek_client = _mixpeek_client(_embed_handler([0.1] * 1536))
+            service.supabase_client = MagicMock()
+            
+            await service.index_video(
+                gcs_path="test.mp4",
+                video_id="video-123",
+                metadata={"table": "1"}
+            )
+        
+        service.supabase_client.table.assert_not_called()
+        sql, rows = conn.executemany.call_args[0]
+        assert "ON CONFLICT (video_id)" in sql
+        video_id, gcs_path, embedding, metadata, indexed_at = rows[0]
+        assert (video_id, gcs_path, metadata) == ("video-123", "test.mp4", '{"table": "1"}')
+        assert embedding.dtype == "float32"
+        assert indexed_at.tzinfo is not None
+
+    @pytest.mark.asyncio
+    async def test_index_video_normalizes_embedding(self):
+        """Stored embedding is L2-normalized float32"""
+        service = VideoSearchService()
+        service._initialized = True
+        
+        with patch("src.services.search.video_search.settings") as mock_settings:
+            mock_settings.gcs_bucket_name = "test-bucket"
+            mock_settings.supabase_db_url = ""
+            
+            service.mixpeek_client = _mixpeek_client(_embed_handler([3.0, 4.0]))
+            
+            service.supabase_client = MagicMock()
+            
+            await service.index_video(gcs_path="test.mp4", video_id="video-123")
+            
+            [record] = service.supabase_client.table.return_value.upsert.call_args[0][0]
+            assert record["embedding"] == pytest.approx([0.6, 0.8])
+
+    @pytest.mark.asyncio
+    async def test_index_videos_batch_single_upsert(self):
+        """Batch indexing embeds every video and stores them in one upsert"""
+        service = VideoSearchService()
+        service._initialized = True
+        requests = []
+        
+        def handler(request):
+            requests.append(request)
+            index = int(json.loads(request.content)["value"][-5])
+            return httpx.Response(200, json={"embedding": {"vector": [0.1 * (index + 1)] * 1536}})
+        
+        with patch("src.services.search.video_search.settings") as mock_settings:
+            mock_settings.gcs_bucket_name = "test-bucket"
+            mock_settings.supabase_db_url = ""
+            
+            service.mixpeek_client = _mixpeek_client(handler)
+            service.supabase_client = MagicMock()
+            
+            videos = [
+                {"gcs_path": f"v{i}.mp4", "video_id": f"video-{i}"}
+                for i in range(3)
+            ]
+            results = await service.index_videos_batch(videos, batch_size=3)
+        
+        assert all(request.url.path == "/features/extractors/embed" for request in requests)
+        assert sorted(json.loads(request.content)["value"] for request in requests) == [
+            f"gs://test-bucket/v{i}.mp4" for i in range(3)
+        ]
+        upsert = service.supabase_client.table.return_value.upsert
+        upsert.assert_called_once()
+        assert [r["video_id"] for r in upsert.call_args[0][0]] == ["video-0", "video-1", "video-2"]
+        assert [r["video_id"] for r in results] == ["video-0", "video-1", "video-2"]
+        assert all(r["success"] for r in results)
+
+    @pytest.mark.asyncio
+    async def test_index_videos_batch_isolates_failed_video(self):
+        """A video Mixpeek cannot embed fails alone; the rest are stored"""
+        service = VideoSearchService()
+        service._initialized = True
+        
+        def handler(request):
+            if json.loads(request.content)["value"].endswith("bad.mp4"):
+                return httpx.Response(422, json={"detail": "bad url"})
+            return httpx.Response(200, json={"embedding": {"vector": [0.1] * 1536}})
+        
+        with patch("src.services.search.video_search.settings") as mock_settings:
+            mock_settings.gcs_bucket_name = "test-bucket"
+            mock_settings.supabase_db_url = ""
+            
+            service.mixpeek_client = _mixpeek_client(handler)
+            service.supabase_client = MagicMock()
+            
+            videos = [
+                {"gcs_path": "ok.mp4", "video_id": "video-ok"},
+                {"gcs_path": "bad.mp4", "video_id": "video-bad"}
+            ]
+            results = await service.index_videos_batch(videos, batch_size=2)
+            
+            # Surviving rows are still written with a single upsert
+            upsert = service.supabase_client.table.return_value.upsert
+            upsert.assert_called_once()
+            assert [r["video_id"] for r in upsert.call_args[0][0]] == ["video-ok"]
+            assert results[0]["success"] is True
+            assert results[1]["success"] is False
+            assert results[1]["video_id"] == "video-bad"
+
+    @pytest.mark.asyncio
+    async def test_index_videos_batch_preserves_order_across_batches(self):
+        """Concurrent batches still return results in input order"""
+        service = VideoSearchService()
+        service._initialized = True
+        requests = []
+        
+        with patch("src.services.search.video_search.settings") as mock_settings:
+            mock_settings.gcs_bucket_name = "test-bucket"
+            mock_settings.supabase_db_url = ""
+            
+            service.mixpeek_client = _mixpeek_client(_embed_handler([0.1] * 8, requests))
+            service.supabase_client = MagicMock()
+            
+            videos = [
+                {"gcs_path": f"v{i}.mp4", "video_id": f"video-{i}"}
+                for i in range(5)
+            ]
+            results = await service.index_videos_batch(videos, batch_size=2, parallel=2)
+            
+            assert len(requests) == 5
+            assert [r["video_id"] for r in results] == [f"video-{i}" for i in range(5)]
+            
+            upserts = service.supabase_client.table.return_value.upsert.call_args_list
+            assert len(upserts) == 3
+            timestamps = {record["indexed_at"] for call in upserts for record in call[0][0]}
+            assert len(timestamps) == 1
+
     @pytest.mark.asyncio
     async def test_get_stats_success(self):
         """Get stats returns correct format"""
@@ -166,12 +556,18 @@ class TestVideoSearchServiceMocked:
         
         service.supabase_client = MagicMock()
         service.supabase_client.table.return_value.delete.return_value.eq.return_value.execute.return_value = MagicMock(
-            data=[{"video_id": "video-123"}]
+            data=[],
+            count=1
         )
         
         result = await service.delete_video("video-123")
         
         assert result is True
+        # Deleted rows (and their embeddings) are not sent back
+        service.supabase_client.table.return_value.delete.assert_called_once_with(
+            count="exact",
+            returning="minimal"
+        )
 
 
 class TestGetVideoSearchService:
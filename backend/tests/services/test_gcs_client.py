@@ -0,0 +1,251 @@
+"""
+Tests for GCS client caching, access checks and video listings
+
+Runs against stubbed settings, so no GCS credentials or bucket are needed.
+"""
+import fnmatch
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, PropertyMock, patch
+from google.api_core.exceptions import NotFound
+
+from src.services.gcs_client import (
+    DOWNLOAD_CHUNK_SIZE,
+    _gs_prefix,
+    check_gcs_access,
+    download_video_from_gcs,
+    get_gcs_client,
+    get_gcs_video_uri,
+    list_gcs_videos,
+    list_gcs_videos_all
+)
+
+
+def _glob_listing(blobs):
+    """list_blobs side effect that applies match_glob like the server would"""
+    def list_blobs(match_glob, fields, page_size):
+        return iter([b for b in blobs if fnmatch.fnmatchcase(b.name, match_glob.replace("**", "*"))])
+    return list_blobs
+
+
+@pytest.fixture(autouse=True)
+def gcs_settings():
+    """Stub the GCS settings missing from config, and reset cached client/prefix"""
+    stub = SimpleNamespace(
+        use_gcs=True,
+        gcs_project_id="test-project",
+        gcs_bucket_name="test-bucket",
+        gcs_credentials_path="/fake/credentials.json",
+        gcs_parallel_workers=0
+    )
+    get_gcs_client.cache_clear()
+    _gs_prefix.cache_clear()
+    with patch('src.services.gcs_client.settings', stub):
+        yield stub
+    get_gcs_client.cache_clear()
+    _gs_prefix.cache_clear()
+
+
+@pytest.fixture
+def mock_gcs_client():
+    """Mock GCS client for testing"""
+    with patch('src.services.gcs_client.storage.Client') as mock_client:
+        mock_instance = MagicMock()
+        mock_client.return_value = mock_instance
+        yield mock_instance
+
+
+@pytest.fixture
+def mock_credentials():
+    """Mock service account credentials"""
+    with patch('src.services.gcs_client.service_account.Credentials.from_service_account_file') as mock_creds:
+        mock_creds.return_value = MagicMock()
+        yield mock_creds
+
+
+def test_get_gcs_client_is_cached(mock_credentials):
+    """Test that repeated calls reuse one authenticated client"""
+    with patch('src.services.gcs_client.storage.Client') as mock_client:
+        first = get_gcs_client()
+        second = get_gcs_client()
+
+        assert first is second
+        mock_client.assert_called_once()
+        mock_credentials.assert_called_once()
+
+
+def test_check_gcs_access_returns_true_when_bucket_exists(mock_gcs_client, mock_credentials):
+    """Test GCS access check returns True when bucket is accessible"""
+    # Mock single-object listing
+    mock_gcs_client.list_blobs.return_value = iter([MagicMock()])
+
+    result = check_gcs_access()
+
+    assert result is True
+    mock_gcs_client.list_blobs.assert_called_once()
+    assert mock_gcs_client.list_blobs.call_args[1]['max_results'] == 1
+    mock_gcs_client.bucket.return_value.exists.assert_not_called()
+
+
+def test_check_gcs_access_returns_false_when_bucket_not_exists(mock_gcs_client, mock_credentials):
+    """Test GCS access check returns False when bucket doesn't exist"""
+    mock_gcs_client.list_blobs.side_effect = NotFound("bucket not found")
+
+    result = check_gcs_access()
+
+    assert result is False
+
+
+def test_list_gcs_videos_returns_video_files(mock_gcs_client, mock_credentials):
+    """Test listing video files from GCS bucket"""
+    # Mock blobs with video extensions
+    mock_blob1 = MagicMock()
+    mock_blob1.name = "2025/day1/table1.mp4"
+
+    mock_blob2 = MagicMock()
+    mock_blob2.name = "2025/day1/table2.mov"
+
+    mock_blob3 = MagicMock()
+    mock_blob3.name = "2025/day1/notes.txt"  # Should be filtered out
+
+    mock_bucket = MagicMock()
+    mock_bucket.list_blobs.side_effect = _glob_listing([mock_blob1, mock_blob2, mock_blob3])
+    mock_gcs_client.bucket.return_value = mock_bucket
+
+    videos = list(list_gcs_videos())
+
+    assert len(videos) == 2
+    assert "2025/day1/table1.mp4" in videos
+    assert "2025/day1/table2.mov" in videos
+    assert "2025/day1/notes.txt" not in videos
+
+
+def test_list_gcs_videos_with_prefix(mock_gcs_client, mock_credentials):
+    """Test listing videos with specific prefix"""
+    mock_bucket = MagicMock()
+    mock_bucket.list_blobs.return_value = []
+    mock_gcs_client.bucket.return_value = mock_bucket
+
+    list(list_gcs_videos(prefix="2025/day5/"))
+
+    # One server-side glob per extension, all under the prefix
+    globs = [c[1]['match_glob'] for c in mock_bucket.list_blobs.call_args_list]
+    assert len(globs) == 4
+    assert all(g.startswith("2025/day5/**.") for g in globs)
+    assert "2025/day5/**.[mM][pP]4" in globs
+
+    # nextPageToken must be requested or listing stops after the first page
+    for c in mock_bucket.list_blobs.call_args_list:
+        assert "nextPageToken" in c[1]['fields']
+
+
+def test_list_gcs_videos_is_lazy(mock_gcs_client, mock_credentials):
+    """Test that the first name is available before later listings are requested"""
+    first_blob = MagicMock()
+    first_blob.name = "2025/day1/table1.mp4"
+
+    mock_bucket = MagicMock()
+    mock_bucket.list_blobs.return_value = iter([first_blob])
+    mock_gcs_client.bucket.return_value = mock_bucket
+
+    videos = list_gcs_videos(page_size=50)
+    mock_bucket.list_blobs.assert_not_called()
+
+    assert next(videos) == "2025/day1/table1.mp4"
+    mock_bucket.list_blobs.assert_called_once()
+    assert mock_bucket.list_blobs.call_args[1]['page_size'] == 50
+
+
+def test_list_gcs_videos_yields_server_filtered_names(mock_gcs_client, mock_credentials):
+    """Test that names matched by match_glob are yielded without re-filtering"""
+    pages = {
+        "**.[mM][pP]4": ["2025/day1/TABLE1.MP4"],
+        "**.[mM][oO][vV]": ["2025/day1/table2.mov"],
+    }
+
+    def list_blobs(match_glob, fields, page_size):
+        blobs = []
+        for name in pages.get(match_glob, []):
+            blob = MagicMock()
+            blob.name = name
+            blobs.append(blob)
+        return iter(blobs)
+
+    mock_bucket = MagicMock()
+    mock_bucket.list_blobs.side_effect = list_blobs
+    mock_gcs_client.bucket.return_value = mock_bucket
+
+    videos = list(list_gcs_videos())
+
+    assert videos == ["2025/day1/TABLE1.MP4", "2025/day1/table2.mov"]
+
+
+def test_list_gcs_videos_all_returns_list(mock_gcs_client, mock_credentials):
+    """Test list wrapper collects every page"""
+    blobs = []
+    for name in ("a.mp4", "b.mov"):
+        blob = MagicMock()
+        blob.name = name
+        blobs.append(blob)
+
+    mock_bucket = MagicMock()
+    mock_bucket.list_blobs.side_effect = _glob_listing(blobs)
+    mock_gcs_client.bucket.return_value = mock_bucket
+
+    assert list_gcs_videos_all() == ["a.mp4", "b.mov"]
+
+
+def test_get_gcs_video_uri_caches_prefix(mock_credentials):
+    """Test that the bucket name is read once for many URIs"""
+    with patch('src.services.gcs_client.settings') as mock_settings:
+        bucket_name = PropertyMock(return_value="wsop-archive-raw")
+        type(mock_settings).gcs_bucket_name = bucket_name
+
+        uris = [get_gcs_video_uri(str(i), f"2025/day1/{i}.mp4") for i in range(1000)]
+
+    assert uris[999] == "gs://wsop-archive-raw/2025/day1/999.mp4"
+    assert bucket_name.call_count == 1
+
+
+def test_list_gcs_videos_filters_by_extension(mock_gcs_client, mock_credentials):
+    """Test that only video extensions are returned"""
+    # Mock blobs with various extensions
+    def create_blob(filename):
+        blob = MagicMock()
+        blob.name = filename
+        return blob
+
+    mock_blobs = [
+        create_blob("video.mp4"),
+        create_blob("video.mov"),
+        create_blob("video.mxf"),
+        create_blob("video.avi"),
+        create_blob("document.pdf"),
+        create_blob("image.jpg"),
+        create_blob("text.txt"),
+    ]
+
+    mock_bucket = MagicMock()
+    mock_bucket.list_blobs.side_effect = _glob_listing(mock_blobs)
+    mock_gcs_client.bucket.return_value = mock_bucket
+
+    videos = list(list_gcs_videos())
+
+    # Should only return video files
+    assert len(videos) == 4
+    assert all(v.endswith(('.mp4', '.mov', '.mxf', '.avi')) for v in videos)
+
+
+def test_download_sets_large_chunk_size(mock_gcs_client, mock_credentials, tmp_path):
+    """Test that download streams in large chunks instead of buffering the whole file"""
+    mock_blob = MagicMock()
+    mock_bucket = MagicMock()
+    mock_bucket.blob.return_value = mock_blob
+    mock_gcs_client.bucket.return_value = mock_bucket
+
+    download_video_from_gcs("2025/day1/table1.mp4", local_dest=str(tmp_path / "table1.mp4"))
+
+    assert mock_blob.chunk_size >= 4 * 1024 * 1024
+    assert mock_blob.chunk_size % (256 * 1024) == 0
+    assert DOWNLOAD_CHUNK_SIZE == mock_blob.chunk_size
+
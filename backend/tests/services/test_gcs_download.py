@@ -0,0 +1,53 @@
+"""
+Tests for parallel range-GET downloads from GCS
+"""
+from unittest.mock import MagicMock
+
+from src.services.gcs_client import _parallel_download
+
+
+def _fake_blob(content: bytes) -> MagicMock:
+    """Blob mock whose range downloads write the requested slice"""
+    blob = MagicMock()
+    blob.size = len(content)
+
+    def download_to_file(fh, start, end, raw_download):
+        fh.write(content[start:end + 1])
+
+    blob.download_to_file.side_effect = download_to_file
+    blob.download_to_filename.side_effect = lambda dest: open(dest, "wb").write(content)
+    return blob
+
+
+def test_parallel_download_parts_cover_file(tmp_path):
+    """One range request per part, covering [0, size) without overlap"""
+    content = bytes(range(256)) * 40  # 10240 bytes
+    blob = _fake_blob(content)
+    dest = tmp_path / "video.mp4"
+
+    _parallel_download(blob, str(dest), part_size=3000, workers=3)
+
+    ranges = sorted(
+        (call.kwargs["start"], call.kwargs["end"])
+        for call in blob.download_to_file.call_args_list
+    )
+    assert len(ranges) == 4  # ceil(10240 / 3000)
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == len(content) - 1
+    for (_, prev_end), (start, _) in zip(ranges, ranges[1:]):
+        assert start == prev_end + 1
+
+    assert dest.read_bytes() == content
+
+
+def test_parallel_download_small_blob_single_request(tmp_path):
+    """Blobs no larger than one part use a single download"""
+    content = b"small video"
+    blob = _fake_blob(content)
+    dest = tmp_path / "video.mp4"
+
+    _parallel_download(blob, str(dest), part_size=1024, workers=4)
+
+    blob.download_to_file.assert_not_called()
+    blob.download_to_filename.assert_called_once_with(str(dest))
+    assert dest.read_bytes() == content
@@ -1,10 +1,8 @@
 """
 Test Proxy Conversion Service
 """
+import io
 import pytest
-import tempfile
-import shutil
-from pathlib import Path
 from uuid import uuid4
 from unittest.mock import Mock, patch
 
@@ -12,11 +10,9 @@ from src.services.ffmpeg.proxy import ProxyConverter
 
 
 @pytest.fixture
-def temp_proxy_dir():
+def temp_proxy_dir(tmp_path):
     """Create temporary proxy directory"""
-    temp_dir = Path(tempfile.mkdtemp())
-    yield temp_dir
-    shutil.rmtree(temp_dir)
+    return tmp_path
 
 
 @pytest.fixture
@@ -39,7 +35,7 @@ def test_convert_to_hls_input_validation(proxy_converter):
         proxy_converter.convert_to_hls(video_id, non_existent_path)
 
 
-@patch('ffmpeg.run')
+@patch('ffmpeg.run_async')
 @patch('ffmpeg.output')
 @patch('ffmpeg.input')
 def test_convert_to_hls_creates_proxy_directory(
@@ -62,6 +58,8 @@ def test_convert_to_hls_creates_proxy_directory(
     mock_stream.audio = Mock()
     mock_input.return_value = mock_stream
     mock_output.return_value = Mock()
+    mock_run.return_value.stderr = io.BytesIO(b'')
+    mock_run.return_value.wait.return_value = 0
 
     result = proxy_converter.convert_to_hls(video_id, str(input_file))
 
@@ -76,7 +74,7 @@ def test_convert_to_hls_creates_proxy_directory(
     assert 'master.m3u8' in result['proxy_path']
 
 
-@patch('ffmpeg.run')
+@patch('ffmpeg.run_async')
 @patch('ffmpeg.output')
 @patch('ffmpeg.input')
 def test_convert_to_hls_with_custom_parameters(
@@ -99,6 +97,8 @@ def test_convert_to_hls_with_custom_parameters(
     mock_stream.video.filter.return_value = mock_video
     mock_stream.audio = Mock()
     mock_input.return_value = mock_stream
+    mock_run.return_value.stderr = io.BytesIO(b'')
+    mock_run.return_value.wait.return_value = 0
 
     result = proxy_converter.convert_to_hls(
         video_id=video_id,
@@ -123,7 +123,7 @@ def test_convert_to_hls_with_custom_parameters(
     assert call_args.kwargs['hls_time'] == 5
 
 
-@patch('ffmpeg.run')
+@patch('ffmpeg.run_async')
 @patch('ffmpeg.output')
 @patch('ffmpeg.input')
 def test_convert_to_hls_cleanup_on_error(
@@ -148,7 +148,8 @@ def test_convert_to_hls_cleanup_on_error(
     mock_output.return_value = Mock()
 
     import ffmpeg
-    mock_run.side_effect = ffmpeg.Error("ffmpeg error", b"", b"conversion failed")
+    mock_run.return_value.stderr = io.BytesIO(b'')
+    mock_run.return_value.wait.return_value = 1
 
     # Attempt conversion (should fail)
     with pytest.raises(ffmpeg.Error):
@@ -160,18 +161,40 @@ def test_convert_to_hls_cleanup_on_error(
 
 
 def test_get_conversion_progress(proxy_converter):
-    """Test get_conversion_progress (currently placeholder)"""
+    """Test get_conversion_progress for a video that is not converting"""
     video_id = uuid4()
     progress = proxy_converter.get_conversion_progress(video_id)
 
-    # Currently returns None (TODO: implement real-time tracking)
     assert progress is None
 
 
+def test_get_conversion_progress_tracks_running_conversion(proxy_converter):
+    """Test that progress reflects the latest ffmpeg report"""
+    video_id = uuid4()
+    ProxyConverter._progress[video_id] = {'progress': 0.5}
+
+    try:
+        assert proxy_converter.get_conversion_progress(video_id) == 0.5
+    finally:
+        ProxyConverter._progress.pop(video_id, None)
+
+
 def test_cancel_conversion(proxy_converter):
-    """Test cancel_conversion (currently placeholder)"""
+    """Test cancel_conversion for a video that is not converting"""
     video_id = uuid4()
     result = proxy_converter.cancel_conversion(video_id)
 
-    # Currently returns False (TODO: implement cancellation)
     assert result is False
+
+
+def test_cancel_conversion_terminates_process(proxy_converter):
+    """Test that cancel_conversion terminates the tracked ffmpeg process"""
+    video_id = uuid4()
+    process = Mock()
+    ProxyConverter._processes[video_id] = process
+
+    try:
+        assert proxy_converter.cancel_conversion(video_id) is True
+        process.terminate.assert_called_once()
+    finally:
+        ProxyConverter._processes.pop(video_id, None)
@@ -0,0 +1,70 @@
+"""
+Tests for VideoMetadata extraction
+"""
+import pytest
+from unittest.mock import patch
+
+from src.services.video_metadata import VideoMetadata
+
+av = pytest.importorskip("av")
+
+
+@pytest.fixture
+def sample_mp4(tmp_path):
+    """Encode a short 320x240 @ 25fps clip with PyAV"""
+    path = tmp_path / "sample.mp4"
+    with av.open(str(path), mode="w") as container:
+        stream = container.add_stream("mpeg4", rate=25)
+        stream.width = 320
+        stream.height = 240
+        stream.pix_fmt = "yuv420p"
+        for _ in range(50):
+            frame = av.VideoFrame(320, 240, "yuv420p")
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    return str(path)
+
+
+def test_extract_metadata_with_av(sample_mp4):
+    """Metadata is read in-process without ffmpeg probe"""
+    with patch("src.services.video_metadata.ffmpeg.probe") as mock_probe:
+        metadata = VideoMetadata().extract_metadata(sample_mp4)
+        mock_probe.assert_not_called()
+
+    assert metadata["width"] == 320
+    assert metadata["height"] == 240
+    assert metadata["fps"] == 25
+    assert metadata["duration_sec"] == pytest.approx(2.0, abs=0.1)
+    assert metadata["file_size_mb"] > 0
+
+
+def test_extract_metadata_falls_back_to_probe(tmp_path):
+    """Unreadable container falls back to ffmpeg probe"""
+    bogus = tmp_path / "bogus.mxf"
+    bogus.write_bytes(b"not a video")
+
+    probe_result = {
+        "streams": [{"codec_type": "video", "r_frame_rate": "30000/1001", "width": 1920, "height": 1080}],
+        "format": {"duration": "10.5", "size": str(2 * 1024 * 1024)}
+    }
+    with patch("src.services.video_metadata.ffmpeg.probe", return_value=probe_result) as mock_probe:
+        metadata = VideoMetadata().extract_metadata(str(bogus))
+        mock_probe.assert_called_once_with(str(bogus))
+
+    assert metadata == {
+        "duration_sec": 10.5,
+        "fps": 29,
+        "width": 1920,
+        "height": 1080,
+        "file_size_mb": 2.0
+    }
+
+
+@pytest.mark.asyncio
+async def test_extract_metadata_async(sample_mp4):
+    """Async wrapper returns the same metadata as the sync call"""
+    service = VideoMetadata()
+
+    assert await service.extract_metadata_async(sample_mp4) == service.extract_metadata(sample_mp4)
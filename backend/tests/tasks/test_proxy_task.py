@@ -0,0 +1,136 @@
+"""
+Tests for proxy conversion background tasks
+"""
+import uuid
+import pytest
+from unittest.mock import Mock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.database import Base
+from src.models import Video
+from src.tasks.proxy import proxy_conversion_task, retry_failed_batch
+
+
+@pytest.fixture
+def session_factory():
+    """In-memory SQLite session factory patched into the task module"""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with patch("src.tasks.proxy.SessionLocal", TestSessionLocal):
+        yield TestSessionLocal
+
+    Base.metadata.drop_all(bind=engine)
+
+
+def _add_video(session_factory, proxy_status: str) -> uuid.UUID:
+    db = session_factory()
+    video = Video(
+        filename="test.mp4",
+        original_path="/nas/original/test.mp4",
+        proxy_status=proxy_status
+    )
+    db.add(video)
+    db.commit()
+    video_id = video.video_id
+    db.close()
+    return video_id
+
+
+def _get_video(session_factory, video_id: uuid.UUID) -> Video:
+    db = session_factory()
+    video = db.query(Video).filter(Video.video_id == video_id).first()
+    db.close()
+    return video
+
+
+def test_proxy_task_marks_completed(session_factory):
+    """Pending video is converted and marked completed"""
+    video_id = _add_video(session_factory, "pending")
+
+    with patch("src.tasks.proxy.ProxyConverter") as mock_converter_cls:
+        mock_converter_cls.return_value.submit_conversion.return_value.result.return_value = {
+            "proxy_path": "/nas/proxy/x/master.m3u8"
+        }
+        proxy_conversion_task(video_id, "/nas/proxy")
+
+        mock_converter_cls.return_value.submit_conversion.assert_called_once_with(
+            video_id=video_id,
+            input_path="/nas/original/test.mp4"
+        )
+
+    video = _get_video(session_factory, video_id)
+    assert video.proxy_status == "completed"
+    assert video.proxy_path == "/nas/proxy/x/master.m3u8"
+
+
+def test_proxy_task_marks_failed_on_error(session_factory):
+    """Conversion error sets proxy_status to failed"""
+    video_id = _add_video(session_factory, "pending")
+
+    with patch("src.tasks.proxy.ProxyConverter") as mock_converter_cls:
+        mock_converter_cls.return_value.submit_conversion.return_value.result.side_effect = RuntimeError("boom")
+        proxy_conversion_task(video_id, "/nas/proxy")
+
+    assert _get_video(session_factory, video_id).proxy_status == "failed"
+
+
+@pytest.mark.parametrize("initial_status", ["processing", "completed", "failed"])
+def test_proxy_task_only_claims_pending_video(session_factory, initial_status):
+    """A video another worker is converting (or has finished) is left alone"""
+    video_id = _add_video(session_factory, initial_status)
+
+    with patch("src.tasks.proxy.ProxyConverter") as mock_converter_cls:
+        proxy_conversion_task(video_id, "/nas/proxy")
+        mock_converter_cls.return_value.submit_conversion.assert_not_called()
+
+    assert _get_video(session_factory, video_id).proxy_status == initial_status
+
+
+def test_proxy_task_second_claim_is_rejected(session_factory):
+    """A task redelivered while the first is converting does not convert again"""
+    video_id = _add_video(session_factory, "pending")
+    conversions = []
+
+    def submit_conversion(video_id, input_path):
+        conversions.append(video_id)
+        if len(conversions) == 1:
+            # Second worker picks up the same video mid-conversion
+            proxy_conversion_task(video_id, "/nas/proxy")
+        future = Mock()
+        future.result.return_value = {"proxy_path": "/nas/proxy/x/master.m3u8"}
+        return future
+
+    with patch("src.tasks.proxy.ProxyConverter") as mock_converter_cls:
+        mock_converter_cls.return_value.submit_conversion.side_effect = submit_conversion
+        proxy_conversion_task(video_id, "/nas/proxy")
+
+    assert conversions == [video_id]
+    assert _get_video(session_factory, video_id).proxy_status == "completed"
+
+
+def test_retry_failed_batch_resets_only_failed(session_factory):
+    """Failed videos are reset in one pass and handed to the scheduler"""
+    failed_a = _add_video(session_factory, "failed")
+    failed_b = _add_video(session_factory, "failed")
+    completed = _add_video(session_factory, "completed")
+
+    scheduled = []
+    reset_ids = retry_failed_batch(
+        [failed_a, failed_b, completed],
+        "/nas/proxy",
+        schedule=lambda task, **kwargs: scheduled.append((task, kwargs))
+    )
+
+    assert set(reset_ids) == {failed_a, failed_b}
+    assert {kwargs["video_id"] for _, kwargs in scheduled} == {failed_a, failed_b}
+    assert all(task is proxy_conversion_task for task, _ in scheduled)
+    assert _get_video(session_factory, failed_a).proxy_status == "pending"
+    assert _get_video(session_factory, completed).proxy_status == "completed"
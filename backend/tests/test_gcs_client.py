@@ -2,6 +2,7 @@
 Test GCS Client Service
 
 Testing GCS bucket access for downloading videos from qwen_hand_analysis ecosystem.
+Tests that only need stubbed settings live in tests/services/test_gcs_client.py.
 """
 import pytest
 from unittest.mock import Mock, patch, MagicMock
@@ -13,13 +14,23 @@ from google.cloud import storage
 pytestmark = pytest.mark.skip(reason="GCS settings removed from config, tests require GCS credentials")
 from src.services.gcs_client import (
     get_gcs_client,
+    _gs_prefix,
     download_video_from_gcs,
     get_gcs_video_uri,
-    check_gcs_access,
-    list_gcs_videos
+    check_gcs_access
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_gcs_client_cache():
+    """Reset the cached GCS client and URI prefix so mocks don't leak across tests"""
+    get_gcs_client.cache_clear()
+    _gs_prefix.cache_clear()
+    yield
+    get_gcs_client.cache_clear()
+    _gs_prefix.cache_clear()
+
+
 @pytest.fixture
 def mock_gcs_client():
     """Mock GCS client for testing"""
@@ -52,32 +63,6 @@ def test_get_gcs_client_creates_client_with_credentials(mock_credentials):
         assert 'credentials' in call_kwargs
 
 
-def test_check_gcs_access_returns_true_when_bucket_exists(mock_gcs_client, mock_credentials):
-    """Test GCS access check returns True when bucket is accessible"""
-    # Mock bucket exists
-    mock_bucket = MagicMock()
-    mock_bucket.exists.return_value = True
-    mock_gcs_client.bucket.return_value = mock_bucket
-
-    result = check_gcs_access()
-
-    assert result is True
-    mock_gcs_client.bucket.assert_called_once()
-    mock_bucket.exists.assert_called_once()
-
-
-def test_check_gcs_access_returns_false_when_bucket_not_exists(mock_gcs_client, mock_credentials):
-    """Test GCS access check returns False when bucket doesn't exist"""
-    # Mock bucket doesn't exist
-    mock_bucket = MagicMock()
-    mock_bucket.exists.return_value = False
-    mock_gcs_client.bucket.return_value = mock_bucket
-
-    result = check_gcs_access()
-
-    assert result is False
-
-
 def test_check_gcs_access_returns_false_on_exception(mock_credentials):
     """Test GCS access check returns False on exception"""
     with patch('src.services.gcs_client.get_gcs_client') as mock_get_client:
@@ -88,41 +73,6 @@ def test_check_gcs_access_returns_false_on_exception(mock_credentials):
         assert result is False
 
 
-def test_list_gcs_videos_returns_video_files(mock_gcs_client, mock_credentials):
-    """Test listing video files from GCS bucket"""
-    # Mock blobs with video extensions
-    mock_blob1 = MagicMock()
-    mock_blob1.name = "2025/day1/table1.mp4"
-
-    mock_blob2 = MagicMock()
-    mock_blob2.name = "2025/day1/table2.mov"
-
-    mock_blob3 = MagicMock()
-    mock_blob3.name = "2025/day1/notes.txt"  # Should be filtered out
-
-    mock_bucket = MagicMock()
-    mock_bucket.list_blobs.return_value = [mock_blob1, mock_blob2, mock_blob3]
-    mock_gcs_client.bucket.return_value = mock_bucket
-
-    videos = list_gcs_videos()
-
-    assert len(videos) == 2
-    assert "2025/day1/table1.mp4" in videos
-    assert "2025/day1/table2.mov" in videos
-    assert "2025/day1/notes.txt" not in videos
-
-
-def test_list_gcs_videos_with_prefix(mock_gcs_client, mock_credentials):
-    """Test listing videos with specific prefix"""
-    mock_bucket = MagicMock()
-    mock_bucket.list_blobs.return_value = []
-    mock_gcs_client.bucket.return_value = mock_bucket
-
-    list_gcs_videos(prefix="2025/day5/")
-
-    mock_bucket.list_blobs.assert_called_once_with(prefix="2025/day5/")
-
-
 def test_download_video_from_gcs_to_temp(mock_gcs_client, mock_credentials, tmp_path):
     """Test downloading video to temporary location"""
     gcs_path = "2025/day1/table1.mp4"
@@ -189,35 +139,6 @@ def test_get_gcs_video_uri_returns_correct_format(mock_credentials):
         assert uri == "gs://wsop-archive-raw/2025/day1/table1.mp4"
 
 
-def test_list_gcs_videos_filters_by_extension(mock_gcs_client, mock_credentials):
-    """Test that only video extensions are returned"""
-    # Mock blobs with various extensions
-    def create_blob(filename):
-        blob = MagicMock()
-        blob.name = filename
-        return blob
-
-    mock_blobs = [
-        create_blob("video.mp4"),
-        create_blob("video.mov"),
-        create_blob("video.mxf"),
-        create_blob("video.avi"),
-        create_blob("document.pdf"),
-        create_blob("image.jpg"),
-        create_blob("text.txt"),
-    ]
-
-    mock_bucket = MagicMock()
-    mock_bucket.list_blobs.return_value = mock_blobs
-    mock_gcs_client.bucket.return_value = mock_bucket
-
-    videos = list_gcs_videos()
-
-    # Should only return video files
-    assert len(videos) == 4
-    assert all(v.endswith(('.mp4', '.mov', '.mxf', '.avi')) for v in videos)
-
-
 def test_download_creates_parent_directories(mock_gcs_client, mock_credentials):
     """Test that download creates parent directories if they don't exist"""
     gcs_path = "2025/day1/table1.mp4"
@@ -3,6 +3,8 @@ Test FFmpeg Proxy Conversion Service
 
 Testing HLS conversion for browser playback
 """
+import io
+import time
 import pytest
 from unittest.mock import Mock, patch, MagicMock, call
 from pathlib import Path
@@ -10,28 +12,53 @@ from uuid import uuid4, UUID
 import ffmpeg
 
 from src.services.ffmpeg.proxy import ProxyConverter, get_proxy_converter
+from src.services.ffmpeg.subclip import STDERR_TAIL_BYTES
 
 
-@pytest.fixture
-def temp_proxy_path(tmp_path):
-    """Create temporary proxy directory"""
-    proxy_path = tmp_path / "proxy"
-    proxy_path.mkdir()
-    return str(proxy_path)
+def _mock_process(mock_ffmpeg, returncode=0, progress=b"", stderr=b""):
+    """Make mock_ffmpeg.run_async return a finished fake ffmpeg process"""
+    process = MagicMock()
+    process.stdout = io.BytesIO(progress)
+    process.stderr = io.BytesIO(stderr)
+    process.wait.return_value = returncode
+    mock_ffmpeg.run_async.return_value = process
+    mock_ffmpeg.Error = ffmpeg.Error
+    return process
 
 
-@pytest.fixture
+def _mock_ffmpeg_chain(mock_ffmpeg):
+    """Configure a mocked ffmpeg module for a successful conversion"""
+    mock_ffmpeg.input.return_value = MagicMock()
+    mock_ffmpeg.output.return_value = MagicMock()
+    _mock_process(mock_ffmpeg)
+    return mock_ffmpeg.input.return_value
+
+
+@pytest.fixture(scope="module")
+def temp_proxy_path(tmp_path_factory):
+    """Create temporary proxy directory shared by the module"""
+    return str(tmp_path_factory.mktemp("proxy"))
+
+
+@pytest.fixture(scope="module")
 def converter(temp_proxy_path):
     """Create ProxyConverter instance with temp path"""
     return ProxyConverter(temp_proxy_path)
 
 
+@pytest.fixture(scope="module")
+def _patched_ffmpeg():
+    """Patch the ffmpeg module once for the whole test module"""
+    with patch('src.services.ffmpeg.proxy.ffmpeg') as mock_ffmpeg:
+        yield mock_ffmpeg
+
+
 @pytest.fixture
-def sample_video_file(tmp_path):
-    """Create a fake video file for testing"""
-    video_file = tmp_path / "sample.mp4"
-    video_file.write_bytes(b"fake video content")
-    return str(video_file)
+def mock_ffmpeg(_patched_ffmpeg):
+    """Shared ffmpeg mock, reset and reconfigured for each test"""
+    _patched_ffmpeg.reset_mock(return_value=True, side_effect=True)
+    _mock_ffmpeg_chain(_patched_ffmpeg)
+    return _patched_ffmpeg
 
 
 def test_proxy_converter_initialization(temp_proxy_path):
@@ -58,253 +85,337 @@ def test_convert_to_hls_raises_error_for_missing_input(converter):
         converter.convert_to_hls(video_id, non_existent_path)
 
 
-def test_convert_to_hls_creates_proxy_directory(converter, sample_video_file, temp_proxy_path):
+def test_convert_to_hls_creates_proxy_directory(converter, sample_video_file, temp_proxy_path, mock_ffmpeg):
     """Test that convert_to_hls creates video-specific directory"""
     video_id = uuid4()
 
-    with patch('src.services.ffmpeg.proxy.ffmpeg') as mock_ffmpeg:
-        # Mock ffmpeg chain
-        mock_input = MagicMock()
-        mock_video = MagicMock()
-        mock_audio = MagicMock()
-        mock_output = MagicMock()
-
-        mock_ffmpeg.input.return_value = mock_input
-        mock_input.video.filter.return_value = mock_video
-        mock_input.audio = mock_audio
-        mock_ffmpeg.output.return_value = mock_output
-        mock_ffmpeg.run.return_value = None
-
-        converter.convert_to_hls(video_id, sample_video_file)
+    converter.convert_to_hls(video_id, sample_video_file)
 
-        # Check directory was created
-        expected_dir = Path(temp_proxy_path) / str(video_id)
-        assert expected_dir.exists()
+    # Check directory was created
+    expected_dir = Path(temp_proxy_path) / str(video_id)
+    assert expected_dir.exists()
 
 
-def test_convert_to_hls_calls_ffmpeg_with_correct_params(converter, sample_video_file):
+def test_convert_to_hls_calls_ffmpeg_with_correct_params(converter, sample_video_file, mock_ffmpeg):
     """Test that convert_to_hls calls ffmpeg with correct parameters"""
+    mock_input = mock_ffmpeg.input.return_value
     video_id = uuid4()
 
-    with patch('src.services.ffmpeg.proxy.ffmpeg') as mock_ffmpeg:
-        # Mock ffmpeg chain
-        mock_input = MagicMock()
-        mock_video = MagicMock()
-        mock_audio = MagicMock()
-        mock_output = MagicMock()
-
-        mock_ffmpeg.input.return_value = mock_input
-        mock_input.video.filter.return_value = mock_video
-        mock_input.audio = mock_audio
-        mock_ffmpeg.output.return_value = mock_output
-        mock_ffmpeg.run.return_value = None
-
-        converter.convert_to_hls(
-            video_id,
-            sample_video_file,
-            scale="1280:720",
-            preset="fast",
-            crf=23,
-            audio_bitrate="128k",
-            hls_time=10
-        )
+    converter.convert_to_hls(
+        video_id,
+        sample_video_file,
+        scale="1280:720",
+        preset="fast",
+        crf=23,
+        audio_bitrate="128k",
+        hls_time=10
+    )
+
+    # Verify ffmpeg.input was called with input file
+    mock_ffmpeg.input.assert_called_once_with(sample_video_file)
+
+    # Verify video filter was called with scale
+    mock_input.video.filter.assert_called_once_with('scale', w='1280', h='720')
+
+    # Verify output was called with HLS params
+    mock_ffmpeg.output.assert_called_once()
+    call_args = mock_ffmpeg.output.call_args
+    assert call_args[1]['format'] == 'hls'
+    assert call_args[1]['vcodec'] == 'libx264'
+    assert call_args[1]['preset'] == 'fast'
+    assert call_args[1]['crf'] == 23
+    assert call_args[1]['acodec'] == 'aac'
+    assert call_args[1]['audio_bitrate'] == '128k'
+    assert call_args[1]['hls_time'] == 10
+    assert call_args[1]['hls_list_size'] == 0
+
+    # Verify ffmpeg.run was called
+    mock_ffmpeg.run_async.assert_called_once()
+
+
+def test_convert_to_hls_returns_proxy_paths(converter, sample_video_file, temp_proxy_path, mock_ffmpeg):
+    """Test that convert_to_hls returns correct proxy paths"""
+    video_id = uuid4()
+
+    result = converter.convert_to_hls(video_id, sample_video_file)
 
-        # Verify ffmpeg.input was called with input file
-        mock_ffmpeg.input.assert_called_once_with(sample_video_file)
+    assert 'proxy_path' in result
+    assert 'proxy_dir' in result
+    assert result['proxy_path'].endswith('master.m3u8')
+    assert str(video_id) in result['proxy_dir']
 
-        # Verify video filter was called with scale
-        mock_input.video.filter.assert_called_once_with('scale', w='1280', h='720')
 
-        # Verify output was called with HLS params
-        mock_ffmpeg.output.assert_called_once()
-        call_args = mock_ffmpeg.output.call_args
-        assert call_args[1]['format'] == 'hls'
-        assert call_args[1]['vcodec'] == 'libx264'
-        assert call_args[1]['preset'] == 'fast'
-        assert call_args[1]['crf'] == 23
-        assert call_args[1]['acodec'] == 'aac'
-        assert call_args[1]['audio_bitrate'] == '128k'
-        assert call_args[1]['hls_time'] == 10
-        assert call_args[1]['hls_list_size'] == 0
+def test_convert_to_hls_handles_scale_without_colon(converter, sample_video_file, mock_ffmpeg):
+    """Test scale parameter without colon (proportional scaling)"""
+    mock_input = mock_ffmpeg.input.return_value
+    video_id = uuid4()
 
-        # Verify ffmpeg.run was called
-        mock_ffmpeg.run.assert_called_once()
+    converter.convert_to_hls(video_id, sample_video_file, scale="1280")
 
+    # Should use proportional height (-1)
+    mock_input.video.filter.assert_called_once_with('scale', w='1280', h=-1)
 
-def test_convert_to_hls_returns_proxy_paths(converter, sample_video_file, temp_proxy_path):
-    """Test that convert_to_hls returns correct proxy paths"""
+
+def test_convert_to_hls_cleans_up_on_failure(converter, sample_video_file, temp_proxy_path, mock_ffmpeg):
+    """Test that failed conversion cleans up proxy directory"""
     video_id = uuid4()
+    proxy_dir = Path(temp_proxy_path) / str(video_id)
 
-    with patch('src.services.ffmpeg.proxy.ffmpeg') as mock_ffmpeg:
-        mock_input = MagicMock()
-        mock_video = MagicMock()
-        mock_audio = MagicMock()
-        mock_output = MagicMock()
+    # Simulate ffmpeg error
+    _mock_process(mock_ffmpeg, returncode=1, stderr=b'Encoding failed')
 
-        mock_ffmpeg.input.return_value = mock_input
-        mock_input.video.filter.return_value = mock_video
-        mock_input.audio = mock_audio
-        mock_ffmpeg.output.return_value = mock_output
-        mock_ffmpeg.run.return_value = None
+    with pytest.raises(ffmpeg.Error, match="Encoding failed"):
+        converter.convert_to_hls(video_id, sample_video_file)
 
-        result = converter.convert_to_hls(video_id, sample_video_file)
+    # Directory is moved aside at once, then deleted in the background
+    assert not proxy_dir.exists()
 
-        assert 'proxy_path' in result
-        assert 'proxy_dir' in result
-        assert result['proxy_path'].endswith('master.m3u8')
-        assert str(video_id) in result['proxy_dir']
+    def leftovers():
+        return list(Path(temp_proxy_path).glob(f"**/{video_id}*"))
 
+    deadline = time.monotonic() + 2
+    while leftovers() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert leftovers() == []
 
-def test_convert_to_hls_handles_scale_without_colon(converter, sample_video_file):
-    """Test scale parameter without colon (proportional scaling)"""
-    video_id = uuid4()
 
-    with patch('src.services.ffmpeg.proxy.ffmpeg') as mock_ffmpeg:
-        mock_input = MagicMock()
-        mock_video = MagicMock()
-        mock_audio = MagicMock()
-        mock_output = MagicMock()
+def test_convert_to_hls_error_keeps_only_stderr_tail(converter, sample_video_file, mock_ffmpeg):
+    """Test that a long conversion's ffmpeg log is cut to its last STDERR_TAIL_BYTES"""
+    stderr = b'x' * (3 * STDERR_TAIL_BYTES) + b'real error'
+    _mock_process(mock_ffmpeg, returncode=1, stderr=stderr)
 
-        mock_ffmpeg.input.return_value = mock_input
-        mock_input.video.filter.return_value = mock_video
-        mock_input.audio = mock_audio
-        mock_ffmpeg.output.return_value = mock_output
-        mock_ffmpeg.run.return_value = None
+    with pytest.raises(ffmpeg.Error, match="real error") as exc_info:
+        converter.convert_to_hls(uuid4(), sample_video_file)
 
-        converter.convert_to_hls(video_id, sample_video_file, scale="1280")
+    assert exc_info.value.stderr == stderr[-STDERR_TAIL_BYTES:]
 
-        # Should use proportional height (-1)
-        mock_input.video.filter.assert_called_once_with('scale', w='1280', h=-1)
 
+def test_convert_to_hls_output_path_includes_segment_pattern(converter, sample_video_file, mock_ffmpeg):
+    """Test that HLS segment filename pattern is correct"""
+    video_id = uuid4()
 
-def test_convert_to_hls_cleans_up_on_failure(converter, sample_video_file, temp_proxy_path):
-    """Test that failed conversion cleans up proxy directory"""
+    converter.convert_to_hls(video_id, sample_video_file, segment_type='mpegts')
+
+    # Check segment filename pattern
+    call_args = mock_ffmpeg.output.call_args
+    segment_filename = call_args[1]['hls_segment_filename']
+    assert 'segment_%03d.ts' in segment_filename
+    assert str(video_id) in segment_filename
+    assert call_args[1]['hls_segment_type'] == 'mpegts'
+    assert 'hls_fmp4_init_filename' not in call_args[1]
+
+
+def test_convert_to_hls_uses_fmp4_segments(converter, sample_video_file, mock_ffmpeg):
+    """Test that fMP4 (CMAF) segments are the default"""
     video_id = uuid4()
-    proxy_dir = Path(temp_proxy_path) / str(video_id)
 
-    with patch('src.services.ffmpeg.proxy.ffmpeg') as mock_ffmpeg:
-        mock_input = MagicMock()
-        mock_video = MagicMock()
-        mock_audio = MagicMock()
-        mock_output = MagicMock()
+    converter.convert_to_hls(video_id, sample_video_file)
 
-        mock_ffmpeg.input.return_value = mock_input
-        mock_input.video.filter.return_value = mock_video
-        mock_input.audio = mock_audio
-        mock_ffmpeg.output.return_value = mock_output
+    call_args = mock_ffmpeg.output.call_args
+    assert call_args[1]['hls_segment_type'] == 'fmp4'
+    assert call_args[1]['hls_fmp4_init_filename'] == 'init.mp4'
+    assert 'segment_%03d.m4s' in call_args[1]['hls_segment_filename']
 
-        # Simulate ffmpeg error
-        mock_error = ffmpeg.Error('ffmpeg', b'', b'Encoding failed')
-        mock_ffmpeg.run.side_effect = mock_error
-        mock_ffmpeg.Error = ffmpeg.Error
 
-        with pytest.raises(ffmpeg.Error):
-            converter.convert_to_hls(video_id, sample_video_file)
+def test_convert_to_hls_rejects_unknown_segment_type(converter, sample_video_file):
+    """Test that an unsupported segment container is rejected"""
+    with pytest.raises(ValueError, match="Unsupported HLS segment type"):
+        converter.convert_to_hls(uuid4(), sample_video_file, segment_type='webm')
 
-        # Directory should be cleaned up
-        assert not proxy_dir.exists()
 
+def test_get_conversion_progress_returns_none_when_idle(converter):
+    """Test get_conversion_progress for a video that is not converting"""
+    assert converter.get_conversion_progress(uuid4()) is None
 
-def test_convert_to_hls_output_path_includes_segment_pattern(converter, sample_video_file):
-    """Test that HLS segment filename pattern is correct"""
+
+def test_get_conversion_progress_parses_ffmpeg_progress(converter):
+    """Test that -progress output is turned into a completion fraction"""
     video_id = uuid4()
+    ProxyConverter._progress[video_id] = {'progress': 0.0}
 
-    with patch('src.services.ffmpeg.proxy.ffmpeg') as mock_ffmpeg:
-        mock_input = MagicMock()
-        mock_video = MagicMock()
-        mock_audio = MagicMock()
-        mock_output = MagicMock()
+    try:
+        converter._read_progress(
+            video_id,
+            io.BytesIO(b"frame=300\nfps=59.9\nout_time_us=N/A\nout_time_us=5000000\nprogress=continue\n"),
+            duration_us=20_000_000
+        )
+
+        assert converter.get_conversion_progress(video_id) == 0.25
+        assert ProxyConverter._progress[video_id]['frame'] == 300
+        assert ProxyConverter._progress[video_id]['fps'] == 59.9
+    finally:
+        ProxyConverter._progress.pop(video_id, None)
+
+
+def test_cancel_conversion_returns_false_when_idle(converter):
+    """Test cancel_conversion for a video that is not converting"""
+    assert converter.cancel_conversion(uuid4()) is False
 
-        mock_ffmpeg.input.return_value = mock_input
-        mock_input.video.filter.return_value = mock_video
-        mock_input.audio = mock_audio
-        mock_ffmpeg.output.return_value = mock_output
-        mock_ffmpeg.run.return_value = None
 
+def test_cancel_conversion_terminates_running_ffmpeg(converter, sample_video_file, temp_proxy_path, mock_ffmpeg):
+    """Test that cancelling terminates ffmpeg and cleans up the proxy directory"""
+    video_id = uuid4()
+    cancelled = []
+
+    process = _mock_process(mock_ffmpeg)
+
+    def wait():
+        cancelled.append(converter.cancel_conversion(video_id))
+        return -15
+
+    process.wait.side_effect = wait
+
+    with pytest.raises(ffmpeg.Error):
         converter.convert_to_hls(video_id, sample_video_file)
 
-        # Check segment filename pattern
-        call_args = mock_ffmpeg.output.call_args
-        segment_filename = call_args[1]['hls_segment_filename']
-        assert 'segment_%03d.ts' in segment_filename
-        assert str(video_id) in segment_filename
+    assert cancelled == [True]
+    process.terminate.assert_called_once()
+    assert not (Path(temp_proxy_path) / str(video_id)).exists()
+    assert converter.get_conversion_progress(video_id) is None
 
 
-def test_get_conversion_progress_returns_none_placeholder(converter):
-    """Test get_conversion_progress (placeholder implementation)"""
+def test_convert_to_hls_with_custom_encoding_params(converter, sample_video_file, mock_ffmpeg):
+    """Test convert_to_hls with custom encoding parameters"""
+    mock_input = mock_ffmpeg.input.return_value
     video_id = uuid4()
 
-    progress = converter.get_conversion_progress(video_id)
+    converter.convert_to_hls(
+        video_id,
+        sample_video_file,
+        scale="1920:1080",
+        preset="slow",
+        crf=18,
+        audio_bitrate="256k",
+        hls_time=6
+    )
+
+    # Verify custom params were used
+    call_args = mock_ffmpeg.output.call_args[1]
+    assert call_args['preset'] == 'slow'
+    assert call_args['crf'] == 18
+    assert call_args['audio_bitrate'] == '256k'
+    assert call_args['hls_time'] == 6
 
-    # Should return None (placeholder)
-    assert progress is None
+    # Verify custom scale
+    mock_input.video.filter.assert_called_once_with('scale', w='1920', h='1080')
 
 
-def test_cancel_conversion_returns_false_placeholder(converter):
-    """Test cancel_conversion (placeholder implementation)"""
+def test_convert_to_hls_overwrite_existing_output(converter, sample_video_file, mock_ffmpeg):
+    """Test that convert_to_hls overwrites existing output"""
     video_id = uuid4()
 
-    result = converter.cancel_conversion(video_id)
+    converter.convert_to_hls(video_id, sample_video_file)
 
-    # Should return False (placeholder)
-    assert result is False
+    # Verify overwrite_output=True
+    call_args = mock_ffmpeg.run_async.call_args[1]
+    assert call_args['overwrite_output'] is True
 
 
-def test_convert_to_hls_with_custom_encoding_params(converter, sample_video_file):
-    """Test convert_to_hls with custom encoding parameters"""
+def test_convert_to_hls_copies_stream_for_h264(converter, sample_video_file, mock_ffmpeg):
+    """Test that 8-bit 4:2:0 H.264 is stream-copied when no scaling is requested"""
+    mock_input = mock_ffmpeg.input.return_value
     video_id = uuid4()
 
-    with patch('src.services.ffmpeg.proxy.ffmpeg') as mock_ffmpeg:
-        mock_input = MagicMock()
-        mock_video = MagicMock()
-        mock_audio = MagicMock()
-        mock_output = MagicMock()
-
-        mock_ffmpeg.input.return_value = mock_input
-        mock_input.video.filter.return_value = mock_video
-        mock_input.audio = mock_audio
-        mock_ffmpeg.output.return_value = mock_output
-        mock_ffmpeg.run.return_value = None
-
-        converter.convert_to_hls(
-            video_id,
-            sample_video_file,
-            scale="1920:1080",
-            preset="slow",
-            crf=18,
-            audio_bitrate="256k",
-            hls_time=6
-        )
+    mock_ffmpeg.probe.return_value = {
+        'streams': [
+            {'codec_type': 'video', 'codec_name': 'h264', 'profile': 'High',
+             'pix_fmt': 'yuv420p', 'width': 1920, 'height': 1080},
+            {'codec_type': 'audio', 'codec_name': 'aac'}
+        ]
+    }
+
+    converter.convert_to_hls(video_id, sample_video_file, scale=None)
+
+    mock_input.video.filter.assert_not_called()
+    call_args = mock_ffmpeg.output.call_args[1]
+    assert call_args['vcodec'] == 'copy'
+    assert 'crf' not in call_args
+    # Audio is always re-encoded, even from AAC
+    assert call_args['acodec'] == 'aac'
+
+
+@pytest.mark.parametrize("profile,pix_fmt", [
+    ('High 10', 'yuv420p10le'),
+    ('High 4:2:2', 'yuv422p'),
+    ('High', 'yuv422p'),
+    ('High 10', 'yuv420p'),
+    (None, None),
+])
+def test_convert_to_hls_encodes_h264_players_reject(converter, sample_video_file, mock_ffmpeg, profile, pix_fmt):
+    """Test that 10-bit or non-4:2:0 H.264 is re-encoded instead of copied"""
+    mock_ffmpeg.probe.return_value = {
+        'streams': [
+            {'codec_type': 'video', 'codec_name': 'h264', 'profile': profile,
+             'pix_fmt': pix_fmt, 'width': 1920, 'height': 1080}
+        ]
+    }
+
+    converter.convert_to_hls(uuid4(), sample_video_file, scale=None)
+
+    assert mock_ffmpeg.output.call_args[1]['vcodec'] == 'libx264'
+
+
+def test_convert_to_hls_uses_nvenc_when_configured(temp_proxy_path, sample_video_file, mock_ffmpeg):
+    """Test that the hardware encoder replaces libx264"""
+    converter = ProxyConverter(temp_proxy_path, hw_encoder="nvenc")
+    video_id = uuid4()
 
-        # Verify custom params were used
-        call_args = mock_ffmpeg.output.call_args[1]
-        assert call_args['preset'] == 'slow'
-        assert call_args['crf'] == 18
-        assert call_args['audio_bitrate'] == '256k'
-        assert call_args['hls_time'] == 6
+    converter.convert_to_hls(video_id, sample_video_file, crf=21)
 
-        # Verify custom scale
-        mock_input.video.filter.assert_called_once_with('scale', w='1920', h='1080')
+    call_args = mock_ffmpeg.output.call_args[1]
+    assert call_args['vcodec'] == 'h264_nvenc'
+    assert call_args['cq'] == 21
+    assert call_args['acodec'] == 'aac'
 
 
-def test_convert_to_hls_overwrite_existing_output(converter, sample_video_file):
-    """Test that convert_to_hls overwrites existing output"""
+def test_proxy_converter_rejects_unknown_encoder(temp_proxy_path):
+    """Test that an unsupported encoder name is rejected"""
+    with pytest.raises(ValueError, match="Unsupported hardware encoder"):
+        ProxyConverter(temp_proxy_path, hw_encoder="h265_magic")
+
+
+def test_convert_to_hls_skips_scale_when_resolution_matches(converter, sample_video_file, mock_ffmpeg):
+    """Test that no scale filter is added when the source is already the target size"""
+    mock_input = mock_ffmpeg.input.return_value
     video_id = uuid4()
 
-    with patch('src.services.ffmpeg.proxy.ffmpeg') as mock_ffmpeg:
-        mock_input = MagicMock()
-        mock_video = MagicMock()
-        mock_audio = MagicMock()
-        mock_output = MagicMock()
+    mock_ffmpeg.probe.return_value = {
+        'streams': [
+            {'codec_type': 'video', 'codec_name': 'mpeg2video', 'width': 1280, 'height': 720},
+            {'codec_type': 'audio', 'codec_name': 'pcm_s24le'}
+        ]
+    }
 
-        mock_ffmpeg.input.return_value = mock_input
-        mock_input.video.filter.return_value = mock_video
-        mock_input.audio = mock_audio
-        mock_ffmpeg.output.return_value = mock_output
-        mock_ffmpeg.run.return_value = None
+    converter.convert_to_hls(video_id, sample_video_file, scale="1280:720")
 
-        converter.convert_to_hls(video_id, sample_video_file)
+    mock_input.video.filter.assert_not_called()
+    assert mock_ffmpeg.output.call_args[0][0] is mock_input.video
+
+    # Non-H.264 source is still encoded, just without the scaler
+    call_args = mock_ffmpeg.output.call_args[1]
+    assert call_args['vcodec'] == 'libx264'
+    assert call_args['acodec'] == 'aac'
+
+
+def test_submit_conversion_queues_on_shared_pool(converter, sample_video_file):
+    """Test that concurrent conversions are submitted to the bounded pool"""
+    mock_executor = MagicMock()
+
+    with patch('src.services.ffmpeg.proxy._get_conversion_executor', return_value=mock_executor):
+        first = converter.submit_conversion(uuid4(), sample_video_file)
+        second = converter.submit_conversion(uuid4(), sample_video_file, crf=20)
+
+    assert mock_executor.submit.call_count == 2
+    assert first is mock_executor.submit.return_value
+    assert second is mock_executor.submit.return_value
+    assert mock_executor.submit.call_args[1] == {'crf': 20}
+
+
+@pytest.mark.asyncio
+async def test_convert_to_hls_async_returns_result(converter, sample_video_file, mock_ffmpeg):
+    """Test that the async wrapper awaits the pooled conversion"""
+    video_id = uuid4()
+
+    result = await converter.convert_to_hls_async(video_id, sample_video_file)
 
-        # Verify overwrite_output=True
-        call_args = mock_ffmpeg.run.call_args[1]
-        assert call_args['overwrite_output'] is True
+    assert result['proxy_path'].endswith('master.m3u8')
@@ -1,19 +1,20 @@
 """
 Test Storage Service
 """
+import io
+import os
 import pytest
-import tempfile
-import shutil
 from pathlib import Path
+from unittest.mock import patch
 from uuid import uuid4
 
-from src.services.storage import StorageService
+from src.services.storage import COPY_CHUNK_SIZE, StorageService
 
 
 @pytest.fixture
-def temp_storage():
+def temp_storage(tmp_path):
     """Create temporary storage directories for testing"""
-    temp_dir = Path(tempfile.mkdtemp())
+    temp_dir = tmp_path
     original_path = temp_dir / "original"
     proxy_path = temp_dir / "proxy"
     clips_path = temp_dir / "clips"
@@ -25,10 +26,20 @@ def temp_storage():
     storage.clips_path = clips_path
     storage._ensure_directories()
 
-    yield storage
+    # pytest removes tmp_path, including any background directory deletes
+    return storage
 
-    # Cleanup
-    shutil.rmtree(temp_dir)
+
+@pytest.fixture
+def path_only_storage():
+    """Storage service with fake paths for tests that never touch disk"""
+    with patch.object(StorageService, "_ensure_directories"):
+        storage = StorageService()
+
+    storage.original_path = Path("/fake/original")
+    storage.proxy_path = Path("/fake/proxy")
+    storage.clips_path = Path("/fake/clips")
+    return storage
 
 
 def test_ensure_directories(temp_storage):
@@ -38,6 +49,20 @@ def test_ensure_directories(temp_storage):
     assert temp_storage.clips_path.exists()
 
 
+def test_ensure_directories_requeues_leftover_trash(temp_storage):
+    """Test that deletes cut short by a shutdown are resumed at startup"""
+    pending = temp_storage.trash_path / "video-1"
+    legacy = temp_storage.proxy_path / "video-2.trash-abc"
+    for path in (pending, legacy):
+        path.mkdir()
+
+    with patch('src.services.storage.trash_reaper') as mock_reaper:
+        temp_storage._ensure_directories()
+
+    queued = {call.args[0] for call in mock_reaper.put.call_args_list}
+    assert queued == {pending, legacy}
+
+
 def test_save_uploaded_file(temp_storage):
     """Test saving uploaded file"""
     video_id = uuid4()
@@ -63,34 +88,34 @@ def test_save_uploaded_file_preserves_extension(temp_storage):
     assert file_path.endswith(".mov")
 
 
-def test_get_file_path_original(temp_storage):
+def test_get_file_path_original(path_only_storage):
     """Test getting original file path"""
     filename = "test.mp4"
-    path = temp_storage.get_file_path(filename, "original")
+    path = path_only_storage.get_file_path(filename, "original")
 
-    assert path == temp_storage.original_path / filename
+    assert path == path_only_storage.original_path / filename
 
 
-def test_get_file_path_proxy(temp_storage):
+def test_get_file_path_proxy(path_only_storage):
     """Test getting proxy file path"""
     filename = "test.m3u8"
-    path = temp_storage.get_file_path(filename, "proxy")
+    path = path_only_storage.get_file_path(filename, "proxy")
 
-    assert path == temp_storage.proxy_path / filename
+    assert path == path_only_storage.proxy_path / filename
 
 
-def test_get_file_path_clip(temp_storage):
+def test_get_file_path_clip(path_only_storage):
     """Test getting clip file path"""
     filename = "clip.mp4"
-    path = temp_storage.get_file_path(filename, "clip")
+    path = path_only_storage.get_file_path(filename, "clip")
 
-    assert path == temp_storage.clips_path / filename
+    assert path == path_only_storage.clips_path / filename
 
 
-def test_get_file_path_invalid_type(temp_storage):
+def test_get_file_path_invalid_type(path_only_storage):
     """Test that invalid file type raises error"""
     with pytest.raises(ValueError):
-        temp_storage.get_file_path("test.mp4", "invalid_type")
+        path_only_storage.get_file_path("test.mp4", "invalid_type")
 
 
 def test_delete_file(temp_storage):
@@ -132,6 +157,24 @@ def test_delete_directory(temp_storage):
     assert not test_dir.exists()
 
 
+def test_delete_directory_returns_before_all_files_unlinked(temp_storage):
+    """Test that directory deletion only renames before returning"""
+    test_dir = temp_storage.proxy_path / "large_video"
+    test_dir.mkdir()
+    (test_dir / "segment_000.m4s").write_bytes(b"segment")
+
+    with patch('src.utils.fs.trash_reaper') as mock_reaper:
+        result = temp_storage.delete_file(str(test_dir))
+
+    assert result is True
+    assert not test_dir.exists()
+
+    # Segments are still on disk, handed to the background deleter
+    [trash] = [p for p in temp_storage.trash_path.iterdir() if p.name.startswith("large_video-")]
+    assert (trash / "segment_000.m4s").exists()
+    mock_reaper.put.assert_called_once_with(trash)
+
+
 def test_delete_proxy_directory(temp_storage):
     """Test deleting proxy directory by video ID"""
     video_id = uuid4()
@@ -149,6 +192,29 @@ def test_delete_proxy_directory(temp_storage):
     assert not proxy_dir.exists()
 
 
+def test_delete_proxy_directory_returns_before_rmtree(temp_storage):
+    """Test that the proxy directory is renamed into trash and reaped later"""
+    video_id = uuid4()
+    proxy_dir = temp_storage.proxy_path / str(video_id)
+    proxy_dir.mkdir()
+    (proxy_dir / "segment_000.m4s").write_bytes(b"segment")
+
+    with patch('src.utils.fs.trash_reaper') as mock_reaper:
+        result = temp_storage.delete_proxy_directory(video_id)
+
+    assert result is True
+    assert not proxy_dir.exists()
+
+    [trash] = mock_reaper.put.call_args[0]
+    assert trash.parent == temp_storage.trash_path
+    assert (trash / "segment_000.m4s").exists()
+
+
+def test_delete_proxy_directory_missing(temp_storage):
+    """Test deleting a proxy directory that doesn't exist"""
+    assert temp_storage.delete_proxy_directory(uuid4()) is False
+
+
 def test_get_file_size(temp_storage):
     """Test getting file size in MB"""
     test_file = temp_storage.original_path / "test.mp4"
@@ -182,19 +248,82 @@ def test_file_exists(temp_storage):
     assert temp_storage.file_exists(str(test_file))
 
 
-def test_save_file_error_handling(temp_storage):
-    """Test error handling when saving to invalid path"""
-    # Make original path read-only (on Unix systems)
-    import platform
-    if platform.system() != "Windows":
-        temp_storage.original_path.chmod(0o444)
+def test_save_uploaded_file_uses_large_buffer(temp_storage):
+    """Test that uploads are written through a large write buffer"""
+    with patch('builtins.open', wraps=open) as mock_open:
+        file_path = temp_storage.save_uploaded_file(b"content", "test.mp4", uuid4())
+
+    [write_call] = [c for c in mock_open.call_args_list if str(c.args[0]) == file_path]
+    assert write_call.kwargs['buffering'] >= 1 << 20
+    assert Path(file_path).read_bytes() == b"content"
+
 
-        with pytest.raises(OSError):
+def test_save_file_error_handling(temp_storage):
+    """Test error handling when the destination cannot be opened"""
+    with patch('builtins.open', side_effect=OSError(13, 'Permission denied')):
+        with pytest.raises(OSError, match="Failed to save file"):
             temp_storage.save_uploaded_file(
                 b"content",
                 "test.mp4",
                 uuid4()
             )
 
-        # Restore permissions
-        temp_storage.original_path.chmod(0o755)
+
+class _ChunkOnlyReader:
+    """File-like that refuses unbounded reads"""
+
+    def __init__(self, data: bytes):
+        self._buffer = io.BytesIO(data)
+        self.read_sizes = []
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            raise AssertionError("read() without a size loads the whole file")
+        self.read_sizes.append(size)
+        return self._buffer.read(size)
+
+
+def test_save_uploaded_stream_does_not_load_into_ram(temp_storage):
+    """Test that uploads are copied to disk in bounded chunks"""
+    video_id = uuid4()
+    content = b"x" * (COPY_CHUNK_SIZE + 10)
+    src = _ChunkOnlyReader(content)
+
+    file_path, _ = temp_storage.save_uploaded_stream(src, "big.mp4", video_id)
+
+    assert Path(file_path).read_bytes() == content
+    assert file_path.endswith(f"{video_id}.mp4")
+    assert max(src.read_sizes) <= COPY_CHUNK_SIZE
+
+
+def test_save_uploaded_stream_returns_sha256(temp_storage):
+    """Test that the content hash is computed during the copy"""
+    file_path, checksum = temp_storage.save_uploaded_stream(
+        io.BytesIO(b"abc"), "clip.mp4", uuid4()
+    )
+
+    assert Path(file_path).read_bytes() == b"abc"
+    assert checksum == "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+
+
+def test_get_file_size_uses_single_stat_call(temp_storage):
+    """Test that repeated size/existence checks share one cached stat"""
+    test_file = temp_storage.original_path / "cached.mp4"
+    test_file.write_bytes(b"x" * 1024)
+
+    with patch('src.services.storage.os.stat', wraps=os.stat) as mock_stat:
+        assert temp_storage.get_file_size(str(test_file)) == 1024 / (1024 * 1024)
+        assert temp_storage.file_exists(str(test_file))
+        assert temp_storage.get_file_size(str(test_file)) == 1024 / (1024 * 1024)
+
+    assert mock_stat.call_count == 1
+
+
+def test_file_exists_after_delete_is_not_cached(temp_storage):
+    """Test that deleting a file invalidates its cached stat"""
+    test_file = temp_storage.original_path / "deleted.mp4"
+    test_file.write_bytes(b"content")
+
+    assert temp_storage.file_exists(str(test_file))
+    assert temp_storage.delete_file(str(test_file))
+    assert not temp_storage.file_exists(str(test_file))
@@ -3,35 +3,83 @@ Test FFmpeg Subclip Extraction Service
 
 Testing lossless subclip extraction with codec copy
 """
+import io
+import os
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import Mock, MagicMock
 from pathlib import Path
-from uuid import uuid4
 import ffmpeg
 
-from src.services.ffmpeg.subclip import SubclipExtractor, get_subclip_extractor
+from src.services.ffmpeg.subclip import (
+    KEYFRAME_SEEK_MARGIN_SEC,
+    STDERR_TAIL_BYTES,
+    SubclipExtractionError,
+    SubclipExtractor,
+    _probe_input_cached,
+    get_subclip_extractor
+)
 
 
-@pytest.fixture
-def temp_clips_path(tmp_path):
-    """Create temporary clips directory"""
-    clips_path = tmp_path / "clips"
-    clips_path.mkdir()
-    return str(clips_path)
+def _mock_process(mock_ffmpeg, returncode=0, stderr=b''):
+    """Make ffmpeg.run_async return a process with the given outcome"""
+    process = MagicMock()
+    process.stderr = io.BytesIO(stderr)
+    process.wait.return_value = returncode
 
+    def run_async(output, **kwargs):
+        # ffmpeg creates its output file even when it fails partway
+        Path(mock_ffmpeg.output.call_args.args[1]).write_bytes(b"clip")
+        return process
 
-@pytest.fixture
+    mock_ffmpeg.run_async.side_effect = run_async
+    return process
+
+
+def _assert_output_kwargs(mock_ffmpeg, **expected):
+    """Assert ffmpeg.output was called with (at least) these kwargs"""
+    got = mock_ffmpeg.output.call_args.kwargs
+    assert {key: got.get(key) for key in expected} == expected
+
+
+@pytest.fixture(scope="module")
+def temp_clips_path(tmp_path_factory):
+    """Create temporary clips directory shared by the module"""
+    return str(tmp_path_factory.mktemp("clips"))
+
+
+@pytest.fixture(scope="module")
 def extractor(temp_clips_path):
     """Create SubclipExtractor instance with temp path"""
     return SubclipExtractor(temp_clips_path)
 
 
 @pytest.fixture
-def sample_video_file(tmp_path):
-    """Create a fake video file for testing"""
-    video_file = tmp_path / "original.mp4"
-    video_file.write_bytes(b"fake video content")
-    return str(video_file)
+def mock_ffmpeg(monkeypatch):
+    """Mocked ffmpeg module whose extraction succeeds"""
+    mock = MagicMock()
+    _mock_process(mock)
+    mock.probe.return_value = {
+        'format': {'duration': '9000.0'},
+        'streams': [
+            {'codec_type': 'video', 'codec_name': 'h264'},
+            {'codec_type': 'audio', 'codec_name': 'aac'}
+        ]
+    }
+    mock.Error = ffmpeg.Error
+    monkeypatch.setattr('src.services.ffmpeg.subclip.ffmpeg', mock)
+
+    _probe_input_cached.cache_clear()
+    yield mock
+    _probe_input_cached.cache_clear()
+
+
+@pytest.fixture
+def mock_stat(monkeypatch):
+    """Report the extracted clip as 1 MB (set return_value to change)"""
+    stat = MagicMock(return_value=SimpleNamespace(st_size=1024 * 1024))
+    monkeypatch.setattr(Path, 'stat', stat)
+    return stat
 
 
 def test_subclip_extractor_initialization(temp_clips_path):
@@ -59,236 +107,128 @@ def test_factory_function_returns_extractor(temp_clips_path):
     assert extractor.clips_base_path == Path(temp_clips_path)
 
 
-def test_extract_subclip_raises_error_for_missing_input(extractor):
-    """Test that extract_subclip raises ValueError for non-existent input file"""
-    clip_id = uuid4()
-    non_existent_path = "/nonexistent/video.mp4"
-
-    with pytest.raises(ValueError, match="Input file not found"):
-        extractor.extract_subclip(clip_id, non_existent_path, 10.0, 20.0)
-
-
-def test_extract_subclip_raises_error_for_negative_start(extractor, sample_video_file):
-    """Test that extract_subclip raises ValueError for negative start_sec"""
-    clip_id = uuid4()
-
-    with pytest.raises(ValueError, match="start_sec must be >= 0"):
-        extractor.extract_subclip(clip_id, sample_video_file, -5.0, 20.0)
-
-
-def test_extract_subclip_raises_error_when_end_before_start(extractor, sample_video_file):
-    """Test that extract_subclip raises ValueError when end_sec <= start_sec"""
-    clip_id = uuid4()
+@pytest.mark.parametrize("start_sec,end_sec,use_sample,match", [
+    (10.0, 20.0, False, "Input file not found"),
+    (-5.0, 20.0, True, "start_sec must be >= 0"),
+    (20.0, 10.0, True, "end_sec .* must be > start_sec"),
+    (10.0, 10.0, True, "end_sec .* must be > start_sec"),
+])
+def test_extract_subclip_rejects_invalid_input(extractor, clip_id, sample_video_file, start_sec, end_sec, use_sample, match):
+    """Test that extract_subclip raises ValueError for a missing input or bad timecodes"""
+    input_path = sample_video_file if use_sample else "/nonexistent/video.mp4"
 
-    with pytest.raises(ValueError, match="end_sec .* must be > start_sec"):
-        extractor.extract_subclip(clip_id, sample_video_file, 20.0, 10.0)
+    with pytest.raises(ValueError, match=match):
+        extractor.extract_subclip(clip_id, input_path, start_sec, end_sec)
 
 
-def test_extract_subclip_raises_error_when_end_equals_start(extractor, sample_video_file):
-    """Test that extract_subclip raises ValueError when end_sec == start_sec"""
-    clip_id = uuid4()
-
-    with pytest.raises(ValueError, match="end_sec .* must be > start_sec"):
-        extractor.extract_subclip(clip_id, sample_video_file, 10.0, 10.0)
-
-
-def test_extract_subclip_calls_ffmpeg_with_correct_params(extractor, sample_video_file):
+def test_extract_subclip_calls_ffmpeg_with_correct_params(extractor, clip_id, sample_video_file, mock_ffmpeg, mock_stat):
     """Test that extract_subclip calls ffmpeg with correct parameters"""
-    clip_id = uuid4()
     start_sec = 7234.5
     end_sec = 7398.2
 
-    with patch('src.services.ffmpeg.subclip.ffmpeg') as mock_ffmpeg:
-        # Mock ffmpeg chain
-        mock_input = MagicMock()
-        mock_output = MagicMock()
-
-        mock_ffmpeg.input.return_value = mock_input
-        mock_ffmpeg.output.return_value = mock_output
-        mock_ffmpeg.run.return_value = None
-
-        # Mock output file stat
-        with patch('pathlib.Path.stat') as mock_stat:
-            mock_stat_result = MagicMock()
-            mock_stat_result.st_size = 1024 * 1024  # 1 MB
-            mock_stat.return_value = mock_stat_result
+    extractor.extract_subclip(clip_id, sample_video_file, start_sec, end_sec)
 
-            extractor.extract_subclip(clip_id, sample_video_file, start_sec, end_sec)
+    # Verify fast input seek lands just before the start
+    mock_ffmpeg.input.assert_called_once_with(
+        sample_video_file,
+        ss=pytest.approx(start_sec - KEYFRAME_SEEK_MARGIN_SEC)
+    )
 
-        # Verify ffmpeg.input was called with correct params
-        mock_ffmpeg.input.assert_called_once_with(
-            sample_video_file,
-            ss=start_sec,
-            to=end_sec
-        )
+    # Verify output was called with codec copy and a short trimming seek
+    mock_ffmpeg.output.assert_called_once()
+    _assert_output_kwargs(
+        mock_ffmpeg,
+        ss=pytest.approx(KEYFRAME_SEEK_MARGIN_SEC),
+        t=pytest.approx(end_sec - start_sec),
+        c='copy',
+        avoid_negative_ts='make_zero',
+        movflags='+faststart'
+    )
 
-        # Verify output was called with codec copy
-        mock_ffmpeg.output.assert_called_once()
-        call_args = mock_ffmpeg.output.call_args[1]
-        assert call_args['c'] == 'copy'
-        assert call_args['avoid_negative_ts'] == 'make_zero'
-        assert call_args['movflags'] == '+faststart'
+    # Verify ffmpeg was run
+    mock_ffmpeg.run_async.assert_called_once()
 
-        # Verify ffmpeg.run was called
-        mock_ffmpeg.run.assert_called_once()
 
-
-def test_extract_subclip_returns_correct_metadata(extractor, sample_video_file, temp_clips_path):
+def test_extract_subclip_returns_correct_metadata(extractor, clip_id, sample_video_file, mock_ffmpeg, mock_stat):
     """Test that extract_subclip returns correct metadata"""
-    clip_id = uuid4()
     start_sec = 10.0
     end_sec = 45.8
 
-    with patch('src.services.ffmpeg.subclip.ffmpeg') as mock_ffmpeg:
-        mock_input = MagicMock()
-        mock_output = MagicMock()
-
-        mock_ffmpeg.input.return_value = mock_input
-        mock_ffmpeg.output.return_value = mock_output
-        mock_ffmpeg.run.return_value = None
+    mock_stat.return_value = SimpleNamespace(st_size=5 * 1024 * 1024)  # 5 MB
 
-        # Mock output file
-        with patch('pathlib.Path.stat') as mock_stat:
-            mock_stat_result = MagicMock()
-            mock_stat_result.st_size = 5 * 1024 * 1024  # 5 MB
-            mock_stat.return_value = mock_stat_result
+    result = extractor.extract_subclip(clip_id, sample_video_file, start_sec, end_sec)
 
-            result = extractor.extract_subclip(clip_id, sample_video_file, start_sec, end_sec)
+    assert 'file_path' in result
+    assert 'file_size_mb' in result
+    assert 'duration_sec' in result
+    assert str(clip_id) in result['file_path']
+    assert result['file_path'].endswith('.mp4')
+    assert result['file_size_mb'] == 5.0
+    assert result['duration_sec'] == 35.8  # 45.8 - 10.0
 
-        assert 'file_path' in result
-        assert 'file_size_mb' in result
-        assert 'duration_sec' in result
-        assert str(clip_id) in result['file_path']
-        assert result['file_path'].endswith('.mp4')
-        assert result['file_size_mb'] == 5.0
-        assert result['duration_sec'] == 35.8  # 45.8 - 10.0
 
-
-def test_extract_subclip_with_custom_extension(extractor, sample_video_file):
+def test_extract_subclip_with_custom_extension(extractor, clip_id, sample_video_file, mock_ffmpeg, mock_stat):
     """Test extract_subclip with custom output extension"""
-    clip_id = uuid4()
-
-    with patch('src.services.ffmpeg.subclip.ffmpeg') as mock_ffmpeg:
-        mock_input = MagicMock()
-        mock_output = MagicMock()
-
-        mock_ffmpeg.input.return_value = mock_input
-        mock_ffmpeg.output.return_value = mock_output
-        mock_ffmpeg.run.return_value = None
-
-        with patch('pathlib.Path.stat') as mock_stat:
-            mock_stat_result = MagicMock()
-            mock_stat_result.st_size = 1024 * 1024
-            mock_stat.return_value = mock_stat_result
-
-            result = extractor.extract_subclip(
-                clip_id,
-                sample_video_file,
-                10.0,
-                20.0,
-                output_extension=".mov"
-            )
-
-        assert result['file_path'].endswith('.mov')
-
-
-def test_extract_subclip_cleans_up_on_failure(extractor, sample_video_file, temp_clips_path):
-    """Test that failed extraction cleans up output file"""
-    clip_id = uuid4()
-    output_path = Path(temp_clips_path) / f"{clip_id}.mp4"
-
-    with patch('src.services.ffmpeg.subclip.ffmpeg') as mock_ffmpeg:
-        mock_input = MagicMock()
-        mock_output = MagicMock()
-
-        mock_ffmpeg.input.return_value = mock_input
-        mock_ffmpeg.output.return_value = mock_output
 
-        # Create file before error (simulating partial write)
-        output_path.write_bytes(b"partial content")
+    result = extractor.extract_subclip(
+        clip_id,
+        sample_video_file,
+        10.0,
+        20.0,
+        output_extension=".mov"
+    )
 
-        # Simulate ffmpeg error
-        mock_error = ffmpeg.Error('ffmpeg', b'', b'Extraction failed')
-        mock_ffmpeg.run.side_effect = mock_error
-        mock_ffmpeg.Error = ffmpeg.Error
+    assert result['file_path'].endswith('.mov')
 
-        with pytest.raises(ffmpeg.Error):
-            extractor.extract_subclip(clip_id, sample_video_file, 10.0, 20.0)
 
-        # File should be cleaned up
-        assert not output_path.exists()
+def test_extract_subclip_cleans_up_on_failure(extractor, clip_id, sample_video_file, temp_clips_path, mock_ffmpeg):
+    """Test that failed extraction cleans up the partial output"""
+    part_path = Path(temp_clips_path) / f"{clip_id}.part.mp4"
 
+    # Simulate ffmpeg error after a partial write
+    _mock_process(mock_ffmpeg, returncode=1, stderr=b'Extraction failed')
 
-def test_extract_subclip_uses_faststart_for_web_playback(extractor, sample_video_file):
-    """Test that extract_subclip uses faststart movflag for web optimization"""
-    clip_id = uuid4()
+    with pytest.raises(SubclipExtractionError, match="Extraction failed"):
+        extractor.extract_subclip(clip_id, sample_video_file, 10.0, 20.0)
 
-    with patch('src.services.ffmpeg.subclip.ffmpeg') as mock_ffmpeg:
-        mock_input = MagicMock()
-        mock_output = MagicMock()
+    # Partial file should be cleaned up, and nothing published
+    assert not part_path.exists()
+    assert not (Path(temp_clips_path) / f"{clip_id}.mp4").exists()
 
-        mock_ffmpeg.input.return_value = mock_input
-        mock_ffmpeg.output.return_value = mock_output
-        mock_ffmpeg.run.return_value = None
 
-        with patch('pathlib.Path.stat') as mock_stat:
-            mock_stat_result = MagicMock()
-            mock_stat_result.st_size = 1024 * 1024
-            mock_stat.return_value = mock_stat_result
+def test_extract_subclip_publishes_output_atomically(extractor, clip_id, sample_video_file, temp_clips_path, mock_ffmpeg, mock_stat):
+    """Test that ffmpeg writes a .part file that is renamed on success"""
 
-            extractor.extract_subclip(clip_id, sample_video_file, 10.0, 20.0)
+    result = extractor.extract_subclip(clip_id, sample_video_file, 10.0, 20.0)
 
-        # Verify faststart movflag
-        call_args = mock_ffmpeg.output.call_args[1]
-        assert call_args['movflags'] == '+faststart'
+    assert mock_ffmpeg.output.call_args.args[1] == str(Path(temp_clips_path) / f"{clip_id}.part.mp4")
+    assert Path(result['file_path']).read_bytes() == b"clip"
+    # os.path: Path.exists would go through the mocked Path.stat
+    assert not os.path.exists(Path(temp_clips_path) / f"{clip_id}.part.mp4")
 
 
-def test_extract_subclip_uses_avoid_negative_ts(extractor, sample_video_file):
-    """Test that extract_subclip uses avoid_negative_ts to fix timestamp issues"""
-    clip_id = uuid4()
+def test_extract_subclip_error_keeps_only_stderr_tail(extractor, clip_id, sample_video_file, mock_ffmpeg):
+    """Test that a huge ffmpeg log is cut to its last STDERR_TAIL_BYTES"""
+    stderr = b'x' * (3 * STDERR_TAIL_BYTES) + b'real error'
+    _mock_process(mock_ffmpeg, returncode=1, stderr=stderr)
 
-    with patch('src.services.ffmpeg.subclip.ffmpeg') as mock_ffmpeg:
-        mock_input = MagicMock()
-        mock_output = MagicMock()
+    with pytest.raises(ffmpeg.Error) as exc_info:
+        extractor.extract_subclip(clip_id, sample_video_file, 10.0, 20.0)
 
-        mock_ffmpeg.input.return_value = mock_input
-        mock_ffmpeg.output.return_value = mock_output
-        mock_ffmpeg.run.return_value = None
+    assert len(exc_info.value.stderr_tail) == STDERR_TAIL_BYTES
+    assert exc_info.value.stderr == stderr[-STDERR_TAIL_BYTES:]
 
-        with patch('pathlib.Path.stat') as mock_stat:
-            mock_stat_result = MagicMock()
-            mock_stat_result.st_size = 1024 * 1024
-            mock_stat.return_value = mock_stat_result
 
-            extractor.extract_subclip(clip_id, sample_video_file, 10.0, 20.0)
+@pytest.mark.parametrize("call,kwarg,value", [
+    ('output', 'movflags', '+faststart'),  # Web playback (moov atom at start)
+    ('output', 'avoid_negative_ts', 'make_zero'),  # Timestamp fix
+    ('run_async', 'overwrite_output', True),
+])
+def test_extract_subclip_ffmpeg_flag(extractor, clip_id, sample_video_file, mock_ffmpeg, mock_stat, call, kwarg, value):
+    """Test that extract_subclip passes the fixed ffmpeg flags"""
+    extractor.extract_subclip(clip_id, sample_video_file, 10.0, 20.0)
 
-        # Verify avoid_negative_ts
-        call_args = mock_ffmpeg.output.call_args[1]
-        assert call_args['avoid_negative_ts'] == 'make_zero'
-
-
-def test_extract_subclip_overwrites_existing_output(extractor, sample_video_file):
-    """Test that extract_subclip overwrites existing output"""
-    clip_id = uuid4()
-
-    with patch('src.services.ffmpeg.subclip.ffmpeg') as mock_ffmpeg:
-        mock_input = MagicMock()
-        mock_output = MagicMock()
-
-        mock_ffmpeg.input.return_value = mock_input
-        mock_ffmpeg.output.return_value = mock_output
-        mock_ffmpeg.run.return_value = None
-
-        with patch('pathlib.Path.stat') as mock_stat:
-            mock_stat_result = MagicMock()
-            mock_stat_result.st_size = 1024 * 1024
-            mock_stat.return_value = mock_stat_result
-
-            extractor.extract_subclip(clip_id, sample_video_file, 10.0, 20.0)
-
-        # Verify overwrite_output=True
-        call_args = mock_ffmpeg.run.call_args[1]
-        assert call_args['overwrite_output'] is True
+    assert getattr(mock_ffmpeg, call).call_args.kwargs[kwarg] == value
 
 
 def test_estimate_clip_size_calculates_correctly(extractor):
@@ -313,61 +253,114 @@ def test_estimate_clip_size_handles_fractional_results(extractor):
     assert abs(size - expected) < 0.001
 
 
-def test_extract_subclip_with_precise_timecodes(extractor, sample_video_file):
+def test_estimate_clip_size_is_static():
+    """Test that clip size can be estimated without an extractor instance"""
+    assert SubclipExtractor.estimate_clip_size(8.0, 60.0) == 60.0
+
+
+def test_extract_subclip_with_precise_timecodes(extractor, clip_id, sample_video_file, mock_ffmpeg, mock_stat):
     """Test extract_subclip with precise fractional timecodes"""
-    clip_id = uuid4()
     start_sec = 7234.567
     end_sec = 7398.123
 
-    with patch('src.services.ffmpeg.subclip.ffmpeg') as mock_ffmpeg:
-        mock_input = MagicMock()
-        mock_output = MagicMock()
+    result = extractor.extract_subclip(clip_id, sample_video_file, start_sec, end_sec)
 
-        mock_ffmpeg.input.return_value = mock_input
-        mock_ffmpeg.output.return_value = mock_output
-        mock_ffmpeg.run.return_value = None
+    # Verify precise timecodes survive the split seek
+    input_seek = mock_ffmpeg.input.call_args[1]['ss']
+    output_args = mock_ffmpeg.output.call_args[1]
+    assert input_seek + output_args['ss'] == pytest.approx(start_sec)
+    assert output_args['t'] == pytest.approx(end_sec - start_sec)
 
-        with patch('pathlib.Path.stat') as mock_stat:
-            mock_stat_result = MagicMock()
-            mock_stat_result.st_size = 1024 * 1024
-            mock_stat.return_value = mock_stat_result
+    # Verify duration calculation
+    expected_duration = end_sec - start_sec
+    assert abs(result['duration_sec'] - expected_duration) < 0.001
 
-            result = extractor.extract_subclip(clip_id, sample_video_file, start_sec, end_sec)
 
-        # Verify precise timecodes were passed
-        mock_ffmpeg.input.assert_called_once_with(
-            sample_video_file,
-            ss=start_sec,
-            to=end_sec
-        )
+def test_extract_subclip_output_seek_is_relative_without_copyts(extractor, clip_id, sample_video_file, mock_ffmpeg, mock_stat):
+    """Test that -copyts is not passed, since the output -ss is relative to the input seek"""
+    extractor.extract_subclip(clip_id, sample_video_file, 100.0, 110.0)
 
-        # Verify duration calculation
-        expected_duration = end_sec - start_sec
-        assert abs(result['duration_sec'] - expected_duration) < 0.001
+    assert 'copyts' not in mock_ffmpeg.input.call_args.kwargs
+    assert 'copyts' not in mock_ffmpeg.output.call_args.kwargs
+    _assert_output_kwargs(mock_ffmpeg, ss=pytest.approx(KEYFRAME_SEEK_MARGIN_SEC))
 
 
-def test_extract_subclip_with_zero_start_time(extractor, sample_video_file):
+def test_extract_subclip_with_zero_start_time(extractor, clip_id, sample_video_file, mock_ffmpeg, mock_stat):
     """Test extract_subclip starting from beginning of video"""
-    clip_id = uuid4()
+    extractor.extract_subclip(clip_id, sample_video_file, 0.0, 30.0)
+
+    # Should work with zero start time (no seek margin before 0)
+    mock_ffmpeg.input.assert_called_once_with(sample_video_file, ss=0.0)
+    _assert_output_kwargs(mock_ffmpeg, ss=0.0, t=30.0)
+
+
+def test_extract_subclip_skips_probe_when_metadata_provided(extractor, clip_id, sample_video_file, mock_ffmpeg, mock_stat):
+    """Test that known source metadata avoids probing the input"""
+    metadata = {'duration_sec': 100.0, 'video_codec': 'h264', 'audio_codec': 'aac'}
+
+    extractor.extract_subclip(clip_id, sample_video_file, 10.0, 20.0, input_metadata=metadata)
+
+    mock_ffmpeg.probe.assert_not_called()
+
+
+def test_extract_subclip_trust_extension_skips_probe(extractor, clip_id, sample_video_file, mock_ffmpeg, mock_stat):
+    """Test that a trusted container extension goes straight to extraction"""
+    result = extractor.extract_subclip(clip_id, sample_video_file, 10.0, 20.0, trust_extension=True)
+
+    mock_ffmpeg.probe.assert_not_called()
+    assert result['duration_sec'] == 10.0
+
+
+def test_extract_subclip_trust_extension_probes_other_containers(extractor, clip_id, tmp_path, mock_ffmpeg, mock_stat):
+    """Test that trust_extension still probes containers outside TRUSTED_EXTENSIONS"""
+    source = tmp_path / "original.mxf"
+    source.write_bytes(b"fake video content")
+
+    extractor.extract_subclip(clip_id, str(source), 10.0, 20.0, trust_extension=True)
+
+    mock_ffmpeg.probe.assert_called_once()
+
+
+def test_extract_subclip_probes_source_once(extractor, clip_id, sample_video_file, mock_ffmpeg, mock_stat):
+    """Test that repeated extractions from one source reuse the probe"""
+    extractor.extract_subclip(clip_id, sample_video_file, 10.0, 20.0)
+    extractor.extract_subclip(clip_id, sample_video_file, 30.0, 40.0)
+
+    assert mock_ffmpeg.probe.call_count == 1
+
+
+def test_probe_cache_shared_across_paths_and_instances(extractor, clip_id, sample_video_file, tmp_path, mock_ffmpeg, mock_stat):
+    """Test that a symlinked path and a fresh extractor hit the same cache entry"""
+    link = tmp_path / "link.mp4"
+    link.symlink_to(sample_video_file)
+
+    extractor.extract_subclip(clip_id, sample_video_file, 10.0, 20.0)
+    SubclipExtractor(str(tmp_path / "clips")).extract_subclip(clip_id, str(link), 10.0, 20.0)
+
+    assert mock_ffmpeg.probe.call_count == 1
+
+
+def test_probe_input_reads_bitrate(extractor, sample_video_file, mock_ffmpeg):
+    """Test that the container bitrate is part of the probed metadata"""
+    mock_ffmpeg.probe.return_value['format']['bit_rate'] = '8000000'
+
+    metadata = extractor.probe_input(sample_video_file)
+
+    assert metadata['bitrate_bps'] == 8000000
+    assert metadata['duration_sec'] == 9000.0
+
 
-    with patch('src.services.ffmpeg.subclip.ffmpeg') as mock_ffmpeg:
-        mock_input = MagicMock()
-        mock_output = MagicMock()
+def test_extract_subclip_clamps_end_to_source_duration(extractor, clip_id, sample_video_file, mock_ffmpeg, mock_stat):
+    """Test that the clip stops at the end of the source"""
+    metadata = {'duration_sec': 25.0}
 
-        mock_ffmpeg.input.return_value = mock_input
-        mock_ffmpeg.output.return_value = mock_output
-        mock_ffmpeg.run.return_value = None
+    result = extractor.extract_subclip(clip_id, sample_video_file, 10.0, 40.0, input_metadata=metadata)
 
-        with patch('pathlib.Path.stat') as mock_stat:
-            mock_stat_result = MagicMock()
-            mock_stat_result.st_size = 1024 * 1024
-            mock_stat.return_value = mock_stat_result
+    assert result['duration_sec'] == 15.0
+    _assert_output_kwargs(mock_ffmpeg, t=15.0)
 
-            extractor.extract_subclip(clip_id, sample_video_file, 0.0, 30.0)
 
-        # Should work with zero start time
-        mock_ffmpeg.input.assert_called_once_with(
-            sample_video_file,
-            ss=0.0,
-            to=30.0
-        )
+def test_extract_subclip_rejects_start_beyond_source(extractor, clip_id, sample_video_file, mock_ffmpeg):
+    """Test that a start past the end of the source is rejected"""
+    with pytest.raises(ValueError, match="beyond the source duration"):
+        extractor.extract_subclip(clip_id, sample_video_file, 30.0, 40.0, input_metadata={'duration_sec': 25.0})
@@ -0,0 +1,52 @@
+"""
+Test Filesystem Utilities
+"""
+import pytest
+from unittest.mock import patch
+
+from src.utils.fs import TrashReaper, remove_tree_in_background
+
+
+def test_remove_tree_in_background_renames_before_delete(tmp_path):
+    """Test that the original path is gone before the background delete runs"""
+    target = tmp_path / "proxy"
+    target.mkdir()
+    (target / "segment_000.m4s").write_bytes(b"segment")
+
+    with patch('src.utils.fs.trash_reaper') as mock_reaper:
+        trash = remove_tree_in_background(target, tmp_path / ".trash")
+
+    assert not target.exists()
+    assert trash.parent == tmp_path / ".trash"
+    assert trash.name.startswith("proxy-")
+    assert (trash / "segment_000.m4s").exists()
+    mock_reaper.put.assert_called_once_with(trash)
+
+
+def test_remove_tree_in_background_raises_for_missing_dir(tmp_path):
+    """Test that a missing directory surfaces the rename error"""
+    with pytest.raises(FileNotFoundError):
+        remove_tree_in_background(tmp_path / "missing", tmp_path / ".trash")
+
+
+def test_trash_reaper_deletes_queued_directories(tmp_path):
+    """Test that queued directories are removed by the reaper thread"""
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "keep.txt").write_bytes(b"keep")
+
+    reaper = TrashReaper()
+    targets = []
+    for name in ("a", "b"):
+        target = tmp_path / name
+        target.mkdir()
+        (target / "segment_000.m4s").write_bytes(b"segment")
+        (target / "linked").symlink_to(outside, target_is_directory=True)
+        targets.append(target)
+        reaper.put(target)
+
+    reaper.join()
+
+    assert not any(target.exists() for target in targets)
+    # Symlinks are removed, never followed
+    assert (outside / "keep.txt").exists()
@@ -1,9 +1,11 @@
 """
 Test Timecode Utilities
 """
+import numpy as np
 import pytest
 from src.utils.timecode import (
     calculate_clip_timecode,
+    calculate_clip_timecodes_batch,
     format_timecode,
     parse_timecode
 )
@@ -92,6 +94,31 @@ def test_calculate_clip_timecode_negative_padding():
         calculate_clip_timecode(10.0, 20.0, -1.0, 60.0)
 
 
+def test_calculate_clip_timecodes_batch_matches_scalar():
+    """Test batch calculation agrees with the scalar version per clip"""
+    in_secs = np.array([10.0, 2.0, 0.0, 55.0])
+    out_secs = np.array([20.0, 58.0, 1.0, 60.0])
+
+    starts, ends, durations = calculate_clip_timecodes_batch(in_secs, out_secs, 3.0, 60.0)
+
+    for i in range(len(in_secs)):
+        expected = calculate_clip_timecode(in_secs[i], out_secs[i], 3.0, 60.0)
+        assert (starts[i], ends[i], durations[i]) == expected
+
+
+@pytest.mark.parametrize("in_secs,out_secs,padding,match", [
+    ([10.0, -1.0], [20.0, 5.0], 0.0, "in_sec must be >= 0"),
+    ([10.0, 30.0], [20.0, 30.0], 0.0, "must be > in_sec"),
+    ([10.0, 30.0], [20.0, 61.0], 0.0, "cannot exceed video duration"),
+    ([10.0], [20.0], -1.0, "padding_sec must be >= 0"),
+    ([10.0, 20.0], [20.0], 0.0, "same shape"),
+])
+def test_calculate_clip_timecodes_batch_invalid(in_secs, out_secs, padding, match):
+    """Test batch calculation rejects the same inputs as the scalar version"""
+    with pytest.raises(ValueError, match=match):
+        calculate_clip_timecodes_batch(np.array(in_secs), np.array(out_secs), padding, 60.0)
+
+
 def test_format_timecode_basic():
     """Test basic timecode formatting"""
     assert format_timecode(65.5) == "00:01:05.500"
@@ -105,6 +132,17 @@ def test_format_timecode_hours():
     assert format_timecode(7265.5) == "02:01:05.500"
 
 
+def test_format_timecode_rounding_carries():
+    """Test that rounding up to the next second carries into minutes"""
+    assert format_timecode(59.9996) == "00:01:00.000"
+    assert format_timecode(3599.9999) == "01:00:00.000"
+
+
+def test_format_timecode_over_99_hours():
+    """Test that hours beyond two digits are not truncated"""
+    assert format_timecode(100 * 3600 + 1.5) == "100:00:01.500"
+
+
 def test_parse_timecode_hh_mm_ss():
     """Test parsing HH:MM:SS format"""
     assert parse_timecode("00:01:05.500") == 65.5